@@ -7,25 +7,139 @@ Analyzes command history to discover patterns and generate insights.
 import click
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.panel import Panel
-from rich.text import Text
 
 # Add src to path
 sys.path.append(str(Path(__file__).parent / "src"))
 
-from collectors.history_collector import CommandHistoryCollector
-from analyzers.pattern_analyzer import PatternAnalyzer
-from analyzers.ai_analyzer import AIAnalyzer
-from visualizers.report_generator import ReportGenerator
-from visualizers.wordcloud_generator import WordcloudGenerator
-from utils.config_manager import ConfigManager
-from utils.data_manager import DataManager
+# Heavy modules (matplotlib, wordcloud, requests, psutil) are imported inside
+# the commands that need them so `status` and `--help` start instantly.
 
 console = Console()
 
+
+def _progress():
+    """Build the spinner used by every pipeline stage."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console
+    )
+
+
+def _data_manager():
+    """Build the DataManager, honouring the data.compression_enabled setting."""
+    from utils.config_manager import ConfigManager
+    from utils.data_manager import DataManager
+    
+    return DataManager(compression_enabled=ConfigManager().get('data.compression_enabled', False))
+
+
+def _history_collector():
+    """Build the collector, skipping commands that match collection.ignore_patterns."""
+    from collectors.history_collector import CommandHistoryCollector
+    from utils.config_manager import ConfigManager
+    
+    return CommandHistoryCollector(ignore_matcher=ConfigManager().get_ignore_matcher())
+
+
+def _stage(progress, task, description):
+    """Point the caller's spinner at the next pipeline stage, if there is one."""
+    if progress is not None:
+        progress.update(task, description=description)
+
+
+class _Counted:
+    """Iterator wrapper that counts the items passed through it."""
+    
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self.count = 0
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        item = next(self._iterator)
+        self.count += 1
+        return item
+
+
+# The *_impl helpers below hold the Click-free pipeline stages. Callers pass
+# in their shared Progress task and DataManager so a multi-stage run drives a
+# single spinner and data manager instead of rebuilding them per stage.
+
+def _collect_impl(shell, limit, *, progress=None, task=None):
+    """Collect commands from shell history and active sessions."""
+    _stage(progress, task, "Collecting commands...")
+    collector = _history_collector()
+    return collector.collect_commands(shell=shell, limit=limit)
+
+
+# Bump when PatternAnalyzer output changes so stale cache entries are ignored.
+PATTERNS_CACHE_VERSION = b"patterns-1"
+
+
+def _analyze_impl(commands, *, data_manager=None, cache_key=None, progress=None, task=None):
+    """Run pattern analysis over in-memory commands, reusing cached results."""
+    _stage(progress, task, "Analyzing patterns...")
+    if data_manager is not None and cache_key is not None:
+        cached = data_manager.load_cached('patterns', cache_key)
+        if cached is not None:
+            return cached
+    
+    from analyzers.pattern_analyzer import PatternAnalyzer
+    
+    analyzer = PatternAnalyzer()
+    patterns = analyzer.analyze_patterns(commands)
+    
+    if data_manager is not None and cache_key is not None:
+        data_manager.save_cached('patterns', cache_key, patterns)
+    
+    return patterns
+
+
+def _insights_impl(commands_data, patterns_data, model, *, data_manager=None, progress=None, task=None):
+    """Generate AI insights from in-memory commands and patterns."""
+    from analyzers.ai_analyzer import AIAnalyzer
+    from utils.config_manager import ConfigManager
+    
+    _stage(progress, task, "Generating AI insights...")
+    cache_dir = data_manager.cache_dir('insights') if data_manager is not None else None
+    ai_analyzer = AIAnalyzer(model=model, cache_dir=cache_dir,
+                             keep_alive=ConfigManager().get('ollama.keep_alive'))
+    try:
+        return ai_analyzer.generate_insights(commands_data, patterns_data)
+    finally:
+        ai_analyzer.close()
+
+
+def _visualize_impl(commands_data, insights_data, output_dir, *, progress=None, task=None):
+    """Generate the word cloud and report, returning both paths."""
+    from visualizers.report_generator import ReportGenerator
+    from visualizers.wordcloud_generator import WordcloudGenerator
+    
+    _stage(progress, task, "Generating word cloud and report...")
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    
+    wordcloud_gen = WordcloudGenerator()
+    report_gen = ReportGenerator()
+    
+    # The two outputs are independent; the word cloud only touches PIL, so
+    # it can safely render while the report drives matplotlib.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        wordcloud_future = executor.submit(wordcloud_gen.generate_wordcloud, commands_data, output_dir)
+        report_future = executor.submit(report_gen.generate_report, commands_data, insights_data, output_dir)
+        
+        wordcloud_path = wordcloud_future.result()
+        _stage(progress, task, "Finishing report...")
+        return wordcloud_path, report_future.result()
+
 @click.group()
 @click.version_option(version="1.0.0")
 def cli():
@@ -40,22 +154,17 @@ def collect(shell, limit, output):
     """Collect command history from active terminal sessions."""
     console.print(Panel.fit("🔍 [bold blue]Collecting Command History[/bold blue]", border_style="blue"))
     
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("Collecting commands...", total=None)
         
         try:
-            collector = CommandHistoryCollector()
-            commands = collector.collect_commands(shell=shell, limit=limit)
-            
-            progress.update(task, description="Saving data...")
-            data_manager = DataManager()
+            # The previous output is only replaced once every command is written
+            collector = _history_collector()
+            commands = _Counted(collector.iter_commands(shell=shell, limit=limit))
+            data_manager = _data_manager()
             data_manager.save_commands(commands, output)
             
-            console.print(f"✅ [green]Collected {len(commands)} commands[/green]")
+            console.print(f"✅ [green]Collected {commands.count} commands[/green]")
             console.print(f"📁 [blue]Saved to: {output}[/blue]")
             
         except Exception as e:
@@ -69,25 +178,25 @@ def analyze(input, output):
     """Analyze command patterns and identify automation opportunities."""
     console.print(Panel.fit("🧠 [bold green]Analyzing Command Patterns[/bold green]", border_style="green"))
     
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("Loading commands...", total=None)
         
         try:
-            data_manager = DataManager()
-            commands = data_manager.load_commands(input)
+            data_manager = _data_manager()
+            # Streamed lazily: a cache hit never parses the commands file
+            commands = data_manager.iter_commands(input)
+            # Keyed on the file's bytes, hashed without reading it into memory
+            cache_key = data_manager.file_hash(input, prefix=PATTERNS_CACHE_VERSION)
             
-            progress.update(task, description="Analyzing patterns...")
-            analyzer = PatternAnalyzer()
-            patterns = analyzer.analyze_patterns(commands)
+            patterns = _analyze_impl(
+                commands, data_manager=data_manager, cache_key=cache_key,
+                progress=progress, task=task
+            )
             
             progress.update(task, description="Saving analysis...")
             data_manager.save_patterns(patterns, output)
             
-            console.print(f"✅ [green]Analyzed {len(commands)} commands[/green]")
+            console.print(f"✅ [green]Analyzed {patterns['summary'].get('total_commands', 0)} commands[/green]")
             console.print(f"🔍 [blue]Found {len(patterns['frequent_commands'])} frequent patterns[/blue]")
             console.print(f"🤖 [yellow]Identified {len(patterns['automation_candidates'])} automation candidates[/yellow]")
             
@@ -104,21 +213,18 @@ def insights(commands, patterns, output, model):
     """Generate AI-powered insights about your workflow."""
     console.print(Panel.fit("🤖 [bold purple]Generating AI Insights[/bold purple]", border_style="purple"))
     
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("Loading data...", total=None)
         
         try:
-            data_manager = DataManager()
+            data_manager = _data_manager()
             commands_data = data_manager.load_commands(commands)
             patterns_data = data_manager.load_patterns(patterns)
             
-            progress.update(task, description="Generating AI insights...")
-            ai_analyzer = AIAnalyzer(model=model)
-            insights = ai_analyzer.generate_insights(commands_data, patterns_data)
+            insights = _insights_impl(
+                commands_data, patterns_data, model,
+                data_manager=data_manager, progress=progress, task=task
+            )
             
             progress.update(task, description="Saving insights...")
             data_manager.save_insights(insights, output)
@@ -139,25 +245,17 @@ def visualize(commands, insights, output_dir):
     """Generate visualizations and reports."""
     console.print(Panel.fit("🎨 [bold magenta]Generating Visualizations[/bold magenta]", border_style="magenta"))
     
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[progress.description]{task.description}"),
-        console=console
-    ) as progress:
+    with _progress() as progress:
         task = progress.add_task("Loading data...", total=None)
         
         try:
-            data_manager = DataManager()
+            data_manager = _data_manager()
             commands_data = data_manager.load_commands(commands)
             insights_data = data_manager.load_insights(insights)
             
-            progress.update(task, description="Generating word cloud...")
-            wordcloud_gen = WordcloudGenerator()
-            wordcloud_path = wordcloud_gen.generate_wordcloud(commands_data, output_dir)
-            
-            progress.update(task, description="Generating report...")
-            report_gen = ReportGenerator()
-            report_path = report_gen.generate_report(commands_data, insights_data, output_dir)
+            wordcloud_path, report_path = _visualize_impl(
+                commands_data, insights_data, output_dir, progress=progress, task=task
+            )
             
             console.print(f"✅ [green]Generated visualizations[/green]")
             console.print(f"☁️ [blue]Word cloud: {wordcloud_path}[/blue]")
@@ -172,23 +270,52 @@ def full_analysis():
     """Run complete analysis pipeline: collect → analyze → insights → visualize."""
     console.print(Panel.fit("🚀 [bold cyan]Running Full Analysis Pipeline[/bold cyan]", border_style="cyan"))
     
+    # Results are threaded through the stages in memory; each artifact is
+    # written once instead of being saved and re-read between stages.
     try:
-        # Step 1: Collect
-        console.print("\n[bold]Step 1: Collecting Commands[/bold]")
-        ctx = click.Context(cli)
-        collect.callback(shell='auto', limit=1000, output='data/commands.json')
-        
-        # Step 2: Analyze
-        console.print("\n[bold]Step 2: Analyzing Patterns[/bold]")
-        analyze.callback(input='data/commands.json', output='data/patterns.json')
+        data_manager = _data_manager()
         
-        # Step 3: Generate Insights
-        console.print("\n[bold]Step 3: Generating AI Insights[/bold]")
-        insights.callback(commands='data/commands.json', patterns='data/patterns.json', output='data/insights.json')
-        
-        # Step 4: Visualize
-        console.print("\n[bold]Step 4: Creating Visualizations[/bold]")
-        visualize.callback(commands='data/commands.json', insights='data/insights.json', output_dir='reports')
+        with _progress() as progress:
+            # Step 1: Collect
+            console.print("\n[bold]Step 1: Collecting Commands[/bold]")
+            task = progress.add_task("Collecting commands...", total=None)
+            commands = _collect_impl('auto', 1000, progress=progress, task=task)
+            console.print(f"✅ [green]Collected {len(commands)} commands[/green]")
+            
+            # Step 2: Analyze
+            # Freshly collected commands carry run-dependent timestamps and
+            # pids, so a cache lookup here could never hit
+            console.print("\n[bold]Step 2: Analyzing Patterns[/bold]")
+            patterns = _analyze_impl(commands, progress=progress, task=task)
+            console.print(f"🔍 [blue]Found {len(patterns['frequent_commands'])} frequent patterns[/blue]")
+            console.print(f"🤖 [yellow]Identified {len(patterns['automation_candidates'])} automation candidates[/yellow]")
+            
+            # Step 3: Generate Insights
+            console.print("\n[bold]Step 3: Generating AI Insights[/bold]")
+            insights_data = _insights_impl(
+                commands, patterns, 'llama3.2',
+                data_manager=data_manager, progress=progress, task=task
+            )
+            console.print(f"📊 [blue]Workflow type: {insights_data.get('workflow_type', 'Unknown')}[/blue]")
+            console.print(f"🎯 [yellow]Primary focus: {insights_data.get('primary_focus', 'Unknown')}[/yellow]")
+            
+            progress.update(task, description="Saving data...")
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                saves = [
+                    executor.submit(data_manager.save_commands, commands, 'data/commands.json'),
+                    executor.submit(data_manager.save_patterns, patterns, 'data/patterns.json'),
+                    executor.submit(data_manager.save_insights, insights_data, 'data/insights.json'),
+                ]
+                for save in saves:
+                    save.result()
+            
+            # Step 4: Visualize
+            console.print("\n[bold]Step 4: Creating Visualizations[/bold]")
+            wordcloud_path, report_path = _visualize_impl(
+                commands, insights_data, 'reports', progress=progress, task=task
+            )
+            console.print(f"☁️ [blue]Word cloud: {wordcloud_path}[/blue]")
+            console.print(f"📄 [blue]Report: {report_path}[/blue]")
         
         console.print("\n🎉 [bold green]Full analysis complete![/bold green]")
         console.print("📁 [blue]Check the 'reports' directory for your results[/blue]")
@@ -207,20 +334,32 @@ def status():
     
     if data_dir.exists():
         console.print("\n[bold]Data Files:[/bold]")
-        for file in data_dir.glob("*.json"):
-            size = file.stat().st_size
-            console.print(f"  📄 {file.name} ({size} bytes)")
+        _print_file_listing(data_dir, suffix=".json")
     else:
         console.print("  ❌ No data directory found")
     
     if reports_dir.exists():
         console.print("\n[bold]Reports:[/bold]")
-        for file in reports_dir.glob("*"):
-            if file.is_file():
-                size = file.stat().st_size
-                console.print(f"  📄 {file.name} ({size} bytes)")
+        _print_file_listing(reports_dir)
     else:
         console.print("  ❌ No reports directory found")
 
+
+def _print_file_listing(directory, suffix=""):
+    """Print the visible files in a directory with their sizes in one scandir pass."""
+    # DirEntry caches type and stat information from the directory read.
+    # Dot-entries (the .cache directory, chart manifests, in-progress
+    # temporary files) are internal and left out.
+    with os.scandir(directory) as it:
+        entries = sorted(
+            (entry for entry in it
+             if not entry.name.startswith('.') and entry.name.endswith(suffix) and entry.is_file()),
+            key=lambda entry: entry.name,
+        )
+    
+    lines = [f"  📄 {entry.name} ({entry.stat().st_size} bytes)" for entry in entries]
+    if lines:
+        console.print("\n".join(lines))
+
 if __name__ == '__main__':
     cli() 
\ No newline at end of file
@@ -4,6 +4,7 @@ Demo script for CmdChronicle
 Shows how to use the tool programmatically.
 """
 
+import os
 import sys
 from pathlib import Path
 
@@ -12,10 +13,67 @@ sys.path.append(str(Path(__file__).parent / "src"))
 
 from collectors.history_collector import CommandHistoryCollector
 from analyzers.pattern_analyzer import PatternAnalyzer
-from analyzers.ai_analyzer import AIAnalyzer
+from analyzers.ai_analyzer import AIAnalyzer, INSIGHTS_CACHE_VERSION
 from visualizers.wordcloud_generator import WordcloudGenerator
+from utils.config_manager import ConfigManager
 from utils.data_manager import DataManager
 
+
+# Bump when PatternAnalyzer or word cloud output changes so cached demo
+# results expire; insights also expire with INSIGHTS_CACHE_VERSION
+DEMO_CACHE_VERSION = 1
+
+
+def _demo_cache_key(data_manager, sample_commands):
+    """Key demo results on the sample data and cache versions so a change to either expires them."""
+    versions = (DEMO_CACHE_VERSION, INSIGHTS_CACHE_VERSION)
+    return data_manager.content_hash(repr((versions, sample_commands)).encode('utf-8'))
+
+
+def _cached_patterns(data_manager, key, sample_commands):
+    """Pattern analysis for the sample, computed once and then read from cache."""
+    patterns = data_manager.load_cached('demo', f"{key}-patterns")
+    if patterns is None:
+        patterns = PatternAnalyzer().analyze_patterns(sample_commands)
+        data_manager.save_cached('demo', f"{key}-patterns", patterns)
+    return patterns
+
+
+def _cached_insights(data_manager, key, sample_commands, patterns):
+    """AI insights for the sample; a cache hit skips the Ollama round-trip."""
+    insights = data_manager.load_cached('demo', f"{key}-insights")
+    if insights is None:
+        insights = AIAnalyzer().generate_insights(sample_commands, patterns)
+        # Fallback results are not cached so a later run can still reach Ollama
+        if insights.get('model_used') != 'fallback_analysis':
+            data_manager.save_cached('demo', f"{key}-insights", insights)
+    return insights
+
+
+def _cached_wordcloud(data_manager, key, wordcloud_gen, sample_commands, output_dir):
+    """Render the sample word cloud unless a previous demo run already did."""
+    record = data_manager.load_cached('demo', f"{key}-wordcloud")
+    # The image is only reused if nothing has rewritten it since the demo did
+    if record is not None and _mtime_ns(record['path']) == record.get('mtime_ns'):
+        return record['path']
+    
+    # Its own file name, so `cmdchronicle visualize` and the page's word
+    # cloud (command_wordcloud.png) never overwrite the demo's image
+    wordcloud_path = wordcloud_gen.generate_wordcloud(sample_commands, output_dir,
+                                                      filename="demo_wordcloud.png")
+    data_manager.save_cached('demo', f"{key}-wordcloud",
+                             {'path': wordcloud_path, 'mtime_ns': _mtime_ns(wordcloud_path)})
+    return wordcloud_path
+
+
+def _mtime_ns(path):
+    """Modification time of path in nanoseconds, or None if it is missing."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
 def main():
     print("🎯 CmdChronicle Demo")
     print("=" * 50)
@@ -36,10 +94,15 @@ def main():
     
     print(f"📊 Analyzing {len(sample_commands)} sample commands...")
     
+    # The sample is static, so results from a previous run are reused
+    data_manager = DataManager(
+        compression_enabled=ConfigManager().get('data.compression_enabled', False)
+    )
+    cache_key = _demo_cache_key(data_manager, sample_commands)
+    
     # 1. Pattern Analysis
     print("\n🔍 Step 1: Pattern Analysis")
-    analyzer = PatternAnalyzer()
-    patterns = analyzer.analyze_patterns(sample_commands)
+    patterns = _cached_patterns(data_manager, cache_key, sample_commands)
     
     print(f"   - Found {len(patterns['frequent_commands'])} frequent commands")
     print(f"   - Identified {len(patterns['automation_candidates'])} automation opportunities")
@@ -47,8 +110,7 @@ def main():
     
     # 2. AI Analysis (fallback mode)
     print("\n🤖 Step 2: AI Analysis")
-    ai_analyzer = AIAnalyzer()
-    insights = ai_analyzer.generate_insights(sample_commands, patterns)
+    insights = _cached_insights(data_manager, cache_key, sample_commands, patterns)
     
     print(f"   - Workflow type: {insights.get('workflow_type', 'Unknown')}")
     print(f"   - Primary focus: {insights.get('primary_focus', 'Unknown')}")
@@ -57,7 +119,6 @@ def main():
     
     # 3. Save data
     print("\n💾 Step 3: Saving Data")
-    data_manager = DataManager()
     data_manager.save_commands(sample_commands, 'data/demo_commands.json')
     data_manager.save_patterns(patterns, 'data/demo_patterns.json')
     data_manager.save_insights(insights, 'data/demo_insights.json')
@@ -66,7 +127,7 @@ def main():
     # 4. Generate visualizations
     print("\n🎨 Step 4: Generating Visualizations")
     wordcloud_gen = WordcloudGenerator()
-    wordcloud_path = wordcloud_gen.generate_wordcloud(sample_commands, 'reports')
+    wordcloud_path = _cached_wordcloud(data_manager, cache_key, wordcloud_gen, sample_commands, 'reports')
     print(f"   - Word cloud generated: {wordcloud_path}")
     
     # 5. Generate commemorative page
@@ -3,47 +3,261 @@ AI Analyzer
 Uses local Ollama to generate insights about command patterns and workflows.
 """
 
+import copy
+import hashlib
+import heapq
 import json
+import os
+import re
+import threading
+import time
 import requests
-from typing import List, Dict, Any
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import MappingProxyType
+from typing import List, Dict, Any, FrozenSet, Iterable, Mapping, Optional, Sequence, Tuple, Union
+from .pattern_analyzer import LONG_COMMAND_PATTERN
+
+try:
+    from ..utils.json_io import dumps_json, loads_json, now_iso
+except ImportError:
+    # Imported as a top-level package with src/ on sys.path
+    from utils.json_io import dumps_json, loads_json, now_iso
+
+# Bump when the prompt or response parsing changes so cached insights expire
+INSIGHTS_CACHE_VERSION = 1
+
+# Most insight files kept in cache_dir; the oldest are deleted beyond this
+INSIGHTS_CACHE_MAX_ENTRIES = 256
+
+# Default time Ollama keeps the model loaded between requests
+DEFAULT_KEEP_ALIVE = '30m'
+
+# Consecutive failed requests after which Ollama is skipped for a while
+CIRCUIT_BREAKER_THRESHOLD = 2
+CIRCUIT_BREAKER_COOLDOWN = 60.0
+
+# Number of leading commands included verbatim in the prompt context
+COMMAND_SAMPLE_SIZE = 50
+
+# Response structure requested from the model
+INSIGHT_SCHEMA = """{
+    "workflow_type": "classification of the user's primary workflow",
+    "primary_focus": "main area of work/technology focus",
+    "workflow_characteristics": ["list", "of", "key", "characteristics"],
+    "automation_opportunities": ["list", "of", "automation", "suggestions"],
+    "productivity_insights": ["list", "of", "productivity", "observations"],
+    "skill_level": "estimated skill level (beginner/intermediate/advanced/expert)",
+    "recommendations": ["list", "of", "recommendations", "for", "improvement"],
+    "fun_title": "a fun, creative title for this user's workflow",
+    "personality_traits": ["list", "of", "personality", "traits", "inferred", "from", "commands"]
+}"""
+
+PROMPT_CLOSING = (
+    "Focus on being insightful, practical, and fun. The user is a developer who "
+    "wants to understand their patterns and improve their workflow."
+)
+
+# Workflow archetypes for classification, shared by every AIAnalyzer
+_WORKFLOW_ARCHETYPES: Mapping[str, Dict[str, Any]] = MappingProxyType({
+    'frontend_developer': {
+        'keywords': ('npm', 'yarn', 'node', 'react', 'vue', 'angular', 'webpack', 'babel'),
+        'description': 'Frontend development with modern JavaScript frameworks'
+    },
+    'backend_developer': {
+        'keywords': ('python', 'django', 'flask', 'node', 'express', 'java', 'spring'),
+        'description': 'Backend development with server-side technologies'
+    },
+    'devops_engineer': {
+        'keywords': ('docker', 'kubernetes', 'kubectl', 'terraform', 'ansible', 'jenkins'),
+        'description': 'DevOps and infrastructure management'
+    },
+    'data_scientist': {
+        'keywords': ('python', 'jupyter', 'pandas', 'numpy', 'matplotlib', 'r', 'sql'),
+        'description': 'Data analysis and machine learning'
+    },
+    'system_administrator': {
+        'keywords': ('sudo', 'systemctl', 'apt', 'yum', 'ssh', 'rsync', 'cron'),
+        'description': 'System administration and maintenance'
+    },
+    'security_analyst': {
+        'keywords': ('nmap', 'wireshark', 'tcpdump', 'openssl', 'gpg', 'hash'),
+        'description': 'Security analysis and penetration testing'
+    }
+})
+
+
+def _build_keyword_index(archetypes: Mapping[str, Dict[str, Any]]) -> Dict[str, Tuple[str, ...]]:
+    """Map each lowercased keyword to the archetypes that list it."""
+    index: Dict[str, List[str]] = defaultdict(list)
+    for workflow, config in archetypes.items():
+        for keyword in config['keywords']:
+            index[keyword.lower()].append(workflow)
+    return {keyword: tuple(workflows) for keyword, workflows in index.items()}
+
+
+# Lets classification check each shared keyword (e.g. 'python', 'node') once per tool
+_KEYWORD_TO_WORKFLOWS = _build_keyword_index(_WORKFLOW_ARCHETYPES)
+
+# Static parts of the single-dataset prompt around the per-call data summary
+_ANALYSIS_PROMPT_HEADER = (
+    "\nYou are an expert command-line workflow analyst. Analyze the following command "
+    "history data and provide insights about the user's work patterns, automation "
+    "opportunities, and workflow characteristics.\n\n"
+)
+_ANALYSIS_PROMPT_FOOTER = (
+    "\n\nPlease provide a JSON response with the following structure:\n"
+    f"{INSIGHT_SCHEMA}\n\n{PROMPT_CLOSING}\n"
+)
+
+# Workflow keywords looked for in free-text replies, in precedence order;
+# each alternation is scanned by the regex engine in C rather than once per word
+_TEXT_WORKFLOW_PATTERNS = [
+    ('frontend_development', re.compile('frontend|react|vue|angular')),
+    ('backend_development', re.compile('backend|server|api')),
+    ('devops_engineering', re.compile('devops|docker|kubernetes')),
+]
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def _extract_first_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse the first JSON object in text, ignoring any chatter around it.
+    
+    raw_decode stops at the object's closing brace in one C-level pass, so
+    braces in trailing prose no longer break parsing the way slicing up to
+    rfind('}') did. Raises json.JSONDecodeError if the object is malformed.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    return _JSON_DECODER.raw_decode(text, start)[0]
+
+
+@dataclass
+class _CmdStats:
+    """Per-dataset command statistics gathered in one pass over commands_data."""
+    sample: List[str]
+    total: int
+    unique: int
+    shell_distribution: Dict[str, int]
+    time_span: str
+
+
+def _append_lines(parts: List[str], lines: Iterable[str]) -> None:
+    """Append lines to parts separated by newlines, like '\\n'.join(lines)."""
+    for i, line in enumerate(lines):
+        if i:
+            parts.append('\n')
+        parts.append(line)
+
+
+class _ObjectCloseScanner:
+    """Tracks streamed text and reports when the first top-level JSON object closes."""
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+    
+    def feed(self, text: str) -> bool:
+        """Consume the next chunk; True once the outermost object is complete."""
+        for char in text:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = self.depth > 0
+            elif char == '{':
+                self.depth += 1
+            elif char == '}' and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    return True
+        return False
 
 
 class AIAnalyzer:
     """Uses Ollama to analyze command patterns and generate insights."""
     
-    def __init__(self, model: str = 'llama3.2', base_url: str = 'http://localhost:11434'):
+    def __init__(self, model: str = 'llama3.2', base_url: str = 'http://localhost:11434',
+                 cache_dir: Optional[str] = None, keep_alive: Optional[Union[str, int]] = None,
+                 preload: bool = False):
         self.model = model
         self.base_url = base_url
         self.api_url = f"{base_url}/api/generate"
+        # How long Ollama keeps the model resident after each request, so
+        # later calls skip the multi-second model reload; 0 unloads it at once
+        self.keep_alive = DEFAULT_KEEP_ALIVE if keep_alive is None else keep_alive
+        # Parsed insights are memoized per analysis-data hash: in memory for
+        # this instance, and on disk under cache_dir when one is given
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._insights_memo: Dict[str, Dict[str, Any]] = {}
+        
+        # One pooled keep-alive session so repeated requests skip the TCP
+        # (and TLS, for remote hosts) handshake; sized for generate_insights_many.
+        # Overloaded-server responses are retried at once, then after 2s and 4s
+        # (backoff_max is left out as it needs urllib3 2); refused connections
+        # and read timeouts are not retried, since retrying rarely helps
+        self.session = requests.Session()
+        retry = Retry(
+            total=3, connect=0, read=0, status=3,
+            backoff_factor=1,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({'POST'}),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=10, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Connection': 'keep-alive',
+            'Accept-Encoding': 'gzip, deflate',
+            'User-Agent': 'CmdChronicle/1.0'
+        })
+        
+        # Circuit breaker: after repeated failures, skip Ollama until the
+        # cooldown passes so callers drop straight to the fallback analysis
+        self._breaker_lock = threading.Lock()
+        self._failures = 0
+        self._circuit_open_until = 0.0
+        
+        # Shared, read-only archetype tables (see _WORKFLOW_ARCHETYPES)
+        self.workflow_archetypes = _WORKFLOW_ARCHETYPES
+        self._keyword_to_workflows = _KEYWORD_TO_WORKFLOWS
+        
+        if preload:
+            self.preload()
+    
+    def preload(self) -> bool:
+        """
+        Ask Ollama to load the model now instead of on the first analysis.
         
-        # Workflow archetypes for classification
-        self.workflow_archetypes = {
-            'frontend_developer': {
-                'keywords': ['npm', 'yarn', 'node', 'react', 'vue', 'angular', 'webpack', 'babel'],
-                'description': 'Frontend development with modern JavaScript frameworks'
-            },
-            'backend_developer': {
-                'keywords': ['python', 'django', 'flask', 'node', 'express', 'java', 'spring'],
-                'description': 'Backend development with server-side technologies'
-            },
-            'devops_engineer': {
-                'keywords': ['docker', 'kubernetes', 'kubectl', 'terraform', 'ansible', 'jenkins'],
-                'description': 'DevOps and infrastructure management'
-            },
-            'data_scientist': {
-                'keywords': ['python', 'jupyter', 'pandas', 'numpy', 'matplotlib', 'r', 'sql'],
-                'description': 'Data analysis and machine learning'
-            },
-            'system_administrator': {
-                'keywords': ['sudo', 'systemctl', 'apt', 'yum', 'ssh', 'rsync', 'cron'],
-                'description': 'System administration and maintenance'
-            },
-            'security_analyst': {
-                'keywords': ['nmap', 'wireshark', 'tcpdump', 'openssl', 'gpg', 'hash'],
-                'description': 'Security analysis and penetration testing'
-            }
-        }
+        Returns:
+            True if the model was loaded, False if Ollama could not be reached
+        """
+        try:
+            response = self.session.post(
+                self.api_url,
+                data=dumps_json({'model': self.model, 'prompt': '', 'keep_alive': self.keep_alive},
+                                indent=False, default=str),
+                headers={'Content-Type': 'application/json'},
+                timeout=60
+            )
+            response.raise_for_status()
+            return True
+        except requests.RequestException as e:
+            print(f"Warning: Could not preload model {self.model}: {e}")
+            return False
     
     def generate_insights(self, commands_data: List[Dict[str, Any]], patterns_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -56,153 +270,450 @@ class AIAnalyzer:
         Returns:
             Dictionary containing AI-generated insights
         """
+        stats = None
         try:
+            stats = self._compute_command_stats(commands_data)
+            
             # Prepare data for AI analysis
-            analysis_data = self._prepare_analysis_data(commands_data, patterns_data)
+            analysis_data = self._prepare_analysis_data(commands_data, patterns_data, stats)
             
             # Generate insights using Ollama
             insights = self._generate_ollama_insights(analysis_data)
             
-            # Add metadata
-            insights['generated_at'] = datetime.now().isoformat()
-            insights['model_used'] = self.model
-            insights['data_summary'] = self._create_data_summary(commands_data, patterns_data)
-            
-            return insights
+            return self._add_insight_metadata(insights, commands_data, patterns_data, stats)
             
         except Exception as e:
             print(f"Warning: AI analysis failed: {e}")
-            return self._fallback_insights(commands_data, patterns_data)
+            return self._fallback_insights(commands_data, patterns_data, stats)
+    
+    def _compute_command_stats(self, commands_data: List[Dict[str, Any]]) -> _CmdStats:
+        """Collect command texts, counts, shells and time range in a single pass."""
+        sample: List[str] = []
+        unique_commands = set()
+        total = 0
+        shell_distribution: Dict[str, int] = {}
+        earliest = latest = None
+        
+        for cmd in commands_data:
+            command = cmd['command']
+            total += 1
+            unique_commands.add(command)
+            if total <= COMMAND_SAMPLE_SIZE:
+                sample.append(command)
+            shell = cmd.get('shell', 'unknown')
+            shell_distribution[shell] = shell_distribution.get(shell, 0) + 1
+            if 'timestamp' in cmd:
+                timestamp = cmd['timestamp']
+                if earliest is None:
+                    earliest = latest = timestamp
+                elif timestamp < earliest:
+                    earliest = timestamp
+                elif timestamp > latest:
+                    latest = timestamp
+        
+        return _CmdStats(
+            sample=sample,
+            total=total,
+            unique=len(unique_commands),
+            shell_distribution=shell_distribution,
+            time_span=self._calculate_time_span(earliest, latest)
+        )
+    
+    def _add_insight_metadata(self, insights: Dict[str, Any], commands_data: List[Dict[str, Any]],
+                              patterns_data: Dict[str, Any],
+                              stats: Optional[_CmdStats] = None) -> Dict[str, Any]:
+        """Stamp model-generated insights with run metadata."""
+        insights['generated_at'] = now_iso()
+        insights['model_used'] = self.model
+        insights['data_summary'] = self._create_data_summary(
+            stats or self._compute_command_stats(commands_data), patterns_data
+        )
+        return insights
     
-    def _prepare_analysis_data(self, commands_data: List[Dict[str, Any]], patterns_data: Dict[str, Any]) -> Dict[str, Any]:
+    def generate_insights_batch(self, inputs: Sequence[Tuple[List[Dict[str, Any]], Dict[str, Any]]],
+                                max_workers: int = 4) -> List[Dict[str, Any]]:
+        """
+        Generate insights for several datasets with a single model request.
+        
+        Datasets without cached insights are combined into one prompt that
+        asks for a JSON array of results, amortizing request and prompt-eval
+        overhead. If that response cannot be used, the remaining datasets
+        fall back to concurrent individual requests (generate_insights_many).
+        
+        Args:
+            inputs: (commands_data, patterns_data) pairs
+            max_workers: Concurrency for the individual-request fallback
+            
+        Returns:
+            Insights for each input, in input order
+        """
+        if not inputs:
+            return []
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(inputs)
+        pending = list(range(len(inputs)))
+        
+        try:
+            batch_stats = [self._compute_command_stats(commands_data) for commands_data, _ in inputs]
+            analysis_batch = [self._prepare_analysis_data(*pair, stats)
+                              for pair, stats in zip(inputs, batch_stats)]
+            cache_keys = [self._cache_key(analysis_data) for analysis_data in analysis_batch]
+            
+            for i, cache_key in enumerate(cache_keys):
+                cached = self._load_cached_insights(cache_key)
+                if cached is not None:
+                    results[i] = self._add_insight_metadata(cached, *inputs[i], batch_stats[i])
+            pending = [i for i in pending if results[i] is None]
+            
+            # A lone miss gains nothing from batching; send it individually
+            if len(pending) > 1:
+                batch = self._generate_batch_insights([analysis_batch[i] for i in pending])
+                for i, insights in zip(pending, batch):
+                    self._save_cached_insights(cache_keys[i], insights)
+                    results[i] = self._add_insight_metadata(insights, *inputs[i], batch_stats[i])
+                pending = []
+                
+        except Exception as e:
+            print(f"Warning: Batched AI analysis failed, sending requests individually: {e}")
+        
+        if pending:
+            individual = self.generate_insights_many([inputs[i] for i in pending], max_workers)
+            for i, insights in zip(pending, individual):
+                results[i] = insights
+        
+        return results
+    
+    def _generate_batch_insights(self, analysis_batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Generate insights for several datasets from one Ollama request."""
+        prompt = self._create_batch_prompt(analysis_batch)
+        response_text = self._request_completion(prompt)
+        
+        raw_results = self._parse_batch_response(response_text, len(analysis_batch))
+        return [
+            self._validate_and_enhance_insights(insights, analysis_data)
+            for insights, analysis_data in zip(raw_results, analysis_batch)
+        ]
+    
+    def _parse_batch_response(self, response_text: str, expected: int) -> List[Dict[str, Any]]:
+        """Extract the per-dataset insight objects from a batched response."""
+        response = _extract_first_json(response_text)
+        if response is None:
+            raise ValueError("Batched response contained no JSON object")
+        
+        results = response.get('results')
+        
+        if (not isinstance(results, list) or len(results) != expected
+                or not all(isinstance(item, dict) for item in results)):
+            raise ValueError(f"Expected {expected} insight objects in batched response")
+        
+        return results
+    
+    def close(self) -> None:
+        """Release pooled HTTP connections."""
+        self.session.close()
+    
+    def generate_insights_many(self, inputs: Sequence[Tuple[List[Dict[str, Any]], Dict[str, Any]]],
+                               max_workers: int = 4) -> List[Dict[str, Any]]:
+        """
+        Generate insights for several datasets with overlapping requests.
+        
+        Each Ollama call blocks on network I/O with the GIL released, so the
+        requests run on a thread pool. Ollama only serves them concurrently up
+        to its OLLAMA_NUM_PARALLEL setting (and OLLAMA_MAX_LOADED_MODELS when
+        several models are involved); extra workers simply queue server-side.
+        
+        Args:
+            inputs: (commands_data, patterns_data) pairs
+            max_workers: Maximum number of concurrent requests
+            
+        Returns:
+            Insights for each input, in input order
+        """
+        if not inputs:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(inputs))) as executor:
+            return list(executor.map(lambda pair: self.generate_insights(*pair), inputs))
+    
+    @classmethod
+    def generate_insights_pool(cls, inputs: Sequence[Tuple[List[Dict[str, Any]], Dict[str, Any]]],
+                               max_workers: Optional[int] = None, **analyzer_kwargs: Any) -> List[Dict[str, Any]]:
+        """
+        Generate insights for several datasets without managing an analyzer.
+        
+        One analyzer is created for the whole pool so the workers share its
+        connection pool, insight cache and circuit breaker, then closed.
+        
+        Args:
+            inputs: (commands_data, patterns_data) pairs
+            max_workers: Maximum number of concurrent requests; defaults to the
+                OLLAMA_NUM_PARALLEL environment variable, or 4 if unset
+            **analyzer_kwargs: Passed to the AIAnalyzer constructor
+            
+        Returns:
+            Insights for each input, in input order
+        """
+        if max_workers is None:
+            try:
+                max_workers = max(1, int(os.environ.get('OLLAMA_NUM_PARALLEL', 4)))
+            except ValueError:
+                max_workers = 4
+        
+        analyzer = cls(**analyzer_kwargs)
+        try:
+            return analyzer.generate_insights_many(inputs, max_workers=max_workers)
+        finally:
+            analyzer.close()
+    
+    def _prepare_analysis_data(self, commands_data: List[Dict[str, Any]], patterns_data: Dict[str, Any],
+                               stats: Optional[_CmdStats] = None) -> Dict[str, Any]:
         """Prepare data for AI analysis."""
         # Extract key information
-        commands = [cmd['command'] for cmd in commands_data]
+        stats = stats or self._compute_command_stats(commands_data)
         frequent_commands = patterns_data.get('frequent_commands', [])
         tool_usage = patterns_data.get('tool_usage', {})
         workflows = patterns_data.get('workflows', [])
         
         # Create analysis context
         analysis_data = {
-            'total_commands': len(commands),
-            'unique_commands': len(set(commands)),
+            'total_commands': stats.total,
+            'unique_commands': stats.unique,
             'most_frequent_commands': frequent_commands[:10],
             'tool_usage': tool_usage,
             'workflow_types': [w.get('workflow_type', 'unknown') for w in workflows],
-            'command_sample': commands[:50],  # Sample for context
-            'time_span': self._calculate_time_span(commands_data)
+            'command_sample': stats.sample,  # Sample for context
+            'time_span': stats.time_span
         }
         
         return analysis_data
     
     def _generate_ollama_insights(self, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate insights using Ollama API."""
+        # Identical analysis data yields the same prompt, so reuse the
+        # parsed insights from an earlier run instead of asking again
+        cache_key = self._cache_key(analysis_data)
+        insights = self._load_cached_insights(cache_key)
+        if insights is not None:
+            return insights
+        
         prompt = self._create_analysis_prompt(analysis_data)
         
+        # All insight fields come back from this single request
+        response_text = self._request_completion(prompt)
+        insights, from_json = self._parse_ai_response(response_text, analysis_data)
+        
+        # Canned defaults from an unparseable reply would otherwise be
+        # served for this input from now on
+        if from_json:
+            self._save_cached_insights(cache_key, insights)
+        return insights
+    
+    def _request_completion(self, prompt: str) -> str:
+        """Stream one prompt's completion from Ollama and return the raw text."""
+        if time.monotonic() < self._circuit_open_until:
+            raise Exception("Ollama unavailable after repeated failures; skipping request")
+        
         try:
-            response = requests.post(
+            with self.session.post(
                 self.api_url,
-                json={
+                data=dumps_json({
                     'model': self.model,
                     'prompt': prompt,
-                    'stream': False,
+                    'stream': True,
+                    'format': 'json',
+                    'keep_alive': self.keep_alive,
                     'options': {
                         'temperature': 0.7,
                         'top_p': 0.9,
                         'max_tokens': 2000
                     }
-                },
+                }, indent=False, default=str),
+                headers={'Content-Type': 'application/json'},
+                stream=True,
                 timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                response_text = result.get('response', '')
+            ) as response:
+                if response.status_code != 200:
+                    self._record_failure()
+                    raise Exception(f"Ollama API error: {response.status_code}")
+                
+                # Each line is a JSON chunk carrying the next piece of text.
+                # Stop as soon as the answer's JSON object closes; leaving the
+                # with-block drops the connection so Ollama stops generating.
+                parts = []
+                scanner = _ObjectCloseScanner()
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    chunk = loads_json(line)
+                    text = chunk.get('response', '')
+                    parts.append(text)
+                    if chunk.get('done') or scanner.feed(text):
+                        break
                 
-                # Parse the response
-                insights = self._parse_ai_response(response_text, analysis_data)
-                return insights
-            else:
-                raise Exception(f"Ollama API error: {response.status_code}")
+                self._record_success()
+                return ''.join(parts)
                 
         except requests.exceptions.RequestException as e:
+            self._record_failure()
             raise Exception(f"Failed to connect to Ollama: {e}")
     
+    def _record_failure(self) -> None:
+        """Count a failed request and open the circuit at the threshold."""
+        with self._breaker_lock:
+            self._failures += 1
+            if self._failures >= CIRCUIT_BREAKER_THRESHOLD:
+                self._circuit_open_until = time.monotonic() + CIRCUIT_BREAKER_COOLDOWN
+                self._failures = 0
+    
+    def _record_success(self) -> None:
+        """Reset the failure count after a successful request."""
+        with self._breaker_lock:
+            self._failures = 0
+    
+    def _cache_key(self, analysis_data: Dict[str, Any]) -> str:
+        """Hash the model, prompt version and canonicalized analysis data."""
+        canonical = dumps_json(
+            {'version': INSIGHTS_CACHE_VERSION, 'model': self.model, 'data': analysis_data},
+            indent=False, sort_keys=True, default=str
+        )
+        return hashlib.blake2b(canonical, digest_size=16).hexdigest()
+    
+    def _load_cached_insights(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of previously generated insights, if any."""
+        if cache_key in self._insights_memo:
+            return copy.deepcopy(self._insights_memo[cache_key])
+        
+        if self.cache_dir is None:
+            return None
+        
+        cache_path = self.cache_dir / f"{cache_key}.json"
+        if not cache_path.exists():
+            return None
+        
+        try:
+            insights = loads_json(cache_path.read_bytes())['insights']
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable insights cache {cache_path}: {e}")
+            return None
+        
+        self._insights_memo[cache_key] = copy.deepcopy(insights)
+        return insights
+    
+    def _save_cached_insights(self, cache_key: str, insights: Dict[str, Any]) -> None:
+        """
+        Remember insights in memory and, if enabled, on disk.
+        
+        The disk cache keeps at most INSIGHTS_CACHE_MAX_ENTRIES files; it can
+        also be cleared at any time by deleting cache_dir.
+        """
+        self._insights_memo[cache_key] = copy.deepcopy(insights)
+        
+        if self.cache_dir is None:
+            return
+        
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            (self.cache_dir / f"{cache_key}.json").write_bytes(
+                dumps_json({'model': self.model, 'insights': insights}, indent=False, default=str)
+            )
+            self._prune_cache_dir()
+        except Exception as e:
+            print(f"Warning: Could not cache insights: {e}")
+    
+    def _prune_cache_dir(self) -> None:
+        """Delete the oldest cached insights beyond INSIGHTS_CACHE_MAX_ENTRIES."""
+        with os.scandir(self.cache_dir) as entries:
+            cached = [entry for entry in entries if entry.name.endswith('.json')]
+        
+        excess = len(cached) - INSIGHTS_CACHE_MAX_ENTRIES
+        if excess > 0:
+            cached.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in cached[:excess]:
+                os.unlink(entry.path)
+    
     def _create_analysis_prompt(self, analysis_data: Dict[str, Any]) -> str:
         """Create a prompt for AI analysis."""
-        prompt = f"""
-You are an expert command-line workflow analyst. Analyze the following command history data and provide insights about the user's work patterns, automation opportunities, and workflow characteristics.
-
-Data Summary:
-- Total commands: {analysis_data['total_commands']}
-- Unique commands: {analysis_data['unique_commands']}
-- Time span: {analysis_data['time_span']}
-
-Most frequent commands:
-{self._format_frequent_commands(analysis_data['most_frequent_commands'])}
-
-Tool usage:
-{self._format_tool_usage(analysis_data['tool_usage'])}
-
-Workflow types observed:
-{', '.join(analysis_data['workflow_types'])}
-
-Sample commands:
-{chr(10).join(analysis_data['command_sample'][:20])}
-
-Please provide a JSON response with the following structure:
-{{
-    "workflow_type": "classification of the user's primary workflow",
-    "primary_focus": "main area of work/technology focus",
-    "workflow_characteristics": ["list", "of", "key", "characteristics"],
-    "automation_opportunities": ["list", "of", "automation", "suggestions"],
-    "productivity_insights": ["list", "of", "productivity", "observations"],
-    "skill_level": "estimated skill level (beginner/intermediate/advanced/expert)",
-    "recommendations": ["list", "of", "recommendations", "for", "improvement"],
-    "fun_title": "a fun, creative title for this user's workflow",
-    "personality_traits": ["list", "of", "personality", "traits", "inferred", "from", "commands"]
-}}
-
-Focus on being insightful, practical, and fun. The user is a developer who wants to understand their patterns and improve their workflow.
-"""
-        return prompt
-    
-    def _format_frequent_commands(self, frequent_commands: List[Dict]) -> str:
-        """Format frequent commands for the prompt."""
-        formatted = []
-        for cmd in frequent_commands[:10]:
-            formatted.append(f"- {cmd['command']} (used {cmd['count']} times, {cmd['percentage']}%)")
-        return '\n'.join(formatted)
-    
-    def _format_tool_usage(self, tool_usage: Dict) -> str:
-        """Format tool usage for the prompt."""
-        formatted = []
-        for tool, stats in tool_usage.items():
-            formatted.append(f"- {tool}: {stats['count']} commands ({stats['percentage']:.1f}%)")
-        return '\n'.join(formatted)
+        parts = [_ANALYSIS_PROMPT_HEADER]
+        self._format_analysis_context_into(parts, analysis_data)
+        parts.append(_ANALYSIS_PROMPT_FOOTER)
+        return ''.join(parts)
+    
+    def _create_batch_prompt(self, analysis_batch: List[Dict[str, Any]]) -> str:
+        """Create one prompt covering several datasets."""
+        count = len(analysis_batch)
+        parts = [
+            "\nYou are an expert command-line workflow analyst. Analyze each of the following "
+            f"{count} command history datasets independently and provide insights about each "
+            "user's work patterns, automation opportunities, and workflow characteristics.\n\n"
+        ]
+        for i, analysis_data in enumerate(analysis_batch, 1):
+            if i > 1:
+                parts.append('\n\n')
+            parts.append(f"=== Dataset {i} ===\n")
+            self._format_analysis_context_into(parts, analysis_data)
+        parts.append(
+            '\n\nPlease provide a JSON response of the form {"results": [...]} where "results" '
+            f"holds exactly {count} objects, one per dataset and in dataset order, each with "
+            f"the following structure:\n{INSIGHT_SCHEMA}\n\n{PROMPT_CLOSING}\n"
+        )
+        return ''.join(parts)
+    
+    def _format_analysis_context_into(self, parts: List[str], analysis_data: Dict[str, Any]) -> None:
+        """Append the data summary section shared by single and batch prompts to parts."""
+        parts.append(
+            "Data Summary:\n"
+            f"- Total commands: {analysis_data['total_commands']}\n"
+            f"- Unique commands: {analysis_data['unique_commands']}\n"
+            f"- Time span: {analysis_data['time_span']}\n"
+            "\nMost frequent commands:\n"
+        )
+        self._format_frequent_commands_into(parts, analysis_data['most_frequent_commands'])
+        parts.append("\n\nTool usage:\n")
+        self._format_tool_usage_into(parts, analysis_data['tool_usage'])
+        parts.append("\n\nWorkflow types observed:\n")
+        parts.append(', '.join(analysis_data['workflow_types']))
+        parts.append("\n\nSample commands:\n")
+        _append_lines(parts, analysis_data['command_sample'][:20])
+    
+    def _format_frequent_commands_into(self, parts: List[str], frequent_commands: List[Dict]) -> None:
+        """Append one line per frequent command to parts."""
+        _append_lines(parts, (
+            f"- {cmd['command']} (used {cmd['count']} times, {cmd['percentage']}%)"
+            for cmd in frequent_commands[:10]
+        ))
     
-    def _parse_ai_response(self, response_text: str, analysis_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Parse the AI response and extract insights."""
+    def _format_tool_usage_into(self, parts: List[str], tool_usage: Dict) -> None:
+        """Append one line per tool to parts."""
+        _append_lines(parts, (
+            f"- {tool}: {stats['count']} commands ({stats['percentage']:.1f}%)"
+            for tool, stats in tool_usage.items()
+        ))
+    
+    def _parse_ai_response(self, response_text: str,
+                           analysis_data: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """
+        Parse the AI response and extract insights.
+        
+        Returns:
+            The insights, and whether they came from a JSON object in the
+            response rather than the text-parsing defaults
+        """
         try:
             # Try to extract JSON from the response
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
-            
-            if json_start != -1 and json_end > json_start:
-                json_str = response_text[json_start:json_end]
-                insights = json.loads(json_str)
-            else:
+            insights = _extract_first_json(response_text)
+            from_json = insights is not None
+            if insights is None:
                 # Fallback parsing
                 insights = self._parse_text_response(response_text)
             
             # Validate and enhance insights
             insights = self._validate_and_enhance_insights(insights, analysis_data)
             
-            return insights
+            return insights, from_json
             
         except json.JSONDecodeError:
             # Fallback to text parsing
-            return self._parse_text_response(response_text)
+            return self._parse_text_response(response_text), False
     
     def _parse_text_response(self, response_text: str) -> Dict[str, Any]:
         """Parse text response when JSON parsing fails."""
@@ -221,12 +732,10 @@ Focus on being insightful, practical, and fun. The user is a developer who wants
         # Try to extract information from the text
         text_lower = response_text.lower()
         
-        if any(word in text_lower for word in ['frontend', 'react', 'vue', 'angular']):
-            insights['workflow_type'] = 'frontend_development'
-        elif any(word in text_lower for word in ['backend', 'server', 'api']):
-            insights['workflow_type'] = 'backend_development'
-        elif any(word in text_lower for word in ['devops', 'docker', 'kubernetes']):
-            insights['workflow_type'] = 'devops_engineering'
+        for workflow_type, pattern in _TEXT_WORKFLOW_PATTERNS:
+            if pattern.search(text_lower):
+                insights['workflow_type'] = workflow_type
+                break
         
         return insights
     
@@ -278,28 +787,22 @@ Focus on being insightful, practical, and fun. The user is a developer who wants
         # Tool usage patterns
         tool_usage = analysis_data['tool_usage']
         if tool_usage:
-            most_used_tool = max(tool_usage.items(), key=lambda x: x[1]['count'])
+            most_used_tool = self._rank_tools(tool_usage, 1)[0]
             insights.append(f"Primary tool focus: {most_used_tool[0]} ({most_used_tool[1]['percentage']:.1f}% of commands)")
         
         # Workflow patterns
         workflow_types = analysis_data['workflow_types']
         if workflow_types:
-            most_common_workflow = max(set(workflow_types), key=workflow_types.count)
+            most_common_workflow = Counter(workflow_types).most_common(1)[0][0]
             insights.append(f"Most common workflow type: {most_common_workflow}")
         
         return insights
     
-    def _calculate_time_span(self, commands_data: List[Dict[str, Any]]) -> str:
-        """Calculate the time span of the commands."""
-        if not commands_data:
+    def _calculate_time_span(self, earliest: Any, latest: Any) -> str:
+        """Describe the span between the earliest and latest command timestamps."""
+        if earliest is None:
             return "Unknown"
         
-        timestamps = [cmd.get('timestamp', 0) for cmd in commands_data if 'timestamp' in cmd]
-        if not timestamps:
-            return "Unknown"
-        
-        earliest = min(timestamps)
-        latest = max(timestamps)
         span_hours = (latest - earliest) / 3600
         
         if span_hours < 24:
@@ -308,11 +811,13 @@ Focus on being insightful, practical, and fun. The user is a developer who wants
             days = span_hours / 24
             return f"{days:.1f} days"
     
-    def _fallback_insights(self, commands_data: List[Dict[str, Any]], patterns_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _fallback_insights(self, commands_data: List[Dict[str, Any]], patterns_data: Dict[str, Any],
+                           stats: Optional[_CmdStats] = None) -> Dict[str, Any]:
         """Generate fallback insights when AI analysis fails."""
         # Basic analysis without AI
-        commands = [cmd['command'] for cmd in commands_data]
+        stats = stats or self._compute_command_stats(commands_data)
         tool_usage = patterns_data.get('tool_usage', {})
+        used_tools = self._used_tools(tool_usage)
         
         # Determine workflow type based on tool usage
         workflow_type = self._classify_workflow_from_tools(tool_usage)
@@ -321,23 +826,25 @@ Focus on being insightful, practical, and fun. The user is a developer who wants
         insights = {
             'workflow_type': workflow_type,
             'primary_focus': self._get_primary_focus(tool_usage),
-            'workflow_characteristics': self._get_workflow_characteristics(commands, tool_usage),
+            'workflow_characteristics': self._get_workflow_characteristics(stats, used_tools),
             'automation_opportunities': self._get_automation_opportunities(patterns_data),
-            'productivity_insights': self._get_productivity_insights(commands_data, patterns_data),
-            'skill_level': self._estimate_skill_level(commands, tool_usage),
+            'productivity_insights': self._get_productivity_insights(stats, patterns_data),
+            'skill_level': self._estimate_skill_level(
+                (cmd['command'] for cmd in commands_data), stats.total, tool_usage
+            ),
             'recommendations': self._get_basic_recommendations(patterns_data),
             'fun_title': self._generate_fun_title(workflow_type, tool_usage),
-            'personality_traits': self._infer_personality_traits(commands, tool_usage),
+            'personality_traits': self._infer_personality_traits(stats, used_tools),
             'data_driven_insights': self._generate_data_driven_insights({
-                'total_commands': len(commands),
-                'unique_commands': len(set(commands)),
+                'total_commands': stats.total,
+                'unique_commands': stats.unique,
                 'tool_usage': tool_usage,
                 'workflow_types': []
             }),
-            'command_diversity_score': len(set(commands)) / len(commands) if commands else 0,
-            'generated_at': datetime.now().isoformat(),
+            'command_diversity_score': stats.unique / stats.total if stats.total else 0,
+            'generated_at': now_iso(),
             'model_used': 'fallback_analysis',
-            'data_summary': self._create_data_summary(commands_data, patterns_data)
+            'data_summary': self._create_data_summary(stats, patterns_data)
         }
         
         return insights
@@ -348,14 +855,13 @@ Focus on being insightful, practical, and fun. The user is a developer who wants
             return 'general_development'
         
         # Score each workflow type
-        scores = {}
-        for workflow, config in self.workflow_archetypes.items():
-            score = 0
-            for keyword in config['keywords']:
-                for tool, stats in tool_usage.items():
-                    if keyword in tool.lower():
-                        score += stats['count']
-            scores[workflow] = score
+        scores = dict.fromkeys(self.workflow_archetypes, 0)
+        for tool, stats in tool_usage.items():
+            tool_lc = tool.lower()
+            for keyword, workflows in self._keyword_to_workflows.items():
+                if keyword in tool_lc:
+                    for workflow in workflows:
+                        scores[workflow] += stats['count']
         
         # Return the highest scoring workflow
         if scores:
@@ -368,23 +874,30 @@ Focus on being insightful, practical, and fun. The user is a developer who wants
         if not tool_usage:
             return 'command_line_automation'
         
-        most_used = max(tool_usage.items(), key=lambda x: x[1]['count'])
-        return most_used[0]
+        return self._rank_tools(tool_usage, 1)[0][0]
     
-    def _get_workflow_characteristics(self, commands: List[str], tool_usage: Dict) -> List[str]:
+    def _rank_tools(self, tool_usage: Dict, n: int = 5) -> List[Tuple[str, Dict]]:
+        """Return the n most used (tool, stats) pairs, ties kept in input order."""
+        return heapq.nlargest(n, tool_usage.items(), key=lambda item: item[1]['count'])
+    
+    def _used_tools(self, tool_usage: Dict) -> FrozenSet[str]:
+        """Return the tools with recorded usage, for O(1) membership checks."""
+        return frozenset(tool for tool, stats in tool_usage.items() if stats)
+    
+    def _get_workflow_characteristics(self, stats: _CmdStats, used_tools: FrozenSet[str]) -> List[str]:
         """Get workflow characteristics."""
         characteristics = []
         
-        if tool_usage.get('git'):
+        if 'git' in used_tools:
             characteristics.append('version control focused')
-        if tool_usage.get('docker'):
+        if 'docker' in used_tools:
             characteristics.append('containerization aware')
-        if tool_usage.get('python'):
+        if 'python' in used_tools:
             characteristics.append('python development')
-        if tool_usage.get('node'):
+        if 'node' in used_tools:
             characteristics.append('javascript/node.js development')
         
-        if len(set(commands)) / len(commands) > 0.5:
+        if stats.unique / stats.total > 0.5:
             characteristics.append('diverse command usage')
         else:
             characteristics.append('focused command patterns')
@@ -405,12 +918,12 @@ Focus on being insightful, practical, and fun. The user is a developer who wants
         
         return opportunities
     
-    def _get_productivity_insights(self, commands_data: List[Dict], patterns_data: Dict) -> List[str]:
+    def _get_productivity_insights(self, stats: _CmdStats, patterns_data: Dict) -> List[str]:
         """Get productivity insights."""
         insights = []
         
-        total_commands = len(commands_data)
-        unique_commands = len(set(cmd['command'] for cmd in commands_data))
+        total_commands = stats.total
+        unique_commands = stats.unique
         
         if unique_commands / total_commands < 0.3:
             insights.append("High command repetition suggests automation opportunities")
@@ -419,11 +932,10 @@ Focus on being insightful, practical, and fun. The user is a developer who wants
         
         return insights
     
-    def _estimate_skill_level(self, commands: List[str], tool_usage: Dict) -> str:
+    def _estimate_skill_level(self, commands: Iterable[str], total_commands: int, tool_usage: Dict) -> str:
         """Estimate skill level."""
         # Simple heuristic based on command complexity and tool usage
-        complex_commands = sum(1 for cmd in commands if len(cmd.split()) > 3)
-        total_commands = len(commands)
+        complex_commands = sum(1 for cmd in commands if LONG_COMMAND_PATTERN.match(cmd))
         
         if complex_commands / total_commands > 0.3 and len(tool_usage) > 3:
             return 'advanced'
@@ -456,43 +968,34 @@ Focus on being insightful, practical, and fun. The user is a developer who wants
         
         return titles.get(workflow_type, 'The Terminal Master')
     
-    def _infer_personality_traits(self, commands: List[str], tool_usage: Dict) -> List[str]:
+    def _infer_personality_traits(self, stats: _CmdStats, used_tools: FrozenSet[str]) -> List[str]:
         """Infer personality traits from command patterns."""
         traits = []
         
-        if tool_usage.get('git'):
+        if 'git' in used_tools:
             traits.append('version control conscious')
-        if tool_usage.get('docker'):
+        if 'docker' in used_tools:
             traits.append('containerization minded')
-        if len(set(commands)) / len(commands) > 0.5:
+        if stats.unique / stats.total > 0.5:
             traits.append('exploratory')
         else:
             traits.append('focused')
         
         return traits
     
-    def _create_data_summary(self, commands_data: List[Dict], patterns_data: Dict) -> Dict[str, Any]:
+    def _create_data_summary(self, stats: _CmdStats, patterns_data: Dict) -> Dict[str, Any]:
         """Create a summary of the analyzed data."""
         return {
-            'total_commands': len(commands_data),
-            'unique_commands': len(set(cmd['command'] for cmd in commands_data)),
-            'time_range': self._calculate_time_span(commands_data),
-            'shell_distribution': self._get_shell_distribution(commands_data),
+            'total_commands': stats.total,
+            'unique_commands': stats.unique,
+            'time_range': stats.time_span,
+            'shell_distribution': dict(stats.shell_distribution),
             'top_tools': self._get_top_tools(patterns_data.get('tool_usage', {}))
         }
     
-    def _get_shell_distribution(self, commands_data: List[Dict]) -> Dict[str, int]:
-        """Get shell distribution."""
-        distribution = {}
-        for cmd in commands_data:
-            shell = cmd.get('shell', 'unknown')
-            distribution[shell] = distribution.get(shell, 0) + 1
-        return distribution
-    
     def _get_top_tools(self, tool_usage: Dict) -> List[str]:
         """Get top tools used."""
         if not tool_usage:
             return []
         
-        sorted_tools = sorted(tool_usage.items(), key=lambda x: x[1]['count'], reverse=True)
-        return [tool for tool, _ in sorted_tools[:5]] 
\ No newline at end of file
+        return [tool for tool, _ in self._rank_tools(tool_usage)] 
\ No newline at end of file
@@ -3,11 +3,124 @@ Pattern Analyzer
 Analyzes command patterns to identify frequent commands and automation opportunities.
 """
 
+import calendar
+import copy
+import heapq
 import re
-import json
 from collections import Counter, defaultdict
-from typing import List, Dict, Any, Tuple
-from datetime import datetime, timedelta
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import List, Dict, Any, FrozenSet, Iterable, Tuple
+from datetime import timedelta
+
+import numpy as np
+
+try:
+    from ..utils.local_time import TIME_SLOT_SECONDS, local_fields, slot_local_fields
+except ImportError:
+    # Imported as a top-level package with src/ on sys.path
+    from utils.local_time import TIME_SLOT_SECONDS, local_fields, slot_local_fields
+
+
+# Keyword groups checked by substring; built once rather than per call
+_SEARCH_KEYWORDS = ('find', 'grep', 'sed', 'awk', 'xargs')
+_FILE_OP_KEYWORDS = ('cp', 'mv', 'rm', 'mkdir', 'touch')
+
+# The same substring checks as single compiled scans
+_SEARCH_KEYWORD_PATTERN = re.compile('|'.join(_SEARCH_KEYWORDS))
+_FILE_OP_KEYWORD_PATTERN = re.compile('|'.join(_FILE_OP_KEYWORDS))
+
+# Workflow types in precedence order with the keywords that select them
+_WORKFLOW_KEYWORDS = (
+    ('git_workflow', ('git', 'commit', 'push')),
+    ('docker_workflow', ('docker', 'build', 'run')),
+    ('python_workflow', ('python', 'pip', 'install')),
+    ('node_workflow', ('npm', 'yarn', 'node')),
+    ('file_exploration', ('cd', 'ls', 'find')),
+)
+
+# Any whitespace; every automation pattern needs some after its command word
+_WHITESPACE = re.compile(r'\s')
+
+# More than three whitespace-separated tokens, i.e. len(command.split()) > 3;
+# shared with the AI analyzer's skill estimate
+LONG_COMMAND_PATTERN = re.compile(r'\s*\S+\s+\S+\s+\S+\s+\S')
+
+# Command-line flags such as -v or --force
+_FLAG_PATTERN = re.compile(r'--?\w+')
+
+
+def _base_command(command: str) -> str:
+    """Return the program name of a command, splitting only once."""
+    parts = command.split(None, 1)
+    return parts[0] if parts else ''
+
+
+def _top_counts(counts: Dict[str, int], label: str, min_count: int, limit: int = 10) -> List[Dict[str, Any]]:
+    """Format the most frequent keys with at least min_count occurrences.
+
+    Ties keep insertion order, as a stable descending sort would; result
+    dicts are only built for the entries that are returned.
+    """
+    top = heapq.nlargest(limit, (item for item in counts.items() if item[1] >= min_count),
+                         key=itemgetter(1))
+    return [{label: key, 'count': count} for key, count in top]
+
+
+# Prefix trie nodes are [count, insertion order, children by next token]
+_PREFIX_DEPTH = 3
+
+
+def _insert_prefixes(trie: Dict[str, list], parts: List[str], count: int, order: int) -> int:
+    """Add count to each of the first _PREFIX_DEPTH prefixes of parts.
+
+    Returns the next free insertion number; new nodes take numbers from order.
+    """
+    children = trie
+    for token in parts[:_PREFIX_DEPTH]:
+        node = children.get(token)
+        if node is None:
+            node = children[token] = [0, order, {}]
+            order += 1
+        node[0] += count
+        children = node[2]
+    return order
+
+
+def _frequent_prefixes(trie: Dict[str, list], min_count: int) -> Dict[str, int]:
+    """Joined prefixes counted at least min_count times, in insertion order.
+
+    A node never counts more than its parent, so rare subtrees are skipped
+    whole and only the surviving prefixes are ever joined into strings.
+    """
+    found = []
+    stack = [((), trie)]
+    while stack:
+        path, children = stack.pop()
+        for token, (count, order, grandchildren) in children.items():
+            if count >= min_count:
+                key = path + (token,)
+                found.append((order, key, count))
+                if grandchildren:
+                    stack.append((key, grandchildren))
+    found.sort()
+    return {' '.join(key): count for _, key, count in found}
+
+
+# Weekday names indexed by datetime.weekday(), as strftime('%A') spells them
+_DAY_NAMES = tuple(calendar.day_name)
+
+
+@dataclass
+class _CommandCounts:
+    """Tallies gathered in one sweep over the distinct commands."""
+    total: int
+    frequency: Counter
+    base_commands: Counter
+    prefix_trie: Dict[str, list]
+    suffixes: Counter
+    parameters: Counter
+    automation_scores: Dict[str, float]
 
 
 class PatternAnalyzer:
@@ -15,18 +128,40 @@ class PatternAnalyzer:
     
     def __init__(self):
         self.common_tools = {
-            'git': ['git', 'commit', 'push', 'pull', 'branch', 'checkout', 'merge'],
-            'docker': ['docker', 'run', 'build', 'ps', 'exec', 'logs'],
-            'kubernetes': ['kubectl', 'k8s', 'pod', 'service', 'deployment'],
-            'python': ['python', 'pip', 'virtualenv', 'conda', 'py'],
-            'node': ['node', 'npm', 'yarn', 'npx'],
-            'system': ['sudo', 'apt', 'brew', 'yum', 'systemctl'],
-            'development': ['vim', 'code', 'subl', 'nano', 'emacs'],
-            'monitoring': ['top', 'htop', 'ps', 'df', 'du', 'netstat'],
-            'network': ['ssh', 'scp', 'curl', 'wget', 'ping', 'telnet'],
-            'database': ['mysql', 'psql', 'sqlite', 'mongo', 'redis-cli']
+            'git': frozenset({'git', 'commit', 'push', 'pull', 'branch', 'checkout', 'merge'}),
+            'docker': frozenset({'docker', 'run', 'build', 'ps', 'exec', 'logs'}),
+            'kubernetes': frozenset({'kubectl', 'k8s', 'pod', 'service', 'deployment'}),
+            'python': frozenset({'python', 'pip', 'virtualenv', 'conda', 'py'}),
+            'node': frozenset({'node', 'npm', 'yarn', 'npx'}),
+            'system': frozenset({'sudo', 'apt', 'brew', 'yum', 'systemctl'}),
+            'development': frozenset({'vim', 'code', 'subl', 'nano', 'emacs'}),
+            'monitoring': frozenset({'top', 'htop', 'ps', 'df', 'du', 'netstat'}),
+            'network': frozenset({'ssh', 'scp', 'curl', 'wget', 'ping', 'telnet'}),
+            'database': frozenset({'mysql', 'psql', 'sqlite', 'mongo', 'redis-cli'})
         }
         
+        # Every tool keyword in one scanner. Alternatives are tried longest
+        # first, so at each position the lookahead captures the longest keyword
+        # starting there; any other keyword starting at that position is one of
+        # its prefixes (e.g. 'ps' for 'psql'), so each keyword maps to the tools
+        # of itself and all its keyword prefixes.
+        keyword_tools = defaultdict(set)
+        for tool, keywords in self.common_tools.items():
+            for keyword in keywords:
+                keyword_tools[keyword].add(tool)
+        
+        self._keyword_closure = {
+            keyword: frozenset().union(*(tools for other, tools in keyword_tools.items()
+                                         if keyword.startswith(other)))
+            for keyword in keyword_tools
+        }
+        self._tool_scanner = re.compile('(?=({}))'.format(
+            '|'.join(map(re.escape, sorted(keyword_tools, key=lambda keyword: (-len(keyword), keyword))))
+        ))
+        
+        # Category of each lowercased base command seen so far
+        self._base_to_tool = {}
+        
         self.automation_patterns = [
             r'cd\s+\S+',  # Directory navigation
             r'ls\s+\S+',  # Directory listing with path
@@ -39,40 +174,63 @@ class PatternAnalyzer:
             r'chmod\s+\S+',  # Permission changes
             r'chown\s+\S+',  # Ownership changes
         ]
+        
+        # All automation patterns in one regex. Each alternative is a
+        # zero-width lookahead, so finditer reports every position where a
+        # pattern starts (overlaps included) in a single scan; lastindex says
+        # which pattern it was. No two patterns can match at the same position
+        # because each starts with a different word followed by whitespace.
+        self._automation_union = re.compile(
+            '|'.join(f'(?=({pattern}))' for pattern in self.automation_patterns)
+        )
+        
+        # Score for k distinct matching patterns, accumulated exactly as the
+        # per-pattern loop did (0.3 + 0.3 + ...), so float results are unchanged
+        self._pattern_scores = [0.0]
+        for _ in self.automation_patterns:
+            self._pattern_scores.append(self._pattern_scores[-1] + 0.3)
     
-    def analyze_patterns(self, commands: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def analyze_patterns(self, commands: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
         """
         Analyze command patterns and identify automation opportunities.
         
         Args:
-            commands: List of command dictionaries
+            commands: Command dictionaries (a list or a stream such as
+                DataManager.iter_commands)
             
         Returns:
             Dictionary containing analysis results
         """
+        # Several passes are made below, so materialize streamed input once
+        if not isinstance(commands, list):
+            commands = list(commands)
+        
         if not commands:
             return self._empty_analysis()
         
         # Extract command texts
         command_texts = [cmd['command'] for cmd in commands]
         
+        # Shared tallies for the frequency, type, pattern and tool analyses
+        counts = self._collect_counts(command_texts)
+        
         # Basic frequency analysis
-        frequent_commands = self._analyze_frequency(command_texts)
+        frequent_commands = self._analyze_frequency(counts)
         
         # Command type analysis
-        command_types = self._analyze_command_types(command_texts)
+        command_types = self._analyze_command_types(counts)
         
         # Pattern analysis
-        patterns = self._analyze_patterns(command_texts)
+        patterns = self._analyze_patterns(command_texts, counts)
         
         # Automation candidates
-        automation_candidates = self._identify_automation_candidates(command_texts)
+        automation_candidates = self._identify_automation_candidates(command_texts, counts)
         
         # Workflow analysis
         workflows = self._analyze_workflows(commands)
         
         # Tool usage analysis
-        tool_usage = self._analyze_tool_usage(command_texts)
+        tool_usage = self._analyze_tool_usage(counts)
         
         # Time-based patterns
         time_patterns = self._analyze_time_patterns(commands)
@@ -85,7 +243,7 @@ class PatternAnalyzer:
             'workflows': workflows,
             'tool_usage': tool_usage,
             'time_patterns': time_patterns,
-            'summary': self._generate_summary(command_texts, frequent_commands, tool_usage)
+            'summary': self._generate_summary(counts, frequent_commands, tool_usage)
         }
     
     def _empty_analysis(self) -> Dict[str, Any]:
@@ -101,54 +259,87 @@ class PatternAnalyzer:
             'summary': {}
         }
     
-    def _analyze_frequency(self, commands: List[str]) -> List[Dict[str, Any]]:
+    def _collect_counts(self, commands: List[str]) -> _CommandCounts:
+        """
+        Tally commands, base commands, prefixes, suffixes and flag patterns.
+        
+        Counting the raw commands is one C-level pass; everything else is
+        derived from each distinct command once, weighted by its count. The
+        distinct commands come in first-occurrence order, so every Counter
+        keeps the same insertion order (and therefore the same tie order in
+        the sorted results) as a per-occurrence sweep.
+        """
+        frequency = Counter(commands)
+        base_commands = Counter()
+        prefix_trie = {}
+        prefix_order = 0
+        suffixes = Counter()
+        parameters = Counter()
+        automation_scores = {}
+        
+        for command, count in frequency.items():
+            automation_scores[command] = self._calculate_automation_potential(command)
+            
+            parts = command.split()
+            
+            base_commands[parts[0] if parts else ''] += count
+            
+            prefix_order = _insert_prefixes(prefix_trie, parts, count, prefix_order)
+            
+            if len(parts) > 1:
+                suffixes[' '.join(parts[1:])] += count
+            
+            # Extract flags and parameters
+            flags = _FLAG_PATTERN.findall(command)
+            if flags:
+                parameters[' '.join(sorted(flags))] += count
+        
+        return _CommandCounts(
+            total=len(commands),
+            frequency=frequency,
+            base_commands=base_commands,
+            prefix_trie=prefix_trie,
+            suffixes=suffixes,
+            parameters=parameters,
+            automation_scores=automation_scores
+        )
+    
+    def _analyze_frequency(self, counts: _CommandCounts) -> List[Dict[str, Any]]:
         """Analyze command frequency."""
-        counter = Counter(commands)
-        total_commands = len(commands)
+        total_commands = counts.total
         
         frequent_commands = []
-        for command, count in counter.most_common(20):
+        for command, count in counts.frequency.most_common(20):
             percentage = (count / total_commands) * 100
             frequent_commands.append({
                 'command': command,
                 'count': count,
                 'percentage': round(percentage, 2),
-                'automation_potential': self._calculate_automation_potential(command)
+                'automation_potential': counts.automation_scores[command]
             })
         
         return frequent_commands
     
-    def _analyze_command_types(self, commands: List[str]) -> Dict[str, Any]:
+    def _analyze_command_types(self, counts: _CommandCounts) -> Dict[str, Any]:
         """Analyze types of commands being used."""
         type_counts = defaultdict(int)
         
-        for command in commands:
-            cmd_parts = command.split()
-            if not cmd_parts:
+        # Categorize each distinct base command once instead of once per occurrence
+        for base_command, count in counts.base_commands.items():
+            if not base_command:
                 continue
             
-            base_command = cmd_parts[0]
-            
-            # Categorize by tool/technology
-            categorized = False
-            for tool, keywords in self.common_tools.items():
-                if any(keyword in base_command.lower() for keyword in keywords):
-                    type_counts[tool] += 1
-                    categorized = True
-                    break
-            
-            if not categorized:
-                type_counts['other'] += 1
+            type_counts[self._tool_for_base(base_command.lower())] += count
         
         return dict(type_counts)
     
-    def _analyze_patterns(self, commands: List[str]) -> Dict[str, Any]:
+    def _analyze_patterns(self, commands: List[str], counts: _CommandCounts) -> Dict[str, Any]:
         """Analyze command patterns."""
         patterns = {
             'repeated_sequences': self._find_repeated_sequences(commands),
-            'common_prefixes': self._find_common_prefixes(commands),
-            'common_suffixes': self._find_common_suffixes(commands),
-            'parameter_patterns': self._find_parameter_patterns(commands)
+            'common_prefixes': self._find_common_prefixes(counts),
+            'common_suffixes': self._find_common_suffixes(counts),
+            'parameter_patterns': self._find_parameter_patterns(counts)
         }
         
         return patterns
@@ -157,115 +348,88 @@ class PatternAnalyzer:
         """Find repeated command sequences."""
         sequences = defaultdict(int)
         
-        # Look for sequences of 2-4 commands
+        # Without a '|' in any command, each joined key splits back into
+        # exactly one tuple, so tuples seen once can never reach a count of 2
+        # and are skipped before joining. Otherwise different tuples (of the
+        # same or different lengths) may join to the same key and add up.
+        can_collide = any('|' in command for command in set(commands))
+        
+        # Look for sequences of 2-4 commands; n-grams are counted as tuples in
+        # C and only distinct ones are joined into keys
         for seq_len in range(2, 5):
-            for i in range(len(commands) - seq_len + 1):
-                sequence = ' | '.join(commands[i:i+seq_len])
-                sequences[sequence] += 1
+            ngrams = Counter(zip(*(commands[offset:] for offset in range(seq_len))))
+            for ngram, count in ngrams.items():
+                if count > 1 or can_collide:
+                    sequences[' | '.join(ngram)] += count
         
         # Return sequences that appear more than once
-        repeated = [
-            {'sequence': seq, 'count': count}
-            for seq, count in sequences.items()
-            if count > 1
-        ]
-        
-        return sorted(repeated, key=lambda x: x['count'], reverse=True)[:10]
+        return _top_counts(sequences, 'sequence', min_count=2)
     
-    def _find_common_prefixes(self, commands: List[str]) -> List[Dict[str, Any]]:
+    def _find_common_prefixes(self, counts: _CommandCounts) -> List[Dict[str, Any]]:
         """Find common command prefixes."""
-        prefixes = defaultdict(int)
-        
-        for command in commands:
-            parts = command.split()
-            for i in range(1, min(4, len(parts) + 1)):
-                prefix = ' '.join(parts[:i])
-                prefixes[prefix] += 1
-        
-        common_prefixes = [
-            {'prefix': prefix, 'count': count}
-            for prefix, count in prefixes.items()
-            if count > 2
-        ]
-        
-        return sorted(common_prefixes, key=lambda x: x['count'], reverse=True)[:10]
+        return _top_counts(_frequent_prefixes(counts.prefix_trie, 3), 'prefix', min_count=3)
     
-    def _find_common_suffixes(self, commands: List[str]) -> List[Dict[str, Any]]:
+    def _find_common_suffixes(self, counts: _CommandCounts) -> List[Dict[str, Any]]:
         """Find common command suffixes/arguments."""
-        suffixes = defaultdict(int)
-        
-        for command in commands:
-            parts = command.split()
-            if len(parts) > 1:
-                suffix = ' '.join(parts[1:])
-                suffixes[suffix] += 1
-        
-        common_suffixes = [
-            {'suffix': suffix, 'count': count}
-            for suffix, count in suffixes.items()
-            if count > 2
-        ]
-        
-        return sorted(common_suffixes, key=lambda x: x['count'], reverse=True)[:10]
+        return _top_counts(counts.suffixes, 'suffix', min_count=3)
     
-    def _find_parameter_patterns(self, commands: List[str]) -> List[Dict[str, Any]]:
+    def _find_parameter_patterns(self, counts: _CommandCounts) -> List[Dict[str, Any]]:
         """Find common parameter patterns."""
-        patterns = defaultdict(int)
-        
-        for command in commands:
-            # Extract flags and parameters
-            flags = re.findall(r'--?\w+', command)
-            if flags:
-                flag_pattern = ' '.join(sorted(flags))
-                patterns[flag_pattern] += 1
-        
-        common_patterns = [
-            {'pattern': pattern, 'count': count}
-            for pattern, count in patterns.items()
-            if count > 1
-        ]
-        
-        return sorted(common_patterns, key=lambda x: x['count'], reverse=True)[:10]
+        return _top_counts(counts.parameters, 'pattern', min_count=2)
     
-    def _identify_automation_candidates(self, commands: List[str]) -> List[Dict[str, Any]]:
+    def _identify_automation_candidates(self, commands: List[str], counts: _CommandCounts) -> List[Dict[str, Any]]:
         """Identify commands that could be automated."""
+        # Scores were computed once per distinct command in _collect_counts
+        scores = counts.automation_scores
+        scored = ((command, scores[command]) for command in commands)
+        
+        # Keep the 20 highest scores above the automation threshold (ties in
+        # command order); suggestions are only built for those
+        top = heapq.nlargest(20, ((command, score) for command, score in scored if score > 0.3),
+                             key=itemgetter(1))
+        
+        # Repeated commands share one set of suggestions
+        suggestions = {}
         candidates = []
+        for command, automation_score in top:
+            if command not in suggestions:
+                suggestions[command] = (
+                    self._suggest_automation_type(command),
+                    self._suggest_alias(command),
+                    self._suggest_script(command)
+                )
+            automation_type, suggested_alias, suggested_script = suggestions[command]
+            candidates.append({
+                'command': command,
+                'automation_score': automation_score,
+                'automation_type': automation_type,
+                'suggested_alias': suggested_alias,
+                'suggested_script': copy.copy(suggested_script)
+            })
         
-        for command in commands:
-            automation_score = self._calculate_automation_potential(command)
-            
-            if automation_score > 0.3:  # Threshold for automation potential
-                candidates.append({
-                    'command': command,
-                    'automation_score': automation_score,
-                    'automation_type': self._suggest_automation_type(command),
-                    'suggested_alias': self._suggest_alias(command),
-                    'suggested_script': self._suggest_script(command)
-                })
-        
-        # Sort by automation score
-        candidates.sort(key=lambda x: x['automation_score'], reverse=True)
-        return candidates[:20]
+        return candidates
     
     def _calculate_automation_potential(self, command: str) -> float:
         """Calculate automation potential score (0-1)."""
-        score = 0.0
-        
-        # Check if command matches automation patterns
-        for pattern in self.automation_patterns:
-            if re.search(pattern, command):
-                score += 0.3
+        # Check if command matches automation patterns (single words never do,
+        # so they skip the scan)
+        if _WHITESPACE.search(command):
+            matched = {match.lastindex for match in self._automation_union.finditer(command)}
+            score = self._pattern_scores[len(matched)]
+        else:
+            score = 0.0
         
         # Check command length (longer commands are better candidates)
-        if len(command.split()) > 3:
+        if LONG_COMMAND_PATTERN.match(command):
             score += 0.2
         
         # Check for repetitive elements
-        if any(word in command.lower() for word in ['find', 'grep', 'sed', 'awk', 'xargs']):
+        command_lower = command.lower()
+        if _SEARCH_KEYWORD_PATTERN.search(command_lower):
             score += 0.2
         
         # Check for file operations
-        if any(word in command.lower() for word in ['cp', 'mv', 'rm', 'mkdir', 'touch']):
+        if _FILE_OP_KEYWORD_PATTERN.search(command_lower):
             score += 0.1
         
         return min(score, 1.0)
@@ -302,11 +466,10 @@ class PatternAnalyzer:
     
     def _suggest_script(self, command: str) -> str:
         """Suggest a script for a complex command."""
-        parts = command.split()
-        if not parts:
+        base_cmd = _base_command(command)
+        if not base_cmd:
             return ''
         
-        base_cmd = parts[0]
         script_name = f"{base_cmd}_script.sh"
         
         script_content = f"""#!/bin/bash
@@ -338,109 +501,138 @@ echo "Command completed successfully!"
                     'workflow_type': self._classify_workflow(group)
                 }
                 workflows.append(workflow)
+                if len(workflows) == 10:  # Return top 10 workflows
+                    break
         
-        return workflows[:10]  # Return top 10 workflows
+        return workflows
     
     def _group_commands_by_time(self, commands: List[Dict[str, Any]], time_window: int) -> List[List[Dict[str, Any]]]:
-        """Group commands by time proximity."""
+        """
+        Group commands by time proximity.
+        
+        Timestamps are sorted and split into runs in NumPy (a stable sort, so
+        equal timestamps keep their input order); dicts are only gathered for
+        groups of two or more commands.
+        """
         if not commands:
             return []
         
-        # Sort by timestamp
-        sorted_commands = sorted(commands, key=lambda x: x.get('timestamp', 0))
+        timestamps = np.asarray([cmd.get('timestamp', 0) for cmd in commands])
+        order = np.argsort(timestamps, kind='stable')
         
-        groups = []
-        current_group = [sorted_commands[0]]
+        # A new group starts wherever the gap to the previous command is too wide
+        splits = np.flatnonzero(np.diff(timestamps[order]) > time_window) + 1
+        starts = np.concatenate(([0], splits))
+        ends = np.concatenate((splits, [len(commands)]))
         
-        for cmd in sorted_commands[1:]:
-            time_diff = cmd.get('timestamp', 0) - current_group[-1].get('timestamp', 0)
-            
-            if time_diff <= time_window:
-                current_group.append(cmd)
-            else:
-                if len(current_group) > 1:
-                    groups.append(current_group)
-                current_group = [cmd]
-        
-        if len(current_group) > 1:
-            groups.append(current_group)
+        groups = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            if end - start > 1:
+                groups.append([commands[i] for i in order[start:end].tolist()])
         
         return groups
     
     def _classify_workflow(self, commands: List[Dict[str, Any]]) -> str:
         """Classify the type of workflow."""
-        command_texts = [cmd['command'] for cmd in commands]
-        text = ' '.join(command_texts).lower()
-        
-        if any(word in text for word in ['git', 'commit', 'push']):
-            return 'git_workflow'
-        elif any(word in text for word in ['docker', 'build', 'run']):
-            return 'docker_workflow'
-        elif any(word in text for word in ['python', 'pip', 'install']):
-            return 'python_workflow'
-        elif any(word in text for word in ['npm', 'yarn', 'node']):
-            return 'node_workflow'
-        elif any(word in text for word in ['cd', 'ls', 'find']):
-            return 'file_exploration'
-        else:
-            return 'general_workflow'
+        text = ' '.join(cmd['command'] for cmd in commands).lower()
+        
+        for workflow_type, keywords in _WORKFLOW_KEYWORDS:
+            if any(word in text for word in keywords):
+                return workflow_type
+        return 'general_workflow'
     
-    def _analyze_tool_usage(self, commands: List[str]) -> Dict[str, Any]:
+    def _tools_in(self, text_lower: str) -> FrozenSet[str]:
+        """Return every tool with a keyword occurring in the lowercased text."""
+        keywords = {match.group(1) for match in self._tool_scanner.finditer(text_lower)}
+        return frozenset().union(*(self._keyword_closure[keyword] for keyword in keywords))
+    
+    def _tool_for_base(self, base_lower: str) -> str:
+        """
+        Return the first tool (in common_tools order) a base command mentions.
+        
+        Results are memoized per analyzer, since the same few base commands
+        recur across analyses.
+        """
+        tool = self._base_to_tool.get(base_lower)
+        if tool is None:
+            tools = self._tools_in(base_lower)
+            tool = next((tool for tool in self.common_tools if tool in tools), 'other')
+            self._base_to_tool[base_lower] = tool
+        return tool
+    
+    def _analyze_tool_usage(self, counts: _CommandCounts) -> Dict[str, Any]:
         """Analyze usage of different tools and technologies."""
         tool_stats = {}
         
-        for tool, keywords in self.common_tools.items():
-            count = sum(1 for cmd in commands 
-                       if any(keyword in cmd.lower() for keyword in keywords))
+        # One scan per distinct command (in first-occurrence order) collects
+        # the matching commands and their total count for every tool
+        matching_by_tool = defaultdict(list)
+        count_by_tool = defaultdict(int)
+        for cmd, count in counts.frequency.items():
+            for tool in self._tools_in(cmd.lower()):
+                matching_by_tool[tool].append(cmd)
+                count_by_tool[tool] += count
+        
+        for tool in self.common_tools:
+            count = count_by_tool.get(tool, 0)
             if count > 0:
                 tool_stats[tool] = {
                     'count': count,
-                    'percentage': (count / len(commands)) * 100,
-                    'primary_commands': self._get_primary_commands(commands, keywords)
+                    'percentage': (count / counts.total) * 100,
+                    'primary_commands': self._get_primary_commands(matching_by_tool[tool])
                 }
         
         return tool_stats
     
-    def _get_primary_commands(self, commands: List[str], keywords: List[str]) -> List[str]:
-        """Get primary commands for a tool."""
+    def _get_primary_commands(self, matching_commands: List[str]) -> List[str]:
+        """Get primary commands for a tool from the commands that mention it."""
         primary_commands = []
+        seen = set()
+        
+        for cmd in matching_commands:
+            base_cmd = _base_command(cmd)
+            if base_cmd not in seen:
+                seen.add(base_cmd)
+                primary_commands.append(base_cmd)
+                if len(primary_commands) == 5:
+                    break
         
-        for cmd in commands:
-            if any(keyword in cmd.lower() for keyword in keywords):
-                base_cmd = cmd.split()[0] if cmd.split() else ''
-                if base_cmd not in primary_commands:
-                    primary_commands.append(base_cmd)
-        
-        return primary_commands[:5]  # Return top 5
+        return primary_commands  # Top 5
     
     def _analyze_time_patterns(self, commands: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze time-based patterns in command usage."""
         if not commands:
             return {}
         
-        # Group by hour of day
+        # Group by hour of day and day of week (local time). UTC offsets and
+        # DST changes fall on quarter-hour boundaries, so the local hour and
+        # weekday are looked up once per 15-minute slot rather than per command.
         hourly_counts = defaultdict(int)
-        for cmd in commands:
-            if 'timestamp' in cmd:
-                dt = datetime.fromtimestamp(cmd['timestamp'])
-                hourly_counts[dt.hour] += 1
-        
-        # Group by day of week
         daily_counts = defaultdict(int)
+        slots = {}
         for cmd in commands:
             if 'timestamp' in cmd:
-                dt = datetime.fromtimestamp(cmd['timestamp'])
-                daily_counts[dt.strftime('%A')] += 1
+                timestamp = cmd['timestamp']
+                slot = timestamp // TIME_SLOT_SECONDS
+                fields = slots.get(slot)
+                if fields is None:
+                    fields = slots[slot] = slot_local_fields(slot)
+                if not fields:
+                    # Slot straddles an unusual offset change; look it up directly
+                    fields = local_fields(timestamp)
+                hour, weekday, _ = fields
+                hourly_counts[hour] += 1
+                daily_counts[_DAY_NAMES[weekday]] += 1
         
         return {
             'hourly_distribution': dict(hourly_counts),
             'daily_distribution': dict(daily_counts)
         }
     
-    def _generate_summary(self, commands: List[str], frequent_commands: List[Dict], tool_usage: Dict) -> Dict[str, Any]:
+    def _generate_summary(self, counts: _CommandCounts, frequent_commands: List[Dict], tool_usage: Dict) -> Dict[str, Any]:
         """Generate a summary of the analysis."""
-        total_commands = len(commands)
-        unique_commands = len(set(commands))
+        total_commands = counts.total
+        unique_commands = len(counts.frequency)
         
         # Most used tool
         most_used_tool = max(tool_usage.items(), key=lambda x: x[1]['count']) if tool_usage else None
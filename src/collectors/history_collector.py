@@ -3,20 +3,39 @@ Command History Collector
 Collects command history from various shell sources and active sessions.
 """
 
+import mmap
 import os
-import subprocess
-import json
 import re
-from datetime import datetime, timedelta
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional
 import psutil
 
+# History files larger than this are memory-mapped and only their tail is read
+_MMAP_THRESHOLD = 1 << 20
+
+# Zsh extended history format: ": <timestamp>:<duration>;<command>"
+_ZSH_HISTORY_LINE = re.compile(r': (\d+):\d+;(.+)')
+
+# Commands not worth recording when no ignore matcher is configured: blank
+# lines, and history/clear/exit/logout/pwd or cd/ls/echo without arguments.
+# One alternation replaces a regex per case.
+_IGNORED_COMMAND = re.compile(r'^(?:history|clear|exit|logout|cd|ls|pwd|echo)?\s*$')
+
 
 class CommandHistoryCollector:
     """Collects command history from shell history files and active processes."""
     
-    def __init__(self):
+    def __init__(self, ignore_matcher: Optional[Callable[[str], Any]] = None):
+        """
+        Args:
+            ignore_matcher: ``match``-style callable returning a truthy value
+                for commands to skip, e.g. ConfigManager.get_ignore_matcher();
+                defaults to the built-in list of trivial commands
+        """
+        self._ignore_match = _IGNORED_COMMAND.match if ignore_matcher is None else ignore_matcher
         self.shell_configs = {
             'bash': {
                 'history_file': '~/.bash_history',
@@ -52,13 +71,17 @@ class CommandHistoryCollector:
         if shell == 'auto':
             shell = self._detect_shell()
         
-        # Collect from history files
-        history_commands = self._collect_from_history(shell, limit)
-        commands.extend(history_commands)
-        
-        # Collect from active processes
-        active_commands = self._collect_from_active_processes(shell, limit // 2)
-        commands.extend(active_commands)
+        # Scan active processes in the background while the history file is
+        # read; both spend most of their time in I/O and syscalls
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            active_future = executor.submit(self._collect_from_active_processes, shell, limit // 2)
+            
+            # Collect from history files
+            history_commands = self._collect_from_history(shell, limit)
+            commands.extend(history_commands)
+            
+            # Collect from active processes
+            commands.extend(active_future.result())
         
         # Remove duplicates and sort by timestamp
         unique_commands = self._deduplicate_commands(commands)
@@ -66,6 +89,23 @@ class CommandHistoryCollector:
         
         return unique_commands[:limit]
     
+    def iter_commands(self, shell: str = 'auto', limit: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Yield collected commands newest first, as collect_commands returns them.
+        
+        Deduplication and the timestamp sort need every candidate up front,
+        but consumers such as DataManager.save_commands can write each record
+        as it is produced instead of holding a second copy.
+        
+        Args:
+            shell: Shell type ('bash', 'zsh', 'fish', 'auto')
+            limit: Maximum number of commands to collect
+            
+        Returns:
+            Iterator over command dictionaries with metadata
+        """
+        yield from self.collect_commands(shell=shell, limit=limit)
+    
     def _detect_shell(self) -> str:
         """Detect the current shell type."""
         shell = os.environ.get('SHELL', '').lower()
@@ -94,8 +134,7 @@ class CommandHistoryCollector:
             return commands
         
         try:
-            with open(history_file, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
+            lines = self._read_history_lines(history_file, limit)
             
             # Parse history based on shell type
             if shell == 'zsh':
@@ -110,6 +149,49 @@ class CommandHistoryCollector:
         
         return commands
     
+    def _read_history_lines(self, history_file: Path, limit: int) -> List[str]:
+        """
+        Read at least the last ``limit`` lines of a history file in one pass.
+        
+        The file is scanned backwards for newlines and only that tail is
+        decoded, so the cost is proportional to ``limit`` rather than the file
+        size; large files are memory-mapped instead of read. Lines match
+        ``readlines()`` in text mode minus the line terminators.
+        """
+        with open(history_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            
+            if limit <= 0:
+                data = f.read()
+            elif size <= _MMAP_THRESHOLD:
+                data = f.read()
+                data = data[self._tail_start(data, size, limit):]
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    data = mm[self._tail_start(mm, size, limit):]
+        
+        text = data.decode('utf-8', errors='ignore')
+        if '\r' in text:
+            # Same universal-newline handling as text-mode reads
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        
+        lines = text.split('\n')
+        if lines[-1] == '':
+            lines.pop()
+        
+        return lines
+    
+    @staticmethod
+    def _tail_start(buffer, size: int, limit: int) -> int:
+        """Offset of the first byte of the last ``limit`` lines in buffer."""
+        # One extra newline covers the file's trailing terminator
+        start = size
+        for _ in range(limit + 1):
+            start = buffer.rfind(b'\n', 0, start)
+            if start < 0:
+                break
+        return start + 1
+    
     def _parse_zsh_history(self, lines: List[str], limit: int) -> List[Dict[str, Any]]:
         """Parse zsh history format."""
         commands = []
@@ -120,14 +202,14 @@ class CommandHistoryCollector:
                 continue
             
             # Zsh history format: : timestamp:0;command
-            match = re.match(r': (\d+):\d+;(.+)', line)
+            match = _ZSH_HISTORY_LINE.match(line)
             if match:
                 timestamp = int(match.group(1))
                 command = match.group(2).strip()
                 
                 if command and not self._is_ignored_command(command):
                     commands.append({
-                        'command': command,
+                        'command': sys.intern(command),
                         'timestamp': timestamp,
                         'source': 'zsh_history',
                         'shell': 'zsh'
@@ -138,7 +220,7 @@ class CommandHistoryCollector:
     def _parse_bash_history(self, lines: List[str], limit: int) -> List[Dict[str, Any]]:
         """Parse bash history format."""
         commands = []
-        current_time = datetime.now()
+        current_time = int(datetime.now().timestamp())
         
         for i, line in enumerate(lines[-limit:]):
             line = line.strip()
@@ -146,11 +228,11 @@ class CommandHistoryCollector:
                 continue
             
             # Estimate timestamp (bash history doesn't include timestamps by default)
-            # Use reverse chronological order
-            estimated_timestamp = int((current_time - timedelta(minutes=i)).timestamp())
+            # Use reverse chronological order, one minute apart
+            estimated_timestamp = current_time - i * 60
             
             commands.append({
-                'command': line,
+                'command': sys.intern(line),
                 'timestamp': estimated_timestamp,
                 'source': 'bash_history',
                 'shell': 'bash'
@@ -160,46 +242,48 @@ class CommandHistoryCollector:
     
     def _parse_fish_history(self, lines: List[str], limit: int) -> List[Dict[str, Any]]:
         """Parse fish history format."""
-        commands = []
-        
-        for line in lines[-limit:]:
-            line = line.strip()
-            if not line:
-                continue
-            
-            # Fish history format: - cmd: command
-            if line.startswith('- cmd: '):
-                command = line[7:].strip()
-                if command and not self._is_ignored_command(command):
-                    commands.append({
-                        'command': command,
-                        'timestamp': int(datetime.now().timestamp()),
-                        'source': 'fish_history',
-                        'shell': 'fish'
-                    })
+        # Fish history has no per-entry timestamps here; all share the read time
+        timestamp = int(datetime.now().timestamp())
         
-        return commands
+        # Fish history format: - cmd: command
+        return [
+            {
+                'command': sys.intern(command),
+                'timestamp': timestamp,
+                'source': 'fish_history',
+                'shell': 'fish'
+            }
+            for line in lines[-limit:]
+            if (entry := line.strip()).startswith('- cmd: ')
+            and (command := entry[7:].strip())
+            and not self._is_ignored_command(command)
+        ]
     
     def _collect_from_active_processes(self, shell: str, limit: int) -> List[Dict[str, Any]]:
         """Collect commands from active shell processes."""
         commands = []
         
+        process_names = frozenset(self.shell_configs[shell]['process_names'])
+        
         try:
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline', 'create_time']):
+            # Only the name is prefetched for every process; the command line
+            # and start time are read for matching shells alone
+            for proc in psutil.process_iter(['name']):
                 try:
-                    if proc.info['name'] in self.shell_configs[shell]['process_names']:
-                        # Get command line arguments
-                        cmdline = proc.info['cmdline']
-                        if cmdline and len(cmdline) > 1:
-                            command = ' '.join(cmdline[1:])  # Skip shell name
-                            if command and not self._is_ignored_command(command):
-                                commands.append({
-                                    'command': command,
-                                    'timestamp': int(proc.info['create_time']),
-                                    'source': 'active_process',
-                                    'shell': shell,
-                                    'pid': proc.info['pid']
-                                })
+                    if proc.info['name'] in process_names:
+                        with proc.oneshot():
+                            # Get command line arguments
+                            cmdline = proc.cmdline()
+                            if cmdline and len(cmdline) > 1:
+                                command = ' '.join(cmdline[1:])  # Skip shell name
+                                if command and not self._is_ignored_command(command):
+                                    commands.append({
+                                        'command': command,
+                                        'timestamp': int(proc.create_time()),
+                                        'source': 'active_process',
+                                        'shell': shell,
+                                        'pid': proc.pid
+                                    })
                 except (psutil.NoSuchProcess, psutil.AccessDenied):
                     continue
                     
@@ -210,26 +294,12 @@ class CommandHistoryCollector:
     
     def _is_ignored_command(self, command: str) -> bool:
         """Check if command should be ignored."""
-        ignored_patterns = [
-            r'^\s*$',  # Empty or whitespace only
-            r'^history\s*$',  # history command
-            r'^clear\s*$',  # clear command
-            r'^exit\s*$',  # exit command
-            r'^logout\s*$',  # logout command
-            r'^cd\s*$',  # cd without arguments
-            r'^ls\s*$',  # ls without arguments
-            r'^pwd\s*$',  # pwd command
-            r'^echo\s*$',  # echo without arguments
-        ]
-        
-        for pattern in ignored_patterns:
-            if re.match(pattern, command):
-                return True
-        
-        return False
+        return self._ignore_match(command) is not None
     
     def _deduplicate_commands(self, commands: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Remove duplicate commands based on command text and timestamp."""
+        # History parsers intern command texts, so repeated commands share one
+        # string and key comparisons below short-circuit on identity
         seen = set()
         unique_commands = []
         
@@ -3,11 +3,63 @@ Configuration Manager
 Handles configuration settings and preferences for the CmdChronicle tool.
 """
 
-import json
+import copy
 import os
+import re
 from pathlib import Path
-from typing import Dict, Any, Optional
-from datetime import datetime
+from types import MappingProxyType
+from typing import Callable, Dict, Any, Mapping, Optional, Sequence, Tuple
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from .json_io import dumps_json, loads_json, now_iso
+
+# Marks keys that are absent so misses are cached as well as hits
+_MISSING = object()
+
+# Most dotted keys ConfigManager.get memoizes before starting over
+_LOOKUP_CACHE_SIZE = 512
+
+# Keys returned by each ConfigManager.get_<section>_config, with the
+# section field each one reads
+_SECTION_FIELDS = {
+    'ollama': (
+        ('base_url', 'base_url'),
+        ('model', 'default_model'),
+        ('timeout', 'timeout'),
+        ('keep_alive', 'keep_alive'),
+        ('max_tokens', 'max_tokens'),
+        ('temperature', 'temperature'),
+        ('top_p', 'top_p'),
+    ),
+    'collection': (
+        ('shell', 'default_shell'),
+        ('max_commands', 'max_commands'),
+        ('include_active_processes', 'include_active_processes'),
+        ('ignore_patterns', 'ignore_patterns'),
+    ),
+    'analysis': (
+        ('automation_threshold', 'automation_threshold'),
+        ('complexity_weight', 'complexity_weight'),
+        ('frequency_weight', 'frequency_weight'),
+        ('pattern_weight', 'pattern_weight'),
+    ),
+    'visualization': (
+        ('wordcloud', 'wordcloud'),
+        ('charts', 'charts'),
+    ),
+    'output': (
+        ('default_output_dir', 'default_output_dir'),
+        ('save_intermediate', 'save_intermediate'),
+        ('export_formats', 'export_formats'),
+    )
+}
+
+# Matches nothing; used when there are no usable ignore patterns
+_MATCH_NOTHING = re.compile(r'(?!)')
 
 
 class ConfigManager:
@@ -19,6 +71,9 @@ class ConfigManager:
         self.config_file = self.config_dir / "config.json"
         self.default_config = self._get_default_config()
         self.config = self._load_config()
+        self._lookup_cache: Dict[str, Any] = {}
+        self._config_views: Dict[str, Mapping[str, Any]] = {}
+        self._ignore_matcher: Optional[Tuple[Tuple[str, ...], Callable]] = None
     
     def _get_default_config(self) -> Dict[str, Any]:
         """Get default configuration settings."""
@@ -28,6 +83,7 @@ class ConfigManager:
                 'base_url': 'http://localhost:11434',
                 'default_model': 'llama3.2',
                 'timeout': 30,
+                'keep_alive': '30m',
                 'max_tokens': 2000,
                 'temperature': 0.7,
                 'top_p': 0.9
@@ -37,14 +93,15 @@ class ConfigManager:
                 'max_commands': 1000,
                 'include_active_processes': True,
                 'ignore_patterns': [
-                    '^history$',
-                    '^clear$',
-                    '^exit$',
-                    '^logout$',
-                    '^cd$',
-                    '^ls$',
-                    '^pwd$',
-                    '^echo$'
+                    r'^\s*$',
+                    r'^history\s*$',
+                    r'^clear\s*$',
+                    r'^exit\s*$',
+                    r'^logout\s*$',
+                    r'^cd\s*$',
+                    r'^ls\s*$',
+                    r'^pwd\s*$',
+                    r'^echo\s*$'
                 ]
             },
             'analysis': {
@@ -84,12 +141,19 @@ class ConfigManager:
             }
         }
     
-    def _load_config(self) -> Dict[str, Any]:
-        """Load configuration from file or create default."""
+    def _load_config(self, persist_default: bool = False) -> Dict[str, Any]:
+        """
+        Load configuration from file, falling back to the defaults.
+        
+        A missing config file is only written when persist_default is set;
+        otherwise the defaults stay in memory until save_config is called.
+        """
         if self.config_file.exists():
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
+                config = loads_json(self.config_file.read_bytes())
+                # save_config wraps the settings together with metadata
+                if isinstance(config, dict) and 'config' in config and 'metadata' in config:
+                    config = config['config']
                 
                 # Merge with default config to ensure all keys exist
                 merged_config = self._merge_configs(self.default_config, config)
@@ -97,15 +161,17 @@ class ConfigManager:
                 
             except Exception as e:
                 print(f"Warning: Could not load config file: {e}")
-                return self.default_config.copy()
+                return copy.deepcopy(self.default_config)
         else:
-            # Create default config file
-            self.save_config(self.default_config)
-            return self.default_config.copy()
+            if persist_default:
+                # Create default config file
+                self.save_config(self.default_config)
+            return copy.deepcopy(self.default_config)
     
     def _merge_configs(self, default: Dict[str, Any], user: Dict[str, Any]) -> Dict[str, Any]:
         """Merge user config with default config."""
-        merged = default.copy()
+        # Deep copy, so editing the result never reaches the defaults' sections
+        merged = copy.deepcopy(default)
         
         def merge_dicts(base: Dict[str, Any], update: Dict[str, Any]) -> None:
             for key, value in update.items():
@@ -133,14 +199,13 @@ class ConfigManager:
         # Add metadata
         config_with_metadata = {
             'metadata': {
-                'last_updated': datetime.now().isoformat(),
+                'last_updated': now_iso(),
                 'version': config.get('version', '1.0.0')
             },
             'config': config
         }
         
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(config_with_metadata, f, indent=2, ensure_ascii=False)
+        self.config_file.write_bytes(dumps_json(config_with_metadata))
         
         return str(self.config_file)
     
@@ -155,15 +220,36 @@ class ConfigManager:
         Returns:
             Configuration value
         """
-        keys = key.split('.')
+        try:
+            value = self._lookup_cache[key]
+        except KeyError:
+            value = self._lookup(key)
+            if len(self._lookup_cache) >= _LOOKUP_CACHE_SIZE:
+                self._lookup_cache.clear()
+            self._lookup_cache[key] = value
+        
+        return default if value is _MISSING else value
+    
+    def _clear_caches(self) -> None:
+        """Forget memoized lookups and section views after the config changes."""
+        self._lookup_cache.clear()
+        self._config_views.clear()
+    
+    def _lookup(self, key: str) -> Any:
+        """Walk the config for a dotted key, returning _MISSING if absent."""
         value = self.config
         
         try:
-            for k in keys:
+            for k in key.split('.'):
                 value = value[k]
             return value
         except (KeyError, TypeError):
-            return default
+            return _MISSING
+    
+    def reload(self) -> None:
+        """Re-read the config file and drop memoized lookups."""
+        self.config = self._load_config()
+        self._clear_caches()
     
     def set(self, key: str, value: Any) -> None:
         """
@@ -174,30 +260,54 @@ class ConfigManager:
             value: Value to set
         """
         keys = key.split('.')
+        
+        # Set the value
+        self._parent_section(keys[:-1])[keys[-1]] = value
+        self._clear_caches()
+    
+    def _parent_section(self, keys: Sequence[str]) -> Dict[str, Any]:
+        """Walk to the section named by a key path, creating missing levels."""
         config = self.config
         
-        # Navigate to the parent of the target key
-        for k in keys[:-1]:
+        for k in keys:
             if k not in config:
                 config[k] = {}
             config = config[k]
         
-        # Set the value
-        config[keys[-1]] = value
+        return config
     
     def update(self, updates: Dict[str, Any]) -> None:
         """
         Update multiple configuration values.
         
+        Keys sharing a section (e.g. 'ollama.timeout' and 'ollama.top_p')
+        walk to it only once.
+        
         Args:
             updates: Dictionary of key-value pairs to update
         """
-        for key, value in updates.items():
-            self.set(key, value)
+        sections = {}
+        
+        try:
+            for key, value in updates.items():
+                keys = key.split('.')
+                path = tuple(keys[:-1])
+                section = sections.get(path)
+                if section is None:
+                    section = sections[path] = self._parent_section(path)
+                section[keys[-1]] = value
+                
+                # A value replacing a section makes walks through it stale
+                full_path = path + (keys[-1],)
+                if any(other[:len(full_path)] == full_path for other in sections):
+                    sections = {path: section}
+        finally:
+            self._clear_caches()
     
     def reset_to_default(self) -> None:
         """Reset configuration to default values."""
-        self.config = self.default_config.copy()
+        self.config = copy.deepcopy(self.default_config)
+        self._clear_caches()
         self.save_config()
     
     def validate_config(self) -> Dict[str, Any]:
@@ -244,49 +354,78 @@ class ConfigManager:
         
         return validation
     
-    def get_ollama_config(self) -> Dict[str, Any]:
-        """Get Ollama-specific configuration."""
-        return {
-            'base_url': self.get('ollama.base_url'),
-            'model': self.get('ollama.default_model'),
-            'timeout': self.get('ollama.timeout'),
-            'max_tokens': self.get('ollama.max_tokens'),
-            'temperature': self.get('ollama.temperature'),
-            'top_p': self.get('ollama.top_p')
-        }
+    def _section(self, name: str) -> Dict[str, Any]:
+        """Return a top-level config section, or an empty dict if it is missing."""
+        section = self.get(name)
+        return section if isinstance(section, dict) else {}
     
-    def get_collection_config(self) -> Dict[str, Any]:
-        """Get collection-specific configuration."""
-        return {
-            'shell': self.get('collection.default_shell'),
-            'max_commands': self.get('collection.max_commands'),
-            'include_active_processes': self.get('collection.include_active_processes'),
-            'ignore_patterns': self.get('collection.ignore_patterns')
-        }
+    def _config_view(self, name: str) -> Mapping[str, Any]:
+        """
+        Read-only view of the fields _SECTION_FIELDS lists for a section.
+        
+        Views are built once and shared until the config changes; callers
+        that want to modify one should copy it with dict().
+        """
+        view = self._config_views.get(name)
+        if view is None:
+            section = self._section(name)
+            view = MappingProxyType({key: section.get(field) for key, field in _SECTION_FIELDS[name]})
+            self._config_views[name] = view
+        return view
     
-    def get_analysis_config(self) -> Dict[str, Any]:
-        """Get analysis-specific configuration."""
-        return {
-            'automation_threshold': self.get('analysis.automation_threshold'),
-            'complexity_weight': self.get('analysis.complexity_weight'),
-            'frequency_weight': self.get('analysis.frequency_weight'),
-            'pattern_weight': self.get('analysis.pattern_weight')
-        }
+    def get_ollama_config(self) -> Mapping[str, Any]:
+        """Get Ollama-specific configuration as a read-only view."""
+        return self._config_view('ollama')
     
-    def get_visualization_config(self) -> Dict[str, Any]:
-        """Get visualization-specific configuration."""
-        return {
-            'wordcloud': self.get('visualization.wordcloud'),
-            'charts': self.get('visualization.charts')
-        }
+    def get_collection_config(self) -> Mapping[str, Any]:
+        """Get collection-specific configuration as a read-only view."""
+        return self._config_view('collection')
     
-    def get_output_config(self) -> Dict[str, Any]:
-        """Get output-specific configuration."""
-        return {
-            'default_output_dir': self.get('output.default_output_dir'),
-            'save_intermediate': self.get('output.save_intermediate'),
-            'export_formats': self.get('output.export_formats')
-        }
+    def get_ignore_matcher(self) -> Callable[[str], Optional[re.Match]]:
+        """
+        Get one compiled matcher for all collection.ignore_patterns.
+        
+        The patterns are joined into a single alternation, so a command is
+        checked in one regex call however many patterns there are. Invalid
+        patterns are skipped with a warning. The compiled matcher is reused
+        until the configured patterns change.
+        
+        Returns:
+            A ``match`` function returning a match if any pattern matches
+            the start of the command, else None
+        """
+        patterns = tuple(self.get('collection.ignore_patterns') or ())
+        
+        if self._ignore_matcher is None or self._ignore_matcher[0] != patterns:
+            groups = []
+            for pattern in patterns:
+                group = f'(?:{pattern})'
+                try:
+                    re.compile(group)
+                except re.error as e:
+                    print(f"Warning: Skipping invalid ignore pattern {pattern!r}: {e}")
+                    continue
+                groups.append(group)
+            
+            if groups:
+                compiled = re.compile('|'.join(groups))
+            else:
+                compiled = _MATCH_NOTHING
+            self._ignore_matcher = (patterns, compiled.match)
+        
+        return self._ignore_matcher[1]
+    
+    def get_analysis_config(self) -> Mapping[str, Any]:
+        """Get analysis-specific configuration as a read-only view."""
+        return self._config_view('analysis')
+    
+    def get_visualization_config(self) -> Mapping[str, Any]:
+        """Get visualization-specific configuration as a read-only view."""
+        return self._config_view('visualization')
+    
+    def get_output_config(self) -> Mapping[str, Any]:
+        """Get output-specific configuration as a read-only view."""
+        return self._config_view('output')
     
     def create_profile(self, name: str, config_overrides: Dict[str, Any]) -> str:
         """
@@ -302,20 +441,18 @@ class ConfigManager:
         profile_file = self.config_dir / f"profile_{name}.json"
         
         # Create profile config by merging with current config
-        profile_config = self.config.copy()
-        self._merge_configs(profile_config, config_overrides)
+        profile_config = self._merge_configs(self.config, config_overrides)
         
         profile_data = {
             'metadata': {
                 'name': name,
-                'created_at': datetime.now().isoformat(),
+                'created_at': now_iso(),
                 'version': '1.0.0'
             },
             'config': profile_config
         }
         
-        with open(profile_file, 'w', encoding='utf-8') as f:
-            json.dump(profile_data, f, indent=2, ensure_ascii=False)
+        profile_file.write_bytes(dumps_json(profile_data))
         
         return str(profile_file)
     
@@ -335,10 +472,10 @@ class ConfigManager:
             return False
         
         try:
-            with open(profile_file, 'r', encoding='utf-8') as f:
-                profile_data = json.load(f)
+            profile_data = loads_json(profile_file.read_bytes())
             
             self.config = profile_data['config']
+            self._clear_caches()
             return True
             
         except Exception as e:
@@ -356,14 +493,13 @@ class ConfigManager:
         
         for profile_file in self.config_dir.glob("profile_*.json"):
             try:
-                with open(profile_file, 'r', encoding='utf-8') as f:
-                    profile_data = json.load(f)
+                metadata = self._read_profile_metadata(profile_file)
                 
-                name = profile_data['metadata']['name']
+                name = metadata['name']
                 profiles[name] = {
                     'file': str(profile_file),
-                    'created_at': profile_data['metadata'].get('created_at'),
-                    'version': profile_data['metadata'].get('version')
+                    'created_at': metadata.get('created_at'),
+                    'version': metadata.get('version')
                 }
                 
             except Exception as e:
@@ -371,6 +507,22 @@ class ConfigManager:
         
         return profiles
     
+    def _read_profile_metadata(self, profile_file: Path) -> Dict[str, Any]:
+        """
+        Read only the metadata object of a profile file.
+        
+        With ijson installed the file is parsed incrementally and reading
+        stops once the metadata (written before the config body) is complete.
+        """
+        if ijson is not None:
+            with open(profile_file, 'rb') as f:
+                metadata = next(ijson.items(f, 'metadata', use_float=True), None)
+            if metadata is None:
+                raise KeyError('metadata')
+            return metadata
+        
+        return loads_json(profile_file.read_bytes())['metadata']
+    
     def export_config(self, output_path: str) -> str:
         """
         Export current configuration to a file.
@@ -386,23 +538,23 @@ class ConfigManager:
         
         export_data = {
             'export_info': {
-                'exported_at': datetime.now().isoformat(),
+                'exported_at': now_iso(),
                 'version': '1.0.0'
             },
             'config': self.config
         }
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
+        output_path.write_bytes(dumps_json(export_data))
         
         return str(output_path)
     
-    def import_config(self, import_path: str) -> bool:
+    def import_config(self, import_path: str, persist: bool = True) -> bool:
         """
         Import configuration from a file.
         
         Args:
             import_path: Path to the configuration file to import
+            persist: Also write the imported configuration to the config file
             
         Returns:
             True if import was successful
@@ -413,15 +565,16 @@ class ConfigManager:
             return False
         
         try:
-            with open(import_path, 'r', encoding='utf-8') as f:
-                import_data = json.load(f)
+            import_data = loads_json(import_path.read_bytes())
             
             if 'config' in import_data:
                 self.config = import_data['config']
             else:
                 self.config = import_data
+            self._clear_caches()
             
-            self.save_config()
+            if persist:
+                self.save_config()
             return True
             
         except Exception as e:
@@ -3,27 +3,220 @@ Data Manager
 Handles data persistence, loading, and management for the CmdChronicle tool.
 """
 
+import gzip
+import hashlib
+import io
 import json
+import mmap
 import os
+import time
+from contextlib import contextmanager
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from datetime import datetime
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .json_io import dumps_json, loads_json, now_iso
+
+# Files at least this large are parsed straight from a memory map
+_MMAP_THRESHOLD = 1 << 16
+
+# Most entries kept per cache namespace; the least recently used go first
+_CACHE_MAX_ENTRIES = 64
+
+# Read size used when hashing input files
+_HASH_CHUNK_SIZE = 1 << 20
+
+# Leading bytes of gzip data; compressed data files keep their .json name
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _read_data_bytes(path: Path) -> bytes:
+    """Read a data file's JSON bytes, decompressing it if it was gzipped."""
+    raw = path.read_bytes()
+    if raw.startswith(_GZIP_MAGIC):
+        return gzip.decompress(raw)
+    return raw
+
+
+def _open_data_file(path: Path):
+    """Open a data file for binary reading, decompressing it if it was gzipped."""
+    f = open(path, 'rb')
+    if f.read(2) == _GZIP_MAGIC:
+        f.seek(0)
+        return gzip.GzipFile(fileobj=f, mode='rb')
+    f.seek(0)
+    return f
+
+
+def _load_json_file(path: Path) -> Any:
+    """Parse a JSON file; with orjson, large files are not copied into bytes first."""
+    if orjson is not None and path.stat().st_size >= _MMAP_THRESHOLD:
+        with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:2] != _GZIP_MAGIC:
+                with memoryview(mm) as view:
+                    try:
+                        return orjson.loads(view)
+                    except orjson.JSONDecodeError:
+                        # Let _loads_json apply its stdlib fallback
+                        pass
+    
+    return loads_json(_read_data_bytes(path))
+
+
+@contextmanager
+def _replacing(path: Path) -> Iterator[Path]:
+    """Yield a temporary path beside ``path`` that replaces it only on success."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        # An error or Ctrl-C leaves the previous file as it was
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _csv_rows(records: Iterable[Dict[str, Any]], fieldnames: List[str]) -> Iterator[Any]:
+    """
+    Yield the CSV row of each record, as csv.DictWriter would build it.
+    
+    Records with exactly the expected keys are read with one itemgetter
+    call; others get blank cells for missing fields and raise on unknown
+    ones, like DictWriter.
+    """
+    field_set = set(fieldnames)
+    if len(fieldnames) > 1:
+        values = itemgetter(*fieldnames)
+    else:
+        values = lambda record: [record[name] for name in fieldnames]
+    
+    for record in records:
+        if record.keys() == field_set:
+            yield values(record)
+            continue
+        
+        unknown = record.keys() - field_set
+        if unknown:
+            raise ValueError("dict contains fields not in fieldnames: "
+                             + ", ".join(repr(name) for name in unknown))
+        yield [record.get(name, '') for name in fieldnames]
+
+
+class _IncrementalJSONReader:
+    """Minimal pull parser that decodes one JSON value at a time from a text file."""
+    
+    _decoder = json.JSONDecoder()
+    
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+    
+    def _fill(self) -> bool:
+        """Append the next chunk to the buffer, dropping consumed text."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self) -> str:
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in ' \t\n\r':
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ''
+    
+    def expect(self, char: str) -> None:
+        """Consume a structural character or raise."""
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+    
+    def value(self) -> Any:
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number ending at the buffer edge may continue in the next chunk
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+    
+    def items(self) -> Iterator[Any]:
+        """Yield the elements of the JSON array at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            separator = self.peek()
+            self.pos += 1
+            if separator == ']':
+                return
+            if separator != ',':
+                raise json.JSONDecodeError("Expecting ',' delimiter", self.buf, self.pos - 1)
+
 
 class DataManager:
     """Manages data persistence and loading operations."""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", compression_enabled: bool = False):
+        """
+        Args:
+            data_dir: Directory holding the data files
+            compression_enabled: Gzip saved commands, patterns and insights
+                (the data.compression_enabled setting); loading detects
+                compressed files either way
+        """
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.compression_enabled = compression_enabled
     
-    def save_commands(self, commands: List[Dict[str, Any]], filepath: str) -> str:
+    def save_commands(self, commands: Iterable[Dict[str, Any]], filepath: str, pretty: bool = False) -> str:
         """
         Save commands data to a JSON file.
         
+        Records are encoded and written one at a time, so a generator (e.g.
+        CommandHistoryCollector.iter_commands) is never materialized and no
+        whole-document JSON string is built. Metadata is written after the
+        commands since its counts are only known once they are consumed.
+        The document goes to a temporary file that replaces ``filepath``
+        only once every command was written, so a failing or interrupted
+        producer leaves the previous file intact.
+        
         Args:
-            commands: List of command dictionaries
+            commands: Command dictionaries (a list or any iterable)
             filepath: Path to save the file
+            pretty: Indent the JSON for human reading (default: compact)
             
         Returns:
             Path to the saved file
@@ -31,22 +224,55 @@ class DataManager:
         filepath = Path(filepath)
         filepath.parent.mkdir(parents=True, exist_ok=True)
         
-        # Add metadata
-        data = {
-            'metadata': {
-                'generated_at': datetime.now().isoformat(),
-                'total_commands': len(commands),
-                'unique_commands': len(set(cmd.get('command', '') for cmd in commands)),
+        total_commands = 0
+        unique_commands = set()
+        
+        with _replacing(filepath) as tmp_path, self._open_for_write(tmp_path) as f:
+            f.write(b'{\n  "commands": [' if pretty else b'{"commands":[')
+            for cmd in commands:
+                record = dumps_json(cmd, indent=pretty)
+                if pretty:
+                    # Re-indent each record to its nesting level in the document
+                    f.write(b',\n    ' if total_commands else b'\n    ')
+                    record = record.replace(b'\n', b'\n    ')
+                elif total_commands:
+                    f.write(b',')
+                f.write(record)
+                total_commands += 1
+                unique_commands.add(cmd.get('command', ''))
+            
+            # Add metadata
+            metadata = {
+                'generated_at': now_iso(),
+                'total_commands': total_commands,
+                'unique_commands': len(unique_commands),
                 'version': '1.0.0'
-            },
-            'commands': commands
-        }
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            }
+            if pretty:
+                f.write(b'\n  ],\n' if total_commands else b'],\n')
+                f.write(b'  "metadata": ')
+                f.write(dumps_json(metadata).replace(b'\n', b'\n  '))
+                f.write(b'\n}')
+            else:
+                f.write(b'],"metadata":')
+                f.write(dumps_json(metadata, indent=False))
+                f.write(b'}')
         
         return str(filepath)
     
+    def _open_for_write(self, filepath: Path):
+        """Open a data file for binary writing, through gzip if compression is enabled."""
+        if self.compression_enabled:
+            return gzip.open(filepath, 'wb', compresslevel=6)
+        return open(filepath, 'wb')
+    
+    def _write_data(self, filepath: Path, data: bytes) -> None:
+        """Write a whole data file, gzipped if compression is enabled."""
+        if self.compression_enabled:
+            data = gzip.compress(data, compresslevel=6)
+        with _replacing(filepath) as tmp_path:
+            tmp_path.write_bytes(data)
+    
     def load_commands(self, filepath: str) -> List[Dict[str, Any]]:
         """
         Load commands data from a JSON file.
@@ -62,8 +288,7 @@ class DataManager:
         if not filepath.exists():
             raise FileNotFoundError(f"Commands file not found: {filepath}")
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = _load_json_file(filepath)
         
         # Handle both old and new format
         if 'commands' in data:
@@ -72,13 +297,63 @@ class DataManager:
             # Assume old format where data is directly a list
             return data
     
-    def save_patterns(self, patterns: Dict[str, Any], filepath: str) -> str:
+    def iter_commands(self, filepath: str) -> Iterator[Dict[str, Any]]:
+        """
+        Stream commands from a JSON file without loading the whole document.
+        
+        The file is opened lazily on first iteration, so callers that end up
+        not needing the commands (e.g. on a cache hit) never parse it.
+        
+        Args:
+            filepath: Path to the file to load
+            
+        Returns:
+            Iterator over command dictionaries
+        """
+        filepath = Path(filepath)
+        
+        if not filepath.exists():
+            raise FileNotFoundError(f"Commands file not found: {filepath}")
+        
+        return self._iter_commands(filepath)
+    
+    def _iter_commands(self, filepath: Path) -> Iterator[Dict[str, Any]]:
+        """Yield commands from either the metadata-wrapped or bare-list format."""
+        if ijson is not None:
+            with _open_data_file(filepath) as f:
+                head = f.read(64).lstrip()
+                f.seek(0)
+                prefix = 'item' if head.startswith(b'[') else 'commands.item'
+                yield from ijson.items(f, prefix, use_float=True)
+            return
+        
+        with io.TextIOWrapper(_open_data_file(filepath), encoding='utf-8') as f:
+            reader = _IncrementalJSONReader(f)
+            
+            # Old format: the file is directly a list
+            if reader.peek() == '[':
+                yield from reader.items()
+                return
+            
+            reader.expect('{')
+            while reader.peek() not in ('}', ''):
+                key = reader.value()
+                reader.expect(':')
+                if key == 'commands':
+                    yield from reader.items()
+                    return
+                reader.value()
+                if reader.peek() == ',':
+                    reader.pos += 1
+    
+    def save_patterns(self, patterns: Dict[str, Any], filepath: str, pretty: bool = False) -> str:
         """
         Save pattern analysis results to a JSON file.
         
         Args:
             patterns: Pattern analysis results
             filepath: Path to save the file
+            pretty: Indent the JSON for human reading (default: compact)
             
         Returns:
             Path to the saved file
@@ -89,14 +364,13 @@ class DataManager:
         # Add metadata
         data = {
             'metadata': {
-                'generated_at': datetime.now().isoformat(),
+                'generated_at': now_iso(),
                 'version': '1.0.0'
             },
             'patterns': patterns
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        self._write_data(filepath, dumps_json(data, indent=pretty))
         
         return str(filepath)
     
@@ -115,8 +389,7 @@ class DataManager:
         if not filepath.exists():
             raise FileNotFoundError(f"Patterns file not found: {filepath}")
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = _load_json_file(filepath)
         
         # Handle both old and new format
         if 'patterns' in data:
@@ -125,13 +398,14 @@ class DataManager:
             # Assume old format where data is directly the patterns
             return data
     
-    def save_insights(self, insights: Dict[str, Any], filepath: str) -> str:
+    def save_insights(self, insights: Dict[str, Any], filepath: str, pretty: bool = False) -> str:
         """
         Save AI insights to a JSON file.
         
         Args:
             insights: AI-generated insights
             filepath: Path to save the file
+            pretty: Indent the JSON for human reading (default: compact)
             
         Returns:
             Path to the saved file
@@ -142,14 +416,13 @@ class DataManager:
         # Add metadata
         data = {
             'metadata': {
-                'generated_at': datetime.now().isoformat(),
+                'generated_at': now_iso(),
                 'version': '1.0.0'
             },
             'insights': insights
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        self._write_data(filepath, dumps_json(data, indent=pretty))
         
         return str(filepath)
     
@@ -168,8 +441,7 @@ class DataManager:
         if not filepath.exists():
             raise FileNotFoundError(f"Insights file not found: {filepath}")
         
-        with open(filepath, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = _load_json_file(filepath)
         
         # Handle both old and new format
         if 'insights' in data:
@@ -178,6 +450,102 @@ class DataManager:
             # Assume old format where data is directly the insights
             return data
     
+    def content_hash(self, data: bytes) -> str:
+        """Return a stable hex digest identifying a blob of input data."""
+        return hashlib.blake2b(data, digest_size=20).hexdigest()
+    
+    def file_hash(self, filepath: str, prefix: bytes = b'') -> str:
+        """
+        Return content_hash(prefix + file bytes), reading the file in chunks.
+        
+        Args:
+            filepath: File to hash
+            prefix: Bytes hashed ahead of the file (e.g. a cache version)
+            
+        Returns:
+            Hex digest, equal to hashing the whole file in memory
+        """
+        digest = hashlib.blake2b(prefix, digest_size=20)
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    
+    def cache_dir(self, namespace: str) -> Path:
+        """Directory holding cache entries for a namespace."""
+        return self.data_dir / ".cache" / namespace
+    
+    def load_cached(self, namespace: str, key: str) -> Optional[Any]:
+        """
+        Load a memoized result from the on-disk cache.
+        
+        Args:
+            namespace: Cache namespace (e.g. 'patterns')
+            key: Content hash of the input the result was computed from
+            
+        Returns:
+            The cached result, or None on a miss
+        """
+        cache_file = self.cache_dir(namespace) / f"{key}.json"
+        
+        try:
+            result = loads_json(cache_file.read_bytes())
+            # Mark the entry as recently used so pruning keeps it
+            os.utime(cache_file)
+            return result
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable cache entry {cache_file}: {e}")
+            return None
+    
+    def save_cached(self, namespace: str, key: str, result: Any) -> str:
+        """
+        Store a result in the on-disk cache.
+        
+        Args:
+            namespace: Cache namespace (e.g. 'patterns')
+            key: Content hash of the input the result was computed from
+            result: JSON-serializable result to store
+            
+        Returns:
+            Path to the cache entry
+        """
+        cache_dir = self.cache_dir(namespace)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file = cache_dir / f"{key}.json"
+        
+        with _replacing(cache_file) as tmp_path:
+            tmp_path.write_bytes(dumps_json(result, indent=False))
+        self._prune_cache(cache_dir, _CACHE_MAX_ENTRIES)
+        
+        return str(cache_file)
+    
+    def _prune_cache(self, cache_dir: Path, max_entries: Optional[int],
+                     cutoff_time: Optional[float] = None) -> int:
+        """
+        Delete a cache directory's entries beyond max_entries.
+        
+        Entries are dropped least recently used first; with cutoff_time,
+        entries last used before it are dropped as well.
+        
+        Returns:
+            Number of entries deleted
+        """
+        with os.scandir(cache_dir) as entries:
+            cached = [(entry.stat().st_mtime, entry.path) for entry in entries
+                      if entry.name.endswith('.json')]
+        
+        cached.sort()
+        excess = max(len(cached) - max_entries, 0) if max_entries is not None else 0
+        if cutoff_time is not None:
+            while excess < len(cached) and cached[excess][0] < cutoff_time:
+                excess += 1
+        
+        for _, path in cached[:excess]:
+            os.unlink(path)
+        return excess
+    
     def get_data_summary(self) -> Dict[str, Any]:
         """
         Get a summary of all available data files.
@@ -197,14 +565,18 @@ class DataManager:
         
         latest_time = None
         
-        for filepath in self.data_dir.glob("*.json"):
+        # scandir lists names without a per-entry Path object
+        with os.scandir(self.data_dir) as entries:
+            json_entries = [entry for entry in entries if entry.name.endswith('.json')]
+        
+        for entry in json_entries:
             try:
-                stat = filepath.stat()
+                stat = entry.stat()
                 file_info = {
-                    'name': filepath.name,
+                    'name': entry.name,
                     'size': stat.st_size,
                     'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    'type': self._get_file_type(filepath.name)
+                    'type': self._get_file_type(entry.name)
                 }
                 summary['files'].append(file_info)
                 
@@ -212,7 +584,7 @@ class DataManager:
                     latest_time = stat.st_mtime
                     
             except Exception as e:
-                print(f"Warning: Could not read file {filepath}: {e}")
+                print(f"Warning: Could not read file {entry.path}: {e}")
         
         summary['total_files'] = len(summary['files'])
         if latest_time:
@@ -235,10 +607,10 @@ class DataManager:
     
     def cleanup_old_data(self, days: int = 30) -> int:
         """
-        Clean up old data files.
+        Clean up old data files and cache entries.
         
         Args:
-            days: Number of days to keep files
+            days: Number of days to keep files and unused cache entries
             
         Returns:
             Number of files deleted
@@ -246,16 +618,30 @@ class DataManager:
         if not self.data_dir.exists():
             return 0
         
-        cutoff_time = datetime.now().timestamp() - (days * 24 * 3600)
+        cutoff_time = time.time() - (days * 24 * 3600)
         deleted_count = 0
         
-        for filepath in self.data_dir.glob("*.json"):
+        with os.scandir(self.data_dir) as entries:
+            json_entries = [entry for entry in entries if entry.name.endswith('.json')]
+        
+        for entry in json_entries:
             try:
-                if filepath.stat().st_mtime < cutoff_time:
-                    filepath.unlink()
+                if entry.stat().st_mtime < cutoff_time:
+                    os.unlink(entry.path)
                     deleted_count += 1
             except Exception as e:
-                print(f"Warning: Could not delete file {filepath}: {e}")
+                print(f"Warning: Could not delete file {entry.path}: {e}")
+        
+        cache_root = self.data_dir / ".cache"
+        if cache_root.is_dir():
+            with os.scandir(cache_root) as entries:
+                cache_dirs = [Path(entry.path) for entry in entries if entry.is_dir()]
+            
+            for cache_dir in cache_dirs:
+                try:
+                    deleted_count += self._prune_cache(cache_dir, max_entries=None, cutoff_time=cutoff_time)
+                except Exception as e:
+                    print(f"Warning: Could not clean cache {cache_dir}: {e}")
         
         return deleted_count
     
@@ -281,26 +667,43 @@ class DataManager:
             raise ValueError(f"Unsupported export format: {format}")
     
     def _export_json(self, output_dir: Path) -> str:
-        """Export data as JSON."""
-        export_data = {
-            'export_info': {
-                'exported_at': datetime.now().isoformat(),
-                'version': '1.0.0'
-            },
-            'data_files': {}
+        """
+        Export data as JSON.
+        
+        Each data file is checked to be valid JSON and then copied into the
+        export as raw bytes, so only one file is held in memory at a time and
+        nothing is re-serialized.
+        """
+        export_info = {
+            'exported_at': now_iso(),
+            'version': '1.0.0'
         }
         
-        for filepath in self.data_dir.glob("*.json"):
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                export_data['data_files'][filepath.name] = data
-            except Exception as e:
-                print(f"Warning: Could not read file {filepath}: {e}")
+        # List the inputs before creating the output, which may share the directory
+        data_files = list(self.data_dir.glob("*.json"))
         
         output_path = output_dir / "cmdchronicle_export.json"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
+        with open(output_path, 'wb') as f:
+            f.write(b'{\n  "export_info": ')
+            f.write(dumps_json(export_info).replace(b'\n', b'\n  '))
+            f.write(b',\n  "data_files": {')
+            
+            written = 0
+            for filepath in data_files:
+                try:
+                    raw = _read_data_bytes(filepath)
+                    loads_json(raw)
+                except Exception as e:
+                    print(f"Warning: Could not read file {filepath}: {e}")
+                    continue
+                
+                # Re-indent each file to its nesting level in the document
+                f.write(b',\n    ' if written else b'\n    ')
+                f.write(dumps_json(filepath.name, indent=False) + b': ')
+                f.write(raw.strip().replace(b'\n', b'\n    '))
+                written += 1
+            
+            f.write(b'\n  }\n}' if written else b'}\n}')
         
         return str(output_path)
     
@@ -312,15 +715,16 @@ class DataManager:
         commands_file = self.data_dir / "commands.json"
         if commands_file.exists():
             try:
-                commands = self.load_commands(str(commands_file))
+                commands = self.iter_commands(str(commands_file))
+                first = next(commands, None)
                 
                 output_path = output_dir / "commands.csv"
                 with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                    if commands:
-                        fieldnames = commands[0].keys()
-                        writer = csv.DictWriter(f, fieldnames=fieldnames)
-                        writer.writeheader()
-                        writer.writerows(commands)
+                    if first is not None:
+                        fieldnames = list(first.keys())
+                        writer = csv.writer(f)
+                        writer.writerow(fieldnames)
+                        writer.writerows(_csv_rows(chain((first,), commands), fieldnames))
                 
                 return str(output_path)
             except Exception as e:
@@ -353,8 +757,7 @@ class DataManager:
             return validation
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = _load_json_file(filepath)
             validation['is_readable'] = True
             validation['is_valid_json'] = True
         except json.JSONDecodeError as e:
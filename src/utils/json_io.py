@@ -0,0 +1,76 @@
+"""
+JSON I/O
+Shared JSON encoding, decoding and metadata timestamps for the CmdChronicle tool.
+"""
+
+import json
+import time
+from functools import lru_cache
+from typing import Any, Callable, Optional
+from datetime import datetime
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps_json(data: Any, indent: bool = True, sort_keys: bool = False,
+               default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Serialize to UTF-8 JSON bytes, using orjson when available.
+    
+    Args:
+        data: Value to serialize
+        indent: Indent by two spaces (otherwise compact)
+        sort_keys: Sort object keys, e.g. for hashing
+        default: Called for values JSON cannot represent, as in json.dumps
+    
+    Returns:
+        The encoded document
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(data, default=default, option=option)
+        except TypeError:
+            # e.g. integers wider than 64 bits; the stdlib encoder copes
+            pass
+    
+    if indent:
+        text = json.dumps(data, indent=2, sort_keys=sort_keys, default=default, ensure_ascii=False)
+    else:
+        text = json.dumps(data, separators=(',', ':'), sort_keys=sort_keys, default=default,
+                          ensure_ascii=False)
+    return text.encode('utf-8')
+
+
+def loads_json(raw: Any) -> Any:
+    """
+    Parse JSON from bytes or str, using orjson when available.
+    
+    Malformed input raises json.JSONDecodeError either way.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN/Infinity, which the stdlib writes and accepts
+            pass
+    
+    return json.loads(raw)
+
+
+@lru_cache(maxsize=1)
+def _iso_second(second: int) -> str:
+    """Local ISO timestamp of a whole epoch second."""
+    return datetime.fromtimestamp(second).isoformat(timespec='seconds')
+
+
+def now_iso() -> str:
+    """Local timestamp for file and insight metadata, to whole seconds."""
+    return _iso_second(int(time.time()))
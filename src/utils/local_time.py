@@ -0,0 +1,31 @@
+"""
+Local Time
+Local hour, weekday and date of command timestamps, resolved per time slot.
+"""
+
+from datetime import datetime
+from typing import Tuple
+
+# UTC offsets and DST changes fall on quarter-hour boundaries, so every
+# timestamp in one of these slots usually shares its local time fields
+TIME_SLOT_SECONDS = 900
+
+
+def local_fields(timestamp: float) -> Tuple[int, int, int]:
+    """Return the local hour, weekday (Monday=0) and date ordinal."""
+    dt = datetime.fromtimestamp(timestamp)
+    return dt.hour, dt.weekday(), dt.toordinal()
+
+
+def slot_local_fields(slot: int) -> Tuple:
+    """
+    Local fields shared by a whole time slot, or () if they vary.
+    
+    A slot is timestamp // TIME_SLOT_SECONDS. An empty result means the slot
+    straddles an unusual offset change, so its timestamps need local_fields.
+    """
+    start = slot * TIME_SLOT_SECONDS
+    first = local_fields(start)
+    if local_fields(start + TIME_SLOT_SECONDS - 1) != first:
+        return ()
+    return first
@@ -3,25 +3,132 @@ Report Generator
 Generates comprehensive reports and visualizations from analysis results.
 """
 
+import base64
+import io
 import json
+import multiprocessing
 import os
+import pickle
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+import matplotlib
+matplotlib.use('Agg')  # Charts are only ever written to files
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+from matplotlib.figure import Figure
 import numpy as np
 import seaborn as sns
 from jinja2 import Template
 
+try:
+    from ..utils.local_time import TIME_SLOT_SECONDS, local_fields, slot_local_fields
+except ImportError:
+    # Imported as a top-level package with src/ on sys.path
+    from utils.local_time import TIME_SLOT_SECONDS, local_fields, slot_local_fields
+
+# Program name -> category for the command type chart; major tools are
+# their own category and anything unlisted counts as 'other'
+_COMMAND_CATEGORIES = {
+    **{tool: tool for tool in ('git', 'docker', 'kubectl', 'python', 'node', 'npm')},
+    **dict.fromkeys(('ls', 'cd', 'pwd', 'find', 'grep'), 'file_ops'),
+    **dict.fromkeys(('sudo', 'apt', 'brew', 'yum'), 'system'),
+    **dict.fromkeys(('ssh', 'scp', 'curl', 'wget'), 'network'),
+}
+
+# Resolution of the saved charts; the report shows them at screen size
+_FIGURE_DPI = 150
+
+# Fast zlib level for the chart PNGs: images grow about a third but encode
+# noticeably quicker. tight_layout already fits each figure, so savefig
+# skips the extra measuring pass of bbox_inches='tight'.
+_PNG_OPTIONS = {'compress_level': 1}
+
+def _local_time_fields(timestamps: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Local hour, weekday and date ordinal arrays for an array of timestamps.
+    
+    Local time depends on the time zone rules, so datetime resolves one
+    representative per distinct time slot and NumPy broadcasts the result;
+    slots that straddle an unusual offset change are resolved per timestamp.
+    """
+    slots = np.floor_divide(timestamps, TIME_SLOT_SECONDS).astype(np.int64)
+    unique_slots, inverse = np.unique(slots, return_inverse=True)
+    
+    slot_fields = np.zeros((len(unique_slots), 3), dtype=np.int64)
+    straddling = []
+    for i, slot in enumerate(unique_slots.tolist()):
+        fields = slot_local_fields(slot)
+        if fields:
+            slot_fields[i] = fields
+        else:
+            straddling.append(i)
+    
+    fields = slot_fields[inverse]
+    if straddling:
+        for j in np.flatnonzero(np.isin(inverse, straddling)).tolist():
+            fields[j] = local_fields(timestamps[j].item())
+    
+    return fields[:, 0], fields[:, 1], fields[:, 2]
+
+
+# Chart style and palette, resolved once at import and reapplied from here
+_STYLE_RCPARAMS = dict(plt.style.library['seaborn-v0_8'])
+_PALETTE = sns.color_palette("husl")
+
+
+def _apply_style():
+    """Set the matplotlib style and palette used by every chart."""
+    plt.rcParams.update(_STYLE_RCPARAMS)
+    sns.set_palette(_PALETTE)
+
+
+@dataclass
+class _CommandColumns:
+    """Per-command fields of a report, one column each, in input order."""
+    commands: List[str]
+    unique_commands: List[str]    # in order of first appearance
+    unique_word_counts: List[int]
+    unique_flag_counts: List[int]
+    command_index: np.ndarray     # position of each command in unique_commands
+    command_counts: np.ndarray    # occurrences of each unique command
+    timestamps: np.ndarray        # 0 where a command has no timestamp
+    has_timestamp: np.ndarray     # False where a command has no timestamp
+    automation_scores: np.ndarray
+
+
+def _word_and_flag_counts(command: str) -> Tuple[int, int]:
+    """Count the words of a command and those that are flags (start with -)."""
+    words = command.split()
+    return len(words), len([word for word in words if word[0] == '-'])
+
+
+def _figure_data_uri(fig: Figure) -> str:
+    """Encode a finished figure as a PNG data URI for the HTML report."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=_FIGURE_DPI, pil_kwargs=_PNG_OPTIONS)
+    return 'data:image/png;base64,' + base64.b64encode(buffer.getbuffer()).decode('ascii')
+
+
+def _render_chart(payload: bytes, chart: str) -> str:
+    """Draw one chart in a worker process from a pickled (generator, commands) pair."""
+    generator, commands_data = pickle.loads(payload)
+    return getattr(generator, chart)(commands_data)
+
 
 class ReportGenerator:
     """Generates comprehensive reports and visualizations."""
     
+    # Compiled HTML report template, shared by every generator
+    _report_template = None
+    
     def __init__(self):
         # Set style for matplotlib
-        plt.style.use('seaborn-v0_8')
-        sns.set_palette("husl")
+        _apply_style()
         
         # Color schemes
         self.colors = {
@@ -32,6 +139,10 @@ class ReportGenerator:
             'danger': '#f5576c',
             'info': '#00f2fe'
         }
+        
+        # Columns of the commands being reported on, shared by the charts
+        # and statistics while generate_report runs
+        self._columns_cache = None
     
     def generate_report(self, commands_data: List[Dict[str, Any]], 
                        insights_data: Dict[str, Any], output_dir: str) -> str:
@@ -49,56 +160,86 @@ class ReportGenerator:
         # Create output directory if it doesn't exist
         Path(output_dir).mkdir(parents=True, exist_ok=True)
         
-        # Generate visualizations
-        viz_paths = self._generate_visualizations(commands_data, insights_data, output_dir)
+        # Nothing to chart or measure: write the report shell straight away
+        if not commands_data:
+            return self._generate_comprehensive_report(commands_data, insights_data, {}, output_dir)
         
-        # Generate comprehensive report
-        report_path = self._generate_comprehensive_report(
-            commands_data, insights_data, viz_paths, output_dir
-        )
+        # Read and score every command once for all the charts and statistics
+        self._columns_cache = self._command_columns(commands_data)
+        try:
+            # Generate visualizations
+            viz_data = self._generate_visualizations(commands_data, insights_data)
+            
+            # Generate comprehensive report
+            report_path = self._generate_comprehensive_report(
+                commands_data, insights_data, viz_data, output_dir
+            )
+        finally:
+            self._columns_cache = None
         
         return report_path
     
     def _generate_visualizations(self, commands_data: List[Dict[str, Any]], 
-                               insights_data: Dict[str, Any], output_dir: str) -> Dict[str, str]:
-        """Generate all visualizations for the report."""
-        viz_paths = {}
-        
-        # Time-based analysis
-        viz_paths['time_analysis'] = self._generate_time_analysis(commands_data, output_dir)
-        
-        # Command complexity analysis
-        viz_paths['complexity_analysis'] = self._generate_complexity_analysis(commands_data, output_dir)
-        
-        # Workflow patterns
-        viz_paths['workflow_patterns'] = self._generate_workflow_patterns(commands_data, output_dir)
-        
-        # Automation opportunities
-        viz_paths['automation_opportunities'] = self._generate_automation_chart(commands_data, output_dir)
-        
-        # Skill progression
-        viz_paths['skill_progression'] = self._generate_skill_progression(commands_data, output_dir)
+                               insights_data: Dict[str, Any]) -> Dict[str, str]:
+        """Generate all visualizations for the report as PNG data URIs."""
+        charts = {
+            'time_analysis': '_generate_time_analysis',
+            'complexity_analysis': '_generate_complexity_analysis',
+            'workflow_patterns': '_generate_workflow_patterns',
+            'automation_opportunities': '_generate_automation_chart',
+            'skill_progression': '_generate_skill_progression'
+        }
         
-        return viz_paths
+        # The charts share no state and are CPU-bound rendering and PNG
+        # encoding, so with more than one core each gets its own process
+        workers = min(len(charts), os.cpu_count() or 1)
+        viz_data = None
+        if workers > 1:
+            try:
+                viz_data = self._render_charts_in_processes(charts, commands_data, workers)
+            except (OSError, BrokenProcessPool) as e:
+                print(f"Warning: Could not render charts in parallel: {e}")
+        
+        if viz_data is None:
+            viz_data = {name: getattr(self, chart)(commands_data) for name, chart in charts.items()}
+        
+        # Charts with too little data to draw are left out of the report
+        return {name: uri for name, uri in viz_data.items() if uri}
+    
+    def _render_charts_in_processes(self, charts: Dict[str, str], commands_data: List[Dict[str, Any]],
+                                    workers: int) -> Dict[str, str]:
+        """Render each chart in a pool of worker processes."""
+        # Pickle the inputs once rather than once per submitted chart
+        payload = pickle.dumps((self, commands_data), protocol=pickle.HIGHEST_PROTOCOL)
+        
+        # Spawned workers do not inherit the locks of the caller's threads;
+        # the initializer gives them the same matplotlib style
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                 initializer=_apply_style) as executor:
+            futures = {name: executor.submit(_render_chart, payload, chart)
+                       for name, chart in charts.items()}
+            return {name: future.result() for name, future in futures.items()}
     
-    def _generate_time_analysis(self, commands_data: List[Dict[str, Any]], output_dir: str) -> str:
+    def _generate_time_analysis(self, commands_data: List[Dict[str, Any]]) -> str:
         """Generate time-based analysis visualizations."""
         if not commands_data:
             return ""
         
         # Extract timestamps
-        timestamps = [cmd.get('timestamp', 0) for cmd in commands_data if 'timestamp' in cmd]
-        if not timestamps:
+        columns = self._command_columns(commands_data)
+        timestamps = columns.timestamps[columns.has_timestamp]
+        if not timestamps.size:
             return ""
         
-        # Convert to datetime objects
-        dates = [datetime.fromtimestamp(ts) for ts in timestamps]
+        # Local hour, weekday and date for every timestamp at once
+        hours, weekdays, day_ordinals = _local_time_fields(timestamps)
         
         # Create figure with subplots
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
+        fig = Figure(figsize=(15, 12))
+        (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
         
         # 1. Hourly distribution
-        hours = [d.hour for d in dates]
         hour_counts = np.bincount(hours, minlength=24)
         ax1.bar(range(24), hour_counts, color=self.colors['primary'], alpha=0.7)
         ax1.set_xlabel('Hour of Day')
@@ -107,13 +248,8 @@ class ReportGenerator:
         ax1.set_xticks(range(0, 24, 2))
         
         # 2. Daily distribution
-        days = [d.strftime('%A') for d in dates]
-        day_counts = {}
-        for day in days:
-            day_counts[day] = day_counts.get(day, 0) + 1
-        
         day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        day_values = [day_counts.get(day, 0) for day in day_order]
+        day_values = np.bincount(weekdays, minlength=7).tolist()
         
         ax2.bar(day_order, day_values, color=self.colors['secondary'], alpha=0.7)
         ax2.set_xlabel('Day of Week')
@@ -121,29 +257,10 @@ class ReportGenerator:
         ax2.set_title('Command Activity by Day')
         ax2.tick_params(axis='x', rotation=45)
         
-        # 3. Command frequency over time
-        sorted_dates = sorted(dates)
-        command_counts = []
-        time_points = []
-        
-        # Group by day
-        current_date = None
-        current_count = 0
-        
-        for date in sorted_dates:
-            date_str = date.strftime('%Y-%m-%d')
-            if date_str != current_date:
-                if current_date:
-                    time_points.append(current_date)
-                    command_counts.append(current_count)
-                current_date = date_str
-                current_count = 1
-            else:
-                current_count += 1
-        
-        if current_date:
-            time_points.append(current_date)
-            command_counts.append(current_count)
+        # 3. Command frequency over time, grouped by local day
+        unique_days, day_totals = np.unique(day_ordinals, return_counts=True)
+        time_points = [datetime.fromordinal(day).strftime('%Y-%m-%d') for day in unique_days.tolist()]
+        command_counts = day_totals.tolist()
         
         if time_points:
             ax3.plot(range(len(time_points)), command_counts, 
@@ -155,13 +272,9 @@ class ReportGenerator:
             ax3.set_xticklabels([time_points[i] for i in range(0, len(time_points), max(1, len(time_points)//5))], rotation=45)
         
         # 4. Activity heatmap
-        activity_matrix = np.zeros((7, 24))
-        for date in dates:
-            day_idx = date.weekday()
-            hour_idx = date.hour
-            activity_matrix[day_idx, hour_idx] += 1
+        activity_matrix = np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(7, 24)
         
-        im = ax4.imshow(activity_matrix, cmap='YlOrRd', aspect='auto')
+        im = ax4.imshow(activity_matrix, cmap='YlOrRd', aspect='auto', interpolation='none')
         ax4.set_xlabel('Hour of Day')
         ax4.set_ylabel('Day of Week')
         ax4.set_title('Activity Heatmap')
@@ -169,39 +282,27 @@ class ReportGenerator:
         ax4.set_yticks(range(7))
         ax4.set_yticklabels(['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun'])
         
-        plt.colorbar(im, ax=ax4, label='Number of Commands')
-        
-        plt.tight_layout()
+        fig.colorbar(im, ax=ax4, label='Number of Commands')
         
-        # Save the visualization
-        output_path = Path(output_dir) / "time_analysis.png"
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
         
-        return str(output_path)
+        # Encode the visualization for embedding in the report
+        return _figure_data_uri(fig)
     
-    def _generate_complexity_analysis(self, commands_data: List[Dict[str, Any]], output_dir: str) -> str:
+    def _generate_complexity_analysis(self, commands_data: List[Dict[str, Any]]) -> str:
         """Generate command complexity analysis."""
         if not commands_data:
             return ""
         
-        # Analyze command complexity
-        complexities = []
-        word_counts = []
-        flag_counts = []
+        # Analyze command complexity once per distinct command
+        columns = self._command_columns(commands_data)
+        unique_complexities = []
         
-        for cmd in commands_data:
-            command = cmd.get('command', '')
-            words = command.split()
-            
-            # Word count
-            word_count = len(words)
-            word_counts.append(word_count)
-            
-            # Flag count (arguments starting with - or --)
-            flags = sum(1 for word in words if word.startswith('-'))
-            flag_counts.append(flags)
-            
+        # Word and flag (arguments starting with - or --) counts were taken
+        # when the commands were split into columns
+        for command, word_count, flags in zip(columns.unique_commands,
+                                              columns.unique_word_counts,
+                                              columns.unique_flag_counts):
             # Complexity score (simple heuristic)
             complexity = word_count + flags * 2
             if '|' in command:
@@ -211,10 +312,16 @@ class ReportGenerator:
             if '&&' in command or '||' in command:
                 complexity += 4  # Logical operators add complexity
             
-            complexities.append(complexity)
+            unique_complexities.append(complexity)
+        
+        # Expand to one value per command for the distributions
+        complexities = np.asarray(unique_complexities)[columns.command_index]
+        word_counts = np.asarray(columns.unique_word_counts)[columns.command_index]
+        flag_counts = np.asarray(columns.unique_flag_counts)[columns.command_index]
         
         # Create visualization
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
+        fig = Figure(figsize=(15, 12))
+        (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
         
         # 1. Complexity distribution
         ax1.hist(complexities, bins=20, color=self.colors['primary'], alpha=0.7, edgecolor='black')
@@ -241,69 +348,44 @@ class ReportGenerator:
         ax3.set_title('Command Flag Usage')
         
         # 4. Complexity vs frequency scatter
-        command_freq = {}
-        for cmd in commands_data:
-            command = cmd.get('command', '')
-            command_freq[command] = command_freq.get(command, 0) + 1
-        
-        # Get complexity for unique commands
-        unique_commands = list(command_freq.keys())
-        unique_complexities = []
-        unique_frequencies = []
-        
-        for cmd in unique_commands:
-            words = cmd.split()
-            word_count = len(words)
-            flags = sum(1 for word in words if word.startswith('-'))
-            complexity = word_count + flags * 2
-            if '|' in cmd:
-                complexity += 3
-            if '>' in cmd or '<' in cmd:
-                complexity += 2
-            if '&&' in cmd or '||' in cmd:
-                complexity += 4
-            
-            unique_complexities.append(complexity)
-            unique_frequencies.append(command_freq[cmd])
+        unique_frequencies = columns.command_counts
         
         ax4.scatter(unique_complexities, unique_frequencies, alpha=0.6, color=self.colors['warning'])
         ax4.set_xlabel('Command Complexity')
         ax4.set_ylabel('Frequency')
         ax4.set_title('Complexity vs Frequency')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
-        # Save the visualization
-        output_path = Path(output_dir) / "complexity_analysis.png"
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        return str(output_path)
+        # Encode the visualization for embedding in the report
+        return _figure_data_uri(fig)
     
-    def _generate_workflow_patterns(self, commands_data: List[Dict[str, Any]], output_dir: str) -> str:
+    def _generate_workflow_patterns(self, commands_data: List[Dict[str, Any]]) -> str:
         """Generate workflow pattern analysis."""
         if not commands_data:
             return ""
         
-        # Analyze command sequences
-        sequences = []
-        for i in range(len(commands_data) - 1):
-            seq = f"{commands_data[i]['command']} → {commands_data[i+1]['command']}"
-            sequences.append(seq)
-        
-        # Count sequence frequencies
-        sequence_counts = {}
-        for seq in sequences:
-            sequence_counts[seq] = sequence_counts.get(seq, 0) + 1
-        
-        # Get top sequences
-        top_sequences = sorted(sequence_counts.items(), key=lambda x: x[1], reverse=True)[:10]
+        # Count adjacent command pairs; labels are only built for the top ten
+        columns = self._command_columns(commands_data)
+        commands = columns.commands
+        pair_counts = Counter(zip(commands, commands[1:]))
+        
+        if any('→' in command for command in set(commands)):
+            # Different pairs can render to the same label; count by label
+            sequence_counts = Counter()
+            for (first, second), count in pair_counts.items():
+                sequence_counts[f"{first} → {second}"] += count
+            top_sequences = sequence_counts.most_common(10)
+        else:
+            top_sequences = [(f"{first} → {second}", count)
+                             for (first, second), count in pair_counts.most_common(10)]
         
         if not top_sequences:
             return ""
         
         # Create visualization
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
+        fig = Figure(figsize=(16, 8))
+        ax1, ax2 = fig.subplots(1, 2)
         
         # 1. Top command sequences
         sequences, counts = zip(*top_sequences)
@@ -322,24 +404,11 @@ class ReportGenerator:
                     str(count), ha='left', va='center', fontweight='bold')
         
         # 2. Command type analysis
-        command_types = {}
-        for cmd in commands_data:
-            command = cmd.get('command', '')
-            base_cmd = command.split()[0] if command.split() else ''
-            
-            # Categorize commands
-            if base_cmd in ['git', 'docker', 'kubectl', 'python', 'node', 'npm']:
-                category = base_cmd
-            elif base_cmd in ['ls', 'cd', 'pwd', 'find', 'grep']:
-                category = 'file_ops'
-            elif base_cmd in ['sudo', 'apt', 'brew', 'yum']:
-                category = 'system'
-            elif base_cmd in ['ssh', 'scp', 'curl', 'wget']:
-                category = 'network'
-            else:
-                category = 'other'
-            
-            command_types[category] = command_types.get(category, 0) + 1
+        command_types = Counter()
+        for command, count in zip(columns.unique_commands, columns.command_counts.tolist()):
+            # Split once: only the program name is needed
+            base_cmd = (command.split(None, 1) or [''])[0]
+            command_types[_COMMAND_CATEGORIES.get(base_cmd, 'other')] += count
         
         if command_types:
             categories, type_counts = zip(*command_types.items())
@@ -349,32 +418,24 @@ class ReportGenerator:
                                               autopct='%1.1f%%', startangle=90)
             ax2.set_title('Command Type Distribution')
         
-        plt.tight_layout()
-        
-        # Save the visualization
-        output_path = Path(output_dir) / "workflow_patterns.png"
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
         
-        return str(output_path)
+        # Encode the visualization for embedding in the report
+        return _figure_data_uri(fig)
     
-    def _generate_automation_chart(self, commands_data: List[Dict[str, Any]], output_dir: str) -> str:
+    def _generate_automation_chart(self, commands_data: List[Dict[str, Any]]) -> str:
         """Generate automation opportunities chart."""
         if not commands_data:
             return ""
         
         # Analyze automation potential
-        automation_scores = []
-        command_texts = []
-        
-        for cmd in commands_data:
-            command = cmd.get('command', '')
-            score = self._calculate_automation_score(command)
-            automation_scores.append(score)
-            command_texts.append(command)
+        columns = self._command_columns(commands_data)
+        automation_scores = columns.automation_scores
+        command_texts = columns.commands
         
         # Create visualization
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
+        fig = Figure(figsize=(16, 8))
+        ax1, ax2 = fig.subplots(1, 2)
         
         # 1. Automation score distribution
         ax1.hist(automation_scores, bins=20, color=self.colors['warning'], alpha=0.7, edgecolor='black')
@@ -386,7 +447,7 @@ class ReportGenerator:
         
         # 2. Top automation candidates
         # Create list of (command, score) tuples
-        command_scores = list(zip(command_texts, automation_scores))
+        command_scores = list(zip(command_texts, automation_scores.tolist()))
         command_scores.sort(key=lambda x: x[1], reverse=True)
         
         top_candidates = command_scores[:10]
@@ -405,26 +466,59 @@ class ReportGenerator:
             ax2.text(bar.get_width() + 0.01, bar.get_y() + bar.get_height()/2, 
                     f'{score:.2f}', ha='left', va='center', fontweight='bold')
         
-        plt.tight_layout()
-        
-        # Save the visualization
-        output_path = Path(output_dir) / "automation_opportunities.png"
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
         
-        return str(output_path)
+        # Encode the visualization for embedding in the report
+        return _figure_data_uri(fig)
+    
+    def _command_columns(self, commands_data: List[Dict[str, Any]]) -> _CommandColumns:
+        """Split the command dictionaries into columns, unless generate_report already has."""
+        if self._columns_cache is not None:
+            return self._columns_cache
+        
+        commands = [cmd.get('command', '') for cmd in commands_data]
+        
+        # Histories repeat the same commands heavily, so per-command features
+        # are computed for each distinct command and gathered back by index
+        positions = {command: i for i, command in enumerate(dict.fromkeys(commands))}
+        command_index = np.fromiter(map(positions.__getitem__, commands),
+                                    dtype=np.intp, count=len(commands))
+        
+        # Each distinct command is split once for both the scores and the
+        # complexity chart
+        word_and_flag_counts = list(map(_word_and_flag_counts, positions))
+        unique_scores = np.fromiter(map(self._calculate_automation_score, positions, word_and_flag_counts),
+                                    dtype=float, count=len(positions))
+        word_counts, flag_counts = zip(*word_and_flag_counts) if positions else ((), ())
+        
+        return _CommandColumns(
+            commands=commands,
+            unique_commands=list(positions),
+            unique_word_counts=list(word_counts),
+            unique_flag_counts=list(flag_counts),
+            command_index=command_index,
+            command_counts=np.bincount(command_index, minlength=len(positions)),
+            timestamps=np.asarray([cmd.get('timestamp', 0) for cmd in commands_data]),
+            has_timestamp=np.fromiter(('timestamp' in cmd for cmd in commands_data),
+                                      dtype=bool, count=len(commands_data)),
+            automation_scores=unique_scores[command_index]
+        )
     
-    def _calculate_automation_score(self, command: str) -> float:
+    def _calculate_automation_score(self, command: str,
+                                    word_and_flag_counts: Optional[Tuple[int, int]] = None) -> float:
         """Calculate automation potential score for a command."""
         score = 0.0
         
+        # Callers that already split the command pass its counts
+        if word_and_flag_counts is None:
+            word_and_flag_counts = _word_and_flag_counts(command)
+        word_count, flags = word_and_flag_counts
+        
         # Length factor
-        words = command.split()
-        if len(words) > 3:
+        if word_count > 3:
             score += 0.2
         
         # Flag factor
-        flags = sum(1 for word in words if word.startswith('-'))
         score += flags * 0.1
         
         # Complexity factors
@@ -436,51 +530,49 @@ class ReportGenerator:
             score += 0.4
         
         # File operations
-        if any(word in command.lower() for word in ['find', 'grep', 'sed', 'awk']):
+        lowered = command.lower()
+        if 'find' in lowered or 'grep' in lowered or 'sed' in lowered or 'awk' in lowered:
             score += 0.3
         
         return min(score, 1.0)
     
-    def _generate_skill_progression(self, commands_data: List[Dict[str, Any]], output_dir: str) -> str:
+    def _generate_skill_progression(self, commands_data: List[Dict[str, Any]]) -> str:
         """Generate skill progression analysis."""
         if not commands_data:
             return ""
         
-        # Sort commands by timestamp
-        sorted_commands = sorted(commands_data, key=lambda x: x.get('timestamp', 0))
+        # Sort commands by timestamp, keeping their scores alongside
+        columns = self._command_columns(commands_data)
+        order = np.argsort(columns.timestamps, kind='stable')
+        sorted_timestamps = columns.timestamps[order]
+        sorted_scores = columns.automation_scores[order]
+        sorted_index = columns.command_index[order]
         
         # Calculate skill progression over time
-        skill_scores = []
-        time_points = []
-        
-        window_size = max(1, len(sorted_commands) // 20)  # 20 data points
+        total = len(order)
+        window_size = max(1, total // 20)  # 20 data points
+        window_starts = np.arange(0, total, window_size)
+        window_lengths = np.minimum(window_size, total - window_starts)
+        
+        # Average complexity of every whole window in one reduction, then of
+        # the shorter last window if there is one
+        whole_windows = total // window_size
+        skill_scores = list(
+            sorted_scores[:whole_windows * window_size].reshape(whole_windows, window_size).mean(axis=1)
+        )
+        if total % window_size:
+            skill_scores.append(np.mean(sorted_scores[whole_windows * window_size:]))
         
-        for i in range(0, len(sorted_commands), window_size):
-            window = sorted_commands[i:i+window_size]
-            if not window:
-                continue
-            
-            # Calculate average complexity for this window
-            complexities = []
-            for cmd in window:
-                command = cmd.get('command', '')
-                complexity = self._calculate_automation_score(command)
-                complexities.append(complexity)
-            
-            avg_complexity = np.mean(complexities)
-            skill_scores.append(avg_complexity)
-            
-            # Use timestamp from middle of window
-            mid_idx = i + len(window) // 2
-            if mid_idx < len(sorted_commands):
-                timestamp = sorted_commands[mid_idx].get('timestamp', 0)
-                time_points.append(datetime.fromtimestamp(timestamp))
+        # Use timestamp from middle of window
+        time_points = [datetime.fromtimestamp(timestamp)
+                       for timestamp in sorted_timestamps[window_starts + window_lengths // 2].tolist()]
         
         if len(skill_scores) < 2:
             return ""
         
         # Create visualization
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(16, 8))
+        fig = Figure(figsize=(16, 8))
+        ax1, ax2 = fig.subplots(1, 2)
         
         # 1. Skill progression over time
         ax1.plot(range(len(skill_scores)), skill_scores, 
@@ -498,17 +590,12 @@ class ReportGenerator:
                     "r--", alpha=0.8, label=f'Trend: {"+" if z[0] > 0 else ""}{z[0]:.3f}x')
             ax1.legend()
         
-        # 2. Command diversity over time
-        diversity_scores = []
-        for i in range(0, len(sorted_commands), window_size):
-            window = sorted_commands[i:i+window_size]
-            if not window:
-                continue
-            
-            unique_commands = len(set(cmd.get('command', '') for cmd in window))
-            total_commands = len(window)
-            diversity = unique_commands / total_commands if total_commands > 0 else 0
-            diversity_scores.append(diversity)
+        # 2. Command diversity over time: distinct (window, command) pairs,
+        # counted per window
+        distinct_count = len(columns.unique_commands)
+        window_pairs = np.unique(np.arange(total) // window_size * distinct_count + sorted_index)
+        unique_per_window = np.bincount(window_pairs // distinct_count, minlength=len(window_starts))
+        diversity_scores = (unique_per_window / window_lengths).tolist()
         
         if diversity_scores:
             ax2.plot(range(len(diversity_scores)), diversity_scores, 
@@ -518,28 +605,24 @@ class ReportGenerator:
             ax2.set_title('Command Diversity Over Time')
             ax2.grid(True, alpha=0.3)
         
-        plt.tight_layout()
-        
-        # Save the visualization
-        output_path = Path(output_dir) / "skill_progression.png"
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.tight_layout()
         
-        return str(output_path)
+        # Encode the visualization for embedding in the report
+        return _figure_data_uri(fig)
     
     def _generate_comprehensive_report(self, commands_data: List[Dict[str, Any]], 
                                      insights_data: Dict[str, Any], 
-                                     viz_paths: Dict[str, str], output_dir: str) -> str:
+                                     viz_data: Dict[str, str], output_dir: str) -> str:
         """Generate a comprehensive HTML report."""
         
         # Calculate additional statistics
         stats = self._calculate_detailed_statistics(commands_data, insights_data)
         
-        # Create HTML content
-        html_content = self._get_report_template().render(
+        # Render the HTML straight into the file, chunk by chunk
+        html_stream = self._get_report_template().stream(
             commands_data=commands_data,
             insights_data=insights_data,
-            viz_paths=viz_paths,
+            viz_data=viz_data,
             stats=stats,
             generated_at=datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         )
@@ -547,7 +630,7 @@ class ReportGenerator:
         # Save HTML file
         output_path = Path(output_dir) / "comprehensive_report.html"
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+            html_stream.dump(f)
         
         return str(output_path)
     
@@ -557,21 +640,21 @@ class ReportGenerator:
         if not commands_data:
             return {}
         
+        columns = self._command_columns(commands_data)
         total_commands = len(commands_data)
-        unique_commands = len(set(cmd['command'] for cmd in commands_data))
+        unique_commands = len(columns.unique_commands)
         
         # Command complexity analysis
-        complexities = []
-        for cmd in commands_data:
-            command = cmd.get('command', '')
-            complexity = self._calculate_automation_score(command)
-            complexities.append(complexity)
+        complexities = columns.automation_scores
         
         # Time analysis
-        timestamps = [cmd.get('timestamp', 0) for cmd in commands_data if 'timestamp' in cmd]
-        if timestamps:
-            dates = [datetime.fromtimestamp(ts) for ts in timestamps]
-            time_span = max(dates) - min(dates)
+        timestamps = columns.timestamps[columns.has_timestamp]
+        if timestamps.size:
+            # Local time can step back at offset changes, so the extremes are
+            # taken over every timestamp within a day of the numeric ones
+            latest = timestamps[timestamps >= timestamps.max() - 86400].tolist()
+            earliest = timestamps[timestamps <= timestamps.min() + 86400].tolist()
+            time_span = max(map(datetime.fromtimestamp, latest)) - min(map(datetime.fromtimestamp, earliest))
             avg_commands_per_day = total_commands / max(1, time_span.days)
         else:
             time_span = None
@@ -584,18 +667,21 @@ class ReportGenerator:
             'total_commands': total_commands,
             'unique_commands': unique_commands,
             'command_diversity': unique_commands / total_commands if total_commands > 0 else 0,
-            'avg_complexity': np.mean(complexities) if complexities else 0,
-            'max_complexity': max(complexities) if complexities else 0,
+            'avg_complexity': np.mean(complexities),
+            'max_complexity': float(complexities.max()),
             'time_span': time_span,
             'avg_commands_per_day': avg_commands_per_day,
             'top_tools': tool_usage,
-            'automation_opportunities': len([c for c in complexities if c > 0.5]),
+            'automation_opportunities': int(np.count_nonzero(complexities > 0.5)),
             'skill_level': insights_data.get('skill_level', 'Unknown'),
             'workflow_type': insights_data.get('workflow_type', 'Unknown')
         }
     
     def _get_report_template(self) -> Template:
-        """Get the HTML report template."""
+        """Get the HTML report template, compiling it on first use."""
+        if ReportGenerator._report_template is not None:
+            return ReportGenerator._report_template
+        
         template_str = """
 <!DOCTYPE html>
 <html lang="en">
@@ -733,6 +819,7 @@ class ReportGenerator:
         
         <div class="section">
             <h2>📈 Executive Summary</h2>
+            {% if stats %}
             <div class="stats-grid">
                 <div class="stat-card">
                     <div class="stat-number">{{ stats.total_commands }}</div>
@@ -761,21 +848,24 @@ class ReportGenerator:
                     <li><strong>Commands per Day:</strong> {{ "%.1f"|format(stats.avg_commands_per_day) }}</li>
                 </ul>
             </div>
+            {% else %}
+            <p>No commands were available to analyze.</p>
+            {% endif %}
         </div>
         
         <div class="section">
             <h2>🕒 Time Analysis</h2>
             <div class="viz-container">
-                {% if viz_paths.time_analysis %}
+                {% if viz_data.time_analysis %}
                 <div class="viz-card">
                     <h3>Time-based Patterns</h3>
-                    <img src="{{ viz_paths.time_analysis.split('/')[-1] }}" alt="Time Analysis">
+                    <img src="{{ viz_data.time_analysis }}" alt="Time Analysis">
                 </div>
                 {% endif %}
-                {% if viz_paths.skill_progression %}
+                {% if viz_data.skill_progression %}
                 <div class="viz-card">
                     <h3>Skill Progression</h3>
-                    <img src="{{ viz_paths.skill_progression.split('/')[-1] }}" alt="Skill Progression">
+                    <img src="{{ viz_data.skill_progression }}" alt="Skill Progression">
                 </div>
                 {% endif %}
             </div>
@@ -784,16 +874,16 @@ class ReportGenerator:
         <div class="section">
             <h2>🧠 Command Analysis</h2>
             <div class="viz-container">
-                {% if viz_paths.complexity_analysis %}
+                {% if viz_data.complexity_analysis %}
                 <div class="viz-card">
                     <h3>Command Complexity</h3>
-                    <img src="{{ viz_paths.complexity_analysis.split('/')[-1] }}" alt="Complexity Analysis">
+                    <img src="{{ viz_data.complexity_analysis }}" alt="Complexity Analysis">
                 </div>
                 {% endif %}
-                {% if viz_paths.workflow_patterns %}
+                {% if viz_data.workflow_patterns %}
                 <div class="viz-card">
                     <h3>Workflow Patterns</h3>
-                    <img src="{{ viz_paths.workflow_patterns.split('/')[-1] }}" alt="Workflow Patterns">
+                    <img src="{{ viz_data.workflow_patterns }}" alt="Workflow Patterns">
                 </div>
                 {% endif %}
             </div>
@@ -802,10 +892,10 @@ class ReportGenerator:
         <div class="section">
             <h2>🤖 Automation Opportunities</h2>
             <div class="viz-container">
-                {% if viz_paths.automation_opportunities %}
+                {% if viz_data.automation_opportunities %}
                 <div class="viz-card">
                     <h3>Automation Potential</h3>
-                    <img src="{{ viz_paths.automation_opportunities.split('/')[-1] }}" alt="Automation Opportunities">
+                    <img src="{{ viz_data.automation_opportunities }}" alt="Automation Opportunities">
                 </div>
                 {% endif %}
             </div>
@@ -849,4 +939,5 @@ class ReportGenerator:
 </body>
 </html>
 """
-        return Template(template_str) 
\ No newline at end of file
+        ReportGenerator._report_template = Template(template_str)
+        return ReportGenerator._report_template
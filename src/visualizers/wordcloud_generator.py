@@ -3,70 +3,149 @@ Word Cloud Generator
 Creates word clouds and visualizations from command history data.
 """
 
+import functools
+import hashlib
+import json
+import math
 import os
 import re
 from collections import Counter
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Iterable, Optional
 from pathlib import Path
-import matplotlib.pyplot as plt
+import matplotlib
+matplotlib.use('Agg')  # Charts are only ever written to files
 import matplotlib.patches as patches
+from matplotlib.figure import Figure
 from wordcloud import WordCloud
 import numpy as np
 from PIL import Image, ImageDraw, ImageFont
+from jinja2 import Template
+
+# Words in a command, matched once per command rather than compiled per call
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Common English words left out of the word cloud
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+    'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those',
+    'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them',
+    'my', 'your', 'his', 'her', 'its', 'our', 'their', 'mine', 'yours', 'his', 'hers',
+    'ours', 'theirs', 'what', 'which', 'who', 'whom', 'whose', 'where', 'when', 'why',
+    'how', 'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such',
+    'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 's', 't',
+    'can', 'will', 'just', 'don', 'should', 'now', 'd', 'll', 'm', 'o', 're', 've', 'y',
+    'ain', 'aren', 'couldn', 'didn', 'doesn', 'hadn', 'hasn', 'haven', 'isn', 'ma', 'mightn',
+    'mustn', 'needn', 'shan', 'shouldn', 'wasn', 'weren', 'won', 'wouldn'
+})
+
+# Shell builtins, everyday tools and operators left out of the word cloud
+_COMMAND_STOP_WORDS = frozenset({
+    'ls', 'cd', 'pwd', 'echo', 'cat', 'grep', 'find', 'cp', 'mv', 'rm',
+    'mkdir', 'touch', 'chmod', 'chown', 'sudo', 'git', 'docker', 'kubectl',
+    'python', 'node', 'npm', 'yarn', 'pip', 'conda', 'ssh', 'scp', 'rsync',
+    'curl', 'wget', 'ping', 'telnet', 'netstat', 'ps', 'top', 'htop', 'df',
+    'du', 'free', 'uptime', 'who', 'w', 'last', 'history', 'clear', 'exit',
+    'logout', 'source', 'export', 'alias', 'unalias', 'function', 'if', 'then',
+    'else', 'fi', 'for', 'while', 'do', 'done', 'case', 'esac', 'select',
+    'until', 'break', 'continue', 'return', 'shift', 'set', 'unset', 'read',
+    'printf', 'test', '[', ']', '[[', ']]', '(', ')', '{', '}', ';', '&', '|',
+    '&&', '||', '>', '<', '>>', '<<', '2>', '2>>', '&>', '&>>', '|&'
+})
+
+# Both stop-word sets merged, so each word needs a single lookup
+_ALL_STOP_WORDS = _STOP_WORDS | _COMMAND_STOP_WORDS
+
+# Resolution of the saved charts; the page shows them at screen size
+_FIGURE_DPI = 150
+
+# Records which commands the charts in an output directory were drawn from.
+# Bump the version when chart drawing changes so existing charts are redrawn.
+_CHARTS_MANIFEST = '.commemorative_charts.json'
+_CHARTS_VERSION = 2
+
+# Tool categories for the usage chart and the programs that belong to them
+_TOOL_CATEGORIES = {
+    'git': ('git',),
+    'docker': ('docker',),
+    'kubernetes': ('kubectl', 'k8s'),
+    'python': ('python', 'pip', 'conda'),
+    'node': ('node', 'npm', 'yarn'),
+    'system': ('sudo', 'apt', 'brew', 'yum'),
+    'development': ('vim', 'code', 'subl'),
+    'monitoring': ('top', 'htop', 'ps', 'df'),
+    'network': ('ssh', 'scp', 'curl', 'wget'),
+    'database': ('mysql', 'psql', 'sqlite'),
+}
+
+# Program name -> tool category, for a single lookup per command
+_TOOL_CATEGORY_BY_PROGRAM = {
+    program: category for category, programs in _TOOL_CATEGORIES.items() for program in programs
+}
+
+
+@functools.lru_cache(maxsize=1)
+def _find_font_path() -> str:
+    """Find a font for the word cloud, probing the filesystem only once."""
+    # Try to find a good font
+    font_paths = [
+        '/System/Library/Fonts/Helvetica.ttc',  # macOS
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',  # Linux
+        'C:/Windows/Fonts/arial.ttf',  # Windows
+    ]
+    
+    for path in font_paths:
+        if os.path.exists(path):
+            return path
+    
+    # Return None to use default font
+    return None
 
 
 class WordcloudGenerator:
     """Generates word clouds and visualizations from command data."""
     
-    def __init__(self):
-        self.stop_words = {
-            'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-            'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-            'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-            'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these', 'those',
-            'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them',
-            'my', 'your', 'his', 'her', 'its', 'our', 'their', 'mine', 'yours', 'his', 'hers',
-            'ours', 'theirs', 'what', 'which', 'who', 'whom', 'whose', 'where', 'when', 'why',
-            'how', 'all', 'any', 'both', 'each', 'few', 'more', 'most', 'other', 'some', 'such',
-            'no', 'nor', 'not', 'only', 'own', 'same', 'so', 'than', 'too', 'very', 's', 't',
-            'can', 'will', 'just', 'don', 'should', 'now', 'd', 'll', 'm', 'o', 're', 've', 'y',
-            'ain', 'aren', 'couldn', 'didn', 'doesn', 'hadn', 'hasn', 'haven', 'isn', 'ma', 'mightn',
-            'mustn', 'needn', 'shan', 'shouldn', 'wasn', 'weren', 'won', 'wouldn'
-        }
+    # Compiled commemorative page template, shared by every generator
+    _page_template = None
+    
+    def __init__(self, tfidf: bool = False):
+        # Weight word-cloud words by TF-IDF, with every command as a document,
+        # instead of by raw count
+        self.tfidf = tfidf
+        
+        self.stop_words = _STOP_WORDS
         
         # Command-specific stop words
-        self.command_stop_words = {
-            'ls', 'cd', 'pwd', 'echo', 'cat', 'grep', 'find', 'cp', 'mv', 'rm',
-            'mkdir', 'touch', 'chmod', 'chown', 'sudo', 'git', 'docker', 'kubectl',
-            'python', 'node', 'npm', 'yarn', 'pip', 'conda', 'ssh', 'scp', 'rsync',
-            'curl', 'wget', 'ping', 'telnet', 'netstat', 'ps', 'top', 'htop', 'df',
-            'du', 'free', 'uptime', 'who', 'w', 'last', 'history', 'clear', 'exit',
-            'logout', 'source', 'export', 'alias', 'unalias', 'function', 'if', 'then',
-            'else', 'fi', 'for', 'while', 'do', 'done', 'case', 'esac', 'select',
-            'until', 'break', 'continue', 'return', 'shift', 'set', 'unset', 'read',
-            'printf', 'test', '[', ']', '[[', ']]', '(', ')', '{', '}', ';', '&', '|',
-            '&&', '||', '>', '<', '>>', '<<', '2>', '2>>', '&>', '&>>', '|&'
-        }
+        self.command_stop_words = _COMMAND_STOP_WORDS
+        
+        # Command tallies shared by the charts and statistics of one page
+        self._command_counts_cache = None
+        self._lowered_counts_cache = None
     
-    def generate_wordcloud(self, commands_data: List[Dict[str, Any]], output_dir: str) -> str:
+    def generate_wordcloud(self, commands_data: Iterable[Dict[str, Any]], output_dir: str,
+                           filename: str = "command_wordcloud.png") -> str:
         """
         Generate a word cloud from command data.
         
         Args:
-            commands_data: List of command dictionaries
+            commands_data: Command dictionaries; consumed in a single pass,
+                so a stream from DataManager.iter_commands works too
             output_dir: Directory to save the word cloud
+            filename: Image file name within output_dir
             
         Returns:
             Path to the generated word cloud image
         """
-        # Extract and process text
-        text = self._extract_text_from_commands(commands_data)
+        # Count the words worth showing
+        word_counts = self._count_command_words(commands_data)
         
         # Create word cloud
-        wordcloud = self._create_wordcloud(text)
+        wordcloud = self._create_wordcloud(word_counts)
         
         # Save the word cloud
-        output_path = Path(output_dir) / "command_wordcloud.png"
+        output_path = Path(output_dir) / filename
         wordcloud.to_file(str(output_path))
         
         return str(output_path)
@@ -84,46 +163,151 @@ class WordcloudGenerator:
         Returns:
             Path to the generated HTML page
         """
-        # Create visualizations
-        wordcloud_path = self.generate_wordcloud(commands_data, output_dir)
-        command_frequency_path = self._generate_command_frequency_chart(commands_data, output_dir)
-        tool_usage_path = self._generate_tool_usage_chart(commands_data, output_dir)
-        
-        # Generate HTML page
-        html_path = self._generate_html_page(
-            commands_data, insights_data, wordcloud_path, 
-            command_frequency_path, tool_usage_path, output_dir
-        )
+        # Tally the commands once for the charts and the statistics, and
+        # lowercase each distinct command once for the word cloud and tool usage
+        self._command_counts_cache = self._command_counts(commands_data)
+        self._lowered_counts_cache = self._lowered_command_counts(commands_data)
+        try:
+            # Charts drawn earlier from the same commands are reused as they are
+            fingerprint = self._charts_fingerprint(self._command_counts_cache)
+            chart_paths = self._load_cached_charts(output_dir, fingerprint)
+            if chart_paths is None:
+                chart_paths = self._generate_charts(commands_data, output_dir, fingerprint)
+            wordcloud_path, command_frequency_path, tool_usage_path = chart_paths
+            
+            # Generate HTML page
+            html_path = self._generate_html_page(
+                commands_data, insights_data, wordcloud_path, 
+                command_frequency_path, tool_usage_path, output_dir
+            )
+        finally:
+            self._command_counts_cache = None
+            self._lowered_counts_cache = None
         
         return html_path
     
-    def _extract_text_from_commands(self, commands_data: List[Dict[str, Any]]) -> str:
-        """Extract and process text from commands."""
-        all_text = []
+    def _generate_charts(self, commands_data: List[Dict[str, Any]], output_dir: str,
+                         fingerprint: str) -> List[str]:
+        """Draw the page charts and record which commands they show."""
+        manifest_path = Path(output_dir) / _CHARTS_MANIFEST
+        
+        # A stale manifest must not vouch for charts about to be overwritten
+        manifest_path.unlink(missing_ok=True)
+        
+        # Create visualizations. The word cloud only touches PIL, so it renders
+        # in a worker thread while the matplotlib charts are drawn here.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            wordcloud_future = executor.submit(self.generate_wordcloud, commands_data, output_dir)
+            command_frequency_path = self._generate_command_frequency_chart(commands_data, output_dir)
+            tool_usage_path = self._generate_tool_usage_chart(commands_data, output_dir)
+            chart_paths = [wordcloud_future.result(), command_frequency_path, tool_usage_path]
+        
+        # Modification times let a later page notice charts overwritten in between
+        try:
+            manifest = {'fingerprint': fingerprint,
+                        'charts': [[Path(path).name, os.stat(path).st_mtime_ns] if path else None
+                                   for path in chart_paths]}
+            manifest_path.write_text(json.dumps(manifest), encoding='utf-8')
+        except OSError as e:
+            print(f"Warning: Could not record the commemorative charts: {e}")
+        
+        return chart_paths
+    
+    def _charts_fingerprint(self, command_counts: Counter) -> str:
+        """Hash the chart version and the tally of commands the charts show."""
+        canonical = json.dumps([_CHARTS_VERSION, _FIGURE_DPI, self.tfidf, list(command_counts.items())])
+        return hashlib.blake2b(canonical.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _load_cached_charts(self, output_dir: str, fingerprint: str) -> Optional[List[str]]:
+        """Return the charts of an earlier page on the same commands, if all are unchanged."""
+        manifest_path = Path(output_dir) / _CHARTS_MANIFEST
+        if not manifest_path.exists():
+            return None
+        
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            if manifest['fingerprint'] != fingerprint or len(manifest['charts']) != 3:
+                return None
+            charts = [(str(Path(output_dir) / chart[0]), chart[1]) if chart else ("", None)
+                      for chart in manifest['charts']]
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable chart manifest {manifest_path}: {e}")
+            return None
+        
+        try:
+            if any(path and os.stat(path).st_mtime_ns != mtime_ns for path, mtime_ns in charts):
+                return None
+        except OSError:
+            return None
+        
+        return [path for path, _ in charts]
+    
+    def _command_counts(self, commands_data: List[Dict[str, Any]]) -> Counter:
+        """Count each distinct command, reusing the tally of the current page."""
+        if self._command_counts_cache is not None:
+            return self._command_counts_cache
         
-        for cmd in commands_data:
-            command = cmd.get('command', '')
-            
-            # Split command into words
-            words = re.findall(r'\b\w+\b', command.lower())
-            
-            # Filter out stop words and command-specific stop words
-            filtered_words = [
-                word for word in words 
-                if (word not in self.stop_words and 
-                    word not in self.command_stop_words and
-                    len(word) > 2 and
+        return Counter(cmd['command'] for cmd in commands_data)
+    
+    def _lowered_command_counts(self, commands_data: Iterable[Dict[str, Any]]) -> Counter:
+        """Count each distinct lowercased command, lowercasing each distinct command once."""
+        if self._lowered_counts_cache is not None:
+            return self._lowered_counts_cache
+        
+        command_counts = self._command_counts_cache
+        if command_counts is None:
+            command_counts = Counter(cmd.get('command', '') for cmd in commands_data)
+        
+        lowered_counts = Counter()
+        for command, count in command_counts.items():
+            lowered_counts[command.lower()] += count
+        
+        return lowered_counts
+    
+    def _count_command_words(self, commands_data: Iterable[Dict[str, Any]]) -> Counter:
+        """Count or TF-IDF weight the words in commands, splitting each distinct command once."""
+        word_counts = Counter()
+        
+        # Number of commands each word appears in, for TF-IDF weighting
+        document_counts = Counter()
+        total_commands = 0
+        
+        for command, count in self._lowered_command_counts(commands_data).items():
+            # Split command into words, dropping short words, numbers and
+            # general or command-specific stop words
+            words = [
+                word for word in _WORD_RE.findall(command)
+                if (len(word) > 2 and
+                    word not in _ALL_STOP_WORDS and
                     not word.isdigit())
             ]
             
-            all_text.extend(filtered_words)
-        
-        return ' '.join(all_text)
+            if count == 1:
+                word_counts.update(words)
+            else:
+                for word in words:
+                    word_counts[word] += count
+            
+            if self.tfidf:
+                total_commands += count
+                for word in set(words):
+                    document_counts[word] += count
+        
+        if self.tfidf:
+            # Smoothed IDF, so words found in every command keep some weight
+            for word, count in word_counts.items():
+                idf = math.log((1 + total_commands) / (1 + document_counts[word])) + 1
+                word_counts[word] = count * idf
+        
+        return word_counts
     
-    def _create_wordcloud(self, text: str) -> WordCloud:
-        """Create a word cloud from text."""
-        # Count word frequencies
-        word_counts = Counter(text.split())
+    def _create_wordcloud(self, word_counts: Counter) -> WordCloud:
+        """Create a word cloud from word frequencies."""
+        max_words = 100
+        
+        # Only the top max_words can be drawn, so hand WordCloud those instead
+        # of having it sort the whole vocabulary
+        frequencies = dict(word_counts.most_common(max_words))
         
         # Create word cloud
         wordcloud = WordCloud(
@@ -131,7 +315,7 @@ class WordcloudGenerator:
             height=800,
             background_color='white',
             colormap='viridis',
-            max_words=100,
+            max_words=max_words,
             relative_scaling=0.5,
             random_state=42,
             font_path=self._get_font_path(),
@@ -139,37 +323,25 @@ class WordcloudGenerator:
         )
         
         # Generate word cloud
-        wordcloud.generate_from_frequencies(word_counts)
+        wordcloud.generate_from_frequencies(frequencies)
         
         return wordcloud
     
     def _get_font_path(self) -> str:
         """Get a suitable font path for the word cloud."""
-        # Try to find a good font
-        font_paths = [
-            '/System/Library/Fonts/Helvetica.ttc',  # macOS
-            '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',  # Linux
-            'C:/Windows/Fonts/arial.ttf',  # Windows
-        ]
-        
-        for path in font_paths:
-            if os.path.exists(path):
-                return path
-        
-        # Return None to use default font
-        return None
+        return _find_font_path()
     
     def _generate_command_frequency_chart(self, commands_data: List[Dict[str, Any]], output_dir: str) -> str:
         """Generate a command frequency chart."""
         # Count command frequencies
-        command_counts = Counter(cmd['command'] for cmd in commands_data)
-        top_commands = command_counts.most_common(15)
+        top_commands = self._command_counts(commands_data).most_common(15)
         
         if not top_commands:
             return ""
         
-        # Create the chart
-        fig, ax = plt.subplots(figsize=(12, 8))
+        # Create the chart; a standalone Figure skips pyplot's figure registry
+        fig = Figure(figsize=(12, 8))
+        ax = fig.subplots()
         
         commands, counts = zip(*top_commands)
         
@@ -192,48 +364,38 @@ class WordcloudGenerator:
         ax.invert_yaxis()
         
         # Adjust layout
-        plt.tight_layout()
+        fig.tight_layout()
         
         # Save the chart
         output_path = Path(output_dir) / "command_frequency.png"
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.savefig(output_path, dpi=_FIGURE_DPI, bbox_inches='tight')
         
         return str(output_path)
     
     def _generate_tool_usage_chart(self, commands_data: List[Dict[str, Any]], output_dir: str) -> str:
         """Generate a tool usage chart."""
-        # Define tool categories
-        tool_categories = {
-            'git': ['git'],
-            'docker': ['docker'],
-            'kubernetes': ['kubectl', 'k8s'],
-            'python': ['python', 'pip', 'conda'],
-            'node': ['node', 'npm', 'yarn'],
-            'system': ['sudo', 'apt', 'brew', 'yum'],
-            'development': ['vim', 'code', 'subl'],
-            'monitoring': ['top', 'htop', 'ps', 'df'],
-            'network': ['ssh', 'scp', 'curl', 'wget'],
-            'database': ['mysql', 'psql', 'sqlite']
-        }
-        
-        # Count tool usage
-        tool_counts = {}
-        for category, keywords in tool_categories.items():
-            count = sum(1 for cmd in commands_data 
-                       if any(keyword in cmd['command'].lower() for keyword in keywords))
-            if count > 0:
-                tool_counts[category] = count
+        # Count tool usage by the program each distinct command runs,
+        # weighting it by how often it was run
+        tool_counts = dict.fromkeys(_TOOL_CATEGORIES, 0)
+        for command, count in self._lowered_command_counts(commands_data).items():
+            # Split once: only the program name is needed
+            program = (command.split(None, 1) or [''])[0]
+            category = _TOOL_CATEGORY_BY_PROGRAM.get(program)
+            if category is not None:
+                tool_counts[category] += count
+        
+        tool_counts = {category: count for category, count in tool_counts.items() if count > 0}
         
         if not tool_counts:
             return ""
         
         # Create pie chart
-        fig, ax = plt.subplots(figsize=(10, 8))
+        fig = Figure(figsize=(10, 8))
+        ax = fig.subplots()
         
         labels = list(tool_counts.keys())
         sizes = list(tool_counts.values())
-        colors = plt.cm.Set3(np.linspace(0, 1, len(labels)))
+        colors = matplotlib.colormaps['Set3'](np.linspace(0, 1, len(labels)))
         
         # Create pie chart
         wedges, texts, autotexts = ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
@@ -246,12 +408,11 @@ class WordcloudGenerator:
         ax.legend(wedges, labels, title="Tools", loc="center left", bbox_to_anchor=(1, 0, 0.5, 1))
         
         # Adjust layout
-        plt.tight_layout()
+        fig.tight_layout()
         
         # Save the chart
         output_path = Path(output_dir) / "tool_usage.png"
-        plt.savefig(output_path, dpi=300, bbox_inches='tight')
-        plt.close()
+        fig.savefig(output_path, dpi=_FIGURE_DPI, bbox_inches='tight')
         
         return str(output_path)
     
@@ -269,7 +430,27 @@ class WordcloudGenerator:
         stats = self._calculate_statistics(commands_data)
         
         # Create HTML content
-        html_content = f"""
+        html_content = self._get_page_template().render(
+            insights_data=insights_data,
+            stats=stats,
+            wordcloud_rel=wordcloud_rel,
+            command_freq_rel=command_freq_rel,
+            tool_usage_rel=tool_usage_rel
+        )
+        
+        # Save HTML file, encoded in one call and written as a single buffer
+        output_path = Path(output_dir) / "commemorative_page.html"
+        with open(output_path, 'wb') as f:
+            f.write(html_content.encode('utf-8'))
+        
+        return str(output_path)
+    
+    def _get_page_template(self) -> Template:
+        """Get the commemorative page template, compiling it on first use."""
+        if WordcloudGenerator._page_template is not None:
+            return WordcloudGenerator._page_template
+        
+        template_str = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -277,163 +458,163 @@ class WordcloudGenerator:
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>CmdChronicle - Your Command Line Journey</title>
     <style>
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             line-height: 1.6;
             margin: 0;
             padding: 0;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: #333;
-        }}
-        .container {{
+        }
+        .container {
             max-width: 1200px;
             margin: 0 auto;
             padding: 20px;
-        }}
-        .header {{
+        }
+        .header {
             text-align: center;
             color: white;
             margin-bottom: 40px;
-        }}
-        .header h1 {{
+        }
+        .header h1 {
             font-size: 3em;
             margin-bottom: 10px;
             text-shadow: 2px 2px 4px rgba(0,0,0,0.3);
-        }}
-        .header p {{
+        }
+        .header p {
             font-size: 1.2em;
             opacity: 0.9;
-        }}
-        .content {{
+        }
+        .content {
             background: white;
             border-radius: 15px;
             padding: 30px;
             box-shadow: 0 10px 30px rgba(0,0,0,0.2);
             margin-bottom: 30px;
-        }}
-        .stats-grid {{
+        }
+        .stats-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 20px;
             margin-bottom: 30px;
-        }}
-        .stat-card {{
+        }
+        .stat-card {
             background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%);
             color: white;
             padding: 20px;
             border-radius: 10px;
             text-align: center;
             box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-        }}
-        .stat-number {{
+        }
+        .stat-number {
             font-size: 2.5em;
             font-weight: bold;
             margin-bottom: 5px;
-        }}
-        .stat-label {{
+        }
+        .stat-label {
             font-size: 0.9em;
             opacity: 0.9;
-        }}
-        .insights {{
+        }
+        .insights {
             background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%);
             color: white;
             padding: 25px;
             border-radius: 10px;
             margin-bottom: 30px;
-        }}
-        .insights h2 {{
+        }
+        .insights h2 {
             margin-top: 0;
             font-size: 1.8em;
-        }}
-        .insights ul {{
+        }
+        .insights ul {
             list-style: none;
             padding: 0;
-        }}
-        .insights li {{
+        }
+        .insights li {
             margin: 10px 0;
             padding: 10px;
             background: rgba(255,255,255,0.1);
             border-radius: 5px;
-        }}
-        .visualizations {{
+        }
+        .visualizations {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(400px, 1fr));
             gap: 30px;
             margin-bottom: 30px;
-        }}
-        .viz-card {{
+        }
+        .viz-card {
             background: #f8f9fa;
             padding: 20px;
             border-radius: 10px;
             text-align: center;
-        }}
-        .viz-card img {{
+        }
+        .viz-card img {
             max-width: 100%;
             height: auto;
             border-radius: 8px;
             box-shadow: 0 5px 15px rgba(0,0,0,0.1);
-        }}
-        .personality {{
+        }
+        .personality {
             background: linear-gradient(135deg, #fa709a 0%, #fee140 100%);
             color: white;
             padding: 25px;
             border-radius: 10px;
             margin-bottom: 30px;
-        }}
-        .personality h2 {{
+        }
+        .personality h2 {
             margin-top: 0;
             font-size: 1.8em;
-        }}
-        .trait-tags {{
+        }
+        .trait-tags {
             display: flex;
             flex-wrap: wrap;
             gap: 10px;
-        }}
-        .trait-tag {{
+        }
+        .trait-tag {
             background: rgba(255,255,255,0.2);
             padding: 8px 15px;
             border-radius: 20px;
             font-size: 0.9em;
-        }}
-        .footer {{
+        }
+        .footer {
             text-align: center;
             color: white;
             opacity: 0.8;
             font-size: 0.9em;
-        }}
-        @media (max-width: 768px) {{
-            .visualizations {{
+        }
+        @media (max-width: 768px) {
+            .visualizations {
                 grid-template-columns: 1fr;
-            }}
-            .stats-grid {{
+            }
+            .stats-grid {
                 grid-template-columns: repeat(2, 1fr);
-            }}
-        }}
+            }
+        }
     </style>
 </head>
 <body>
     <div class="container">
         <div class="header">
-            <h1>🎯 {insights_data.get('fun_title', 'Your Command Line Journey')}</h1>
-            <p>Generated on {insights_data.get('generated_at', 'Unknown date')}</p>
+            <h1>🎯 {{ insights_data.get('fun_title', 'Your Command Line Journey') }}</h1>
+            <p>Generated on {{ insights_data.get('generated_at', 'Unknown date') }}</p>
         </div>
         
         <div class="content">
             <div class="stats-grid">
                 <div class="stat-card">
-                    <div class="stat-number">{stats['total_commands']}</div>
+                    <div class="stat-number">{{ stats.total_commands }}</div>
                     <div class="stat-label">Total Commands</div>
                 </div>
                 <div class="stat-card">
-                    <div class="stat-number">{stats['unique_commands']}</div>
+                    <div class="stat-number">{{ stats.unique_commands }}</div>
                     <div class="stat-label">Unique Commands</div>
                 </div>
                 <div class="stat-card">
-                    <div class="stat-number">{stats['command_diversity']:.1%}</div>
+                    <div class="stat-number">{{ "%.1f"|format(stats.command_diversity * 100) }}%</div>
                     <div class="stat-label">Command Diversity</div>
                 </div>
                 <div class="stat-card">
-                    <div class="stat-number">{stats['automation_opportunities']}</div>
+                    <div class="stat-number">{{ stats.automation_opportunities }}</div>
                     <div class="stat-label">Automation Opportunities</div>
                 </div>
             </div>
@@ -441,65 +622,64 @@ class WordcloudGenerator:
             <div class="insights">
                 <h2>🤖 AI Insights</h2>
                 <ul>
-                    <li><strong>Workflow Type:</strong> {insights_data.get('workflow_type', 'Unknown').replace('_', ' ').title()}</li>
-                    <li><strong>Primary Focus:</strong> {insights_data.get('primary_focus', 'Unknown').replace('_', ' ').title()}</li>
-                    <li><strong>Skill Level:</strong> {insights_data.get('skill_level', 'Unknown').title()}</li>
-                    <li><strong>Most Used Tool:</strong> {insights_data.get('data_summary', {}).get('top_tools', ['Unknown'])[0] if insights_data.get('data_summary', {}).get('top_tools') else 'Unknown'}</li>
+                    <li><strong>Workflow Type:</strong> {{ insights_data.get('workflow_type', 'Unknown').replace('_', ' ').title() }}</li>
+                    <li><strong>Primary Focus:</strong> {{ insights_data.get('primary_focus', 'Unknown').replace('_', ' ').title() }}</li>
+                    <li><strong>Skill Level:</strong> {{ insights_data.get('skill_level', 'Unknown').title() }}</li>
+                    <li><strong>Most Used Tool:</strong> {{ insights_data.get('data_summary', {}).get('top_tools', ['Unknown'])[0] if insights_data.get('data_summary', {}).get('top_tools') else 'Unknown' }}</li>
                 </ul>
             </div>
             
             <div class="personality">
                 <h2>🎭 Your Command Line Personality</h2>
                 <div class="trait-tags">
-                    {''.join([f'<span class="trait-tag">{trait}</span>' for trait in insights_data.get('personality_traits', [])])}
+                    {% for trait in insights_data.get('personality_traits', []) %}<span class="trait-tag">{{ trait }}</span>{% endfor %}
                 </div>
             </div>
             
             <div class="visualizations">
-                {f'<div class="viz-card"><h3>☁️ Command Word Cloud</h3><img src="{wordcloud_rel}" alt="Command Word Cloud"></div>' if wordcloud_rel else ''}
-                {f'<div class="viz-card"><h3>📊 Command Frequency</h3><img src="{command_freq_rel}" alt="Command Frequency Chart"></div>' if command_freq_rel else ''}
-                {f'<div class="viz-card"><h3>🛠️ Tool Usage</h3><img src="{tool_usage_rel}" alt="Tool Usage Chart"></div>' if tool_usage_rel else ''}
+                {% if wordcloud_rel %}<div class="viz-card"><h3>☁️ Command Word Cloud</h3><img src="{{ wordcloud_rel }}" alt="Command Word Cloud"></div>{% endif %}
+                {% if command_freq_rel %}<div class="viz-card"><h3>📊 Command Frequency</h3><img src="{{ command_freq_rel }}" alt="Command Frequency Chart"></div>{% endif %}
+                {% if tool_usage_rel %}<div class="viz-card"><h3>🛠️ Tool Usage</h3><img src="{{ tool_usage_rel }}" alt="Tool Usage Chart"></div>{% endif %}
             </div>
             
             <div class="insights">
                 <h2>💡 Recommendations</h2>
                 <ul>
-                    {''.join([f'<li>{rec}</li>' for rec in insights_data.get('recommendations', [])])}
+                    {% for rec in insights_data.get('recommendations', []) %}<li>{{ rec }}</li>{% endfor %}
                 </ul>
             </div>
             
             <div class="insights">
                 <h2>🚀 Automation Opportunities</h2>
                 <ul>
-                    {''.join([f'<li>{opp}</li>' for opp in insights_data.get('automation_opportunities', [])])}
+                    {% for opp in insights_data.get('automation_opportunities', []) %}<li>{{ opp }}</li>{% endfor %}
                 </ul>
             </div>
         </div>
         
         <div class="footer">
             <p>Generated by CmdChronicle - Your Command Line Journey Analyzer</p>
-            <p>Model: {insights_data.get('model_used', 'Unknown')}</p>
+            <p>Model: {{ insights_data.get('model_used', 'Unknown') }}</p>
         </div>
     </div>
 </body>
 </html>
 """
-        
-        # Save HTML file
-        output_path = Path(output_dir) / "commemorative_page.html"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        return str(output_path)
+        WordcloudGenerator._page_template = Template(template_str, keep_trailing_newline=True)
+        return WordcloudGenerator._page_template
     
     def _calculate_statistics(self, commands_data: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Calculate statistics for the commemorative page."""
+        command_counts = self._command_counts(commands_data)
+        
         total_commands = len(commands_data)
-        unique_commands = len(set(cmd['command'] for cmd in commands_data))
+        unique_commands = len(command_counts)
         command_diversity = unique_commands / total_commands if total_commands > 0 else 0
         
-        # Count automation opportunities (commands with more than 3 words)
-        automation_opportunities = sum(1 for cmd in commands_data if len(cmd['command'].split()) > 3)
+        # Count automation opportunities (commands with more than 3 words),
+        # splitting each distinct command once and no further than its fourth word
+        automation_opportunities = sum(count for command, count in command_counts.items()
+                                       if len(command.split(maxsplit=3)) > 3)
         
         return {
             'total_commands': total_commands,
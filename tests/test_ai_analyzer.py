@@ -0,0 +1,208 @@
+"""
+Tests for the AI Analyzer
+"""
+
+import json
+import os
+import re
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+import requests
+from src.analyzers import ai_analyzer
+from src.analyzers.ai_analyzer import AIAnalyzer
+
+
+def _insights_json(workflow_type):
+    """A model reply holding a complete insights object."""
+    return json.dumps({
+        'workflow_type': workflow_type,
+        'primary_focus': 'testing',
+        'workflow_characteristics': [],
+        'automation_opportunities': [],
+        'productivity_insights': [],
+        'skill_level': 'expert',
+        'recommendations': [],
+        'fun_title': 'The Tester',
+        'personality_traits': []
+    })
+
+
+def _streamed_reply(text):
+    """A mocked streaming Ollama response carrying text in one chunk."""
+    response = MagicMock(status_code=200)
+    response.__enter__.return_value = response
+    response.iter_lines.return_value = [json.dumps({'response': text, 'done': True}).encode('utf-8')]
+    return response
+
+
+def _fake_ollama(batch_reply=None):
+    """
+    Build a session.post replacement answering each prompt by its dataset.
+    
+    Individual prompts get insights whose workflow_type names the dataset
+    marker found in the prompt; batched prompts get batch_reply(markers).
+    """
+    def post(url, data=None, **kwargs):
+        prompt = json.loads(data)['prompt']
+        markers = re.findall(r'echo (dataset\d+)', prompt)
+        if '=== Dataset' in prompt:
+            return _streamed_reply(batch_reply(markers))
+        return _streamed_reply(_insights_json(markers[0]))
+    return post
+
+
+class TestAIAnalyzer(unittest.TestCase):
+    """Test cases for AIAnalyzer."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_dir = Path(self.tmp.name)
+        self.analyzer = AIAnalyzer(cache_dir=str(self.cache_dir))
+        self.commands = [
+            {'command': 'git status', 'timestamp': 1700000000, 'shell': 'zsh'},
+            {'command': 'pytest -q', 'timestamp': 1700000060, 'shell': 'zsh'},
+        ]
+        self.patterns = {
+            'frequent_commands': [],
+            'tool_usage': {'git': {'count': 1, 'percentage': 50.0}},
+            'workflows': []
+        }
+    
+    def tearDown(self):
+        """Clean up temporary files."""
+        self.analyzer.close()
+        self.tmp.cleanup()
+    
+    def test_unparseable_reply_is_not_cached(self):
+        """Test that text-parsing defaults are not reused for later requests."""
+        replies = ['Sorry, I cannot help with that.', _insights_json('testing_workflow')]
+        
+        with patch.object(self.analyzer, '_request_completion', side_effect=replies) as request:
+            first = self.analyzer.generate_insights(self.commands, self.patterns)
+            second = self.analyzer.generate_insights(self.commands, self.patterns)
+            third = self.analyzer.generate_insights(self.commands, self.patterns)
+        
+        self.assertEqual(first['workflow_type'], 'general_development')
+        self.assertEqual(second['workflow_type'], 'testing_workflow')
+        self.assertEqual(third['workflow_type'], 'testing_workflow')
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+    
+    def test_keep_alive_is_sent_as_given(self):
+        """Test that keep_alive=0 reaches Ollama and only None takes the default."""
+        for keep_alive, expected in ((0, 0), ('5m', '5m'), (None, ai_analyzer.DEFAULT_KEEP_ALIVE)):
+            analyzer = AIAnalyzer(keep_alive=keep_alive)
+            with patch.object(analyzer.session, 'post', side_effect=_fake_ollama()) as post:
+                analyzer.generate_insights(self._datasets(1)[0][0], self.patterns)
+            analyzer.close()
+            self.assertEqual(json.loads(post.call_args.kwargs['data'])['keep_alive'], expected)
+    
+    def test_disk_cache_is_bounded(self):
+        """Test that the oldest cached insights are deleted beyond the limit."""
+        with patch.object(ai_analyzer, 'INSIGHTS_CACHE_MAX_ENTRIES', 2):
+            for i in range(3):
+                self.analyzer._save_cached_insights(f"key{i}", {'workflow_type': str(i)})
+                os.utime(self.cache_dir / f"key{i}.json", (1700000000 + i, 1700000000 + i))
+            self.analyzer._save_cached_insights("key3", {'workflow_type': '3'})
+        
+        self.assertEqual(sorted(os.listdir(self.cache_dir)), ['key2.json', 'key3.json'])
+    
+    def test_circuit_breaker_skips_ollama_after_failures(self):
+        """Test that repeated connection failures stop requests until the cooldown passes."""
+        clock = MagicMock()
+        clock.monotonic.return_value = 1000.0
+        
+        with patch.object(ai_analyzer, 'time', clock), \
+                patch.object(self.analyzer.session, 'post',
+                             side_effect=requests.ConnectionError("refused")) as post:
+            for _ in range(ai_analyzer.CIRCUIT_BREAKER_THRESHOLD + 2):
+                insights = self.analyzer.generate_insights(self.commands, self.patterns)
+                self.assertEqual(insights['model_used'], 'fallback_analysis')
+            self.assertEqual(post.call_count, ai_analyzer.CIRCUIT_BREAKER_THRESHOLD)
+            
+            clock.monotonic.return_value += ai_analyzer.CIRCUIT_BREAKER_COOLDOWN
+            self.analyzer.generate_insights(self.commands, self.patterns)
+            self.assertEqual(post.call_count, ai_analyzer.CIRCUIT_BREAKER_THRESHOLD + 1)
+    
+    def _datasets(self, count):
+        """Distinct (commands_data, patterns_data) inputs tagged dataset0..N."""
+        return [
+            ([{'command': f"echo dataset{i}", 'timestamp': 1700000000 + i, 'shell': 'zsh'}], self.patterns)
+            for i in range(count)
+        ]
+    
+    def test_batch_all_cache_hits(self):
+        """Test that a fully cached batch sends no request."""
+        inputs = self._datasets(3)
+        with patch.object(self.analyzer.session, 'post', side_effect=_fake_ollama()):
+            self.analyzer.generate_insights_many(inputs)
+        
+        with patch.object(self.analyzer.session, 'post') as post:
+            results = self.analyzer.generate_insights_batch(inputs)
+        
+        post.assert_not_called()
+        self.assertEqual([r['workflow_type'] for r in results], ['dataset0', 'dataset1', 'dataset2'])
+        self.assertTrue(all(r['model_used'] == 'llama3.2' for r in results))
+    
+    def test_batch_mixed_hits_and_misses(self):
+        """Test that only the uncached datasets are batched, in input order."""
+        inputs = self._datasets(4)
+        with patch.object(self.analyzer.session, 'post', side_effect=_fake_ollama()):
+            self.analyzer.generate_insights(*inputs[1])
+        
+        def batch_reply(markers):
+            return json.dumps({'results': [json.loads(_insights_json(m)) for m in markers]})
+        
+        with patch.object(self.analyzer.session, 'post', side_effect=_fake_ollama(batch_reply)) as post:
+            results = self.analyzer.generate_insights_batch(inputs)
+        
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(re.findall(r'echo (dataset\d+)', json.loads(post.call_args.kwargs['data'])['prompt']),
+                         ['dataset0', 'dataset2', 'dataset3'])
+        self.assertEqual([r['workflow_type'] for r in results],
+                         ['dataset0', 'dataset1', 'dataset2', 'dataset3'])
+    
+    def test_batch_failure_falls_back_to_individual_requests(self):
+        """Test that an unusable batched reply is retried one dataset at a time."""
+        inputs = self._datasets(3)
+        
+        def batch_reply(markers):
+            return json.dumps({'results': [json.loads(_insights_json(markers[0]))]})
+        
+        with patch.object(self.analyzer.session, 'post', side_effect=_fake_ollama(batch_reply)) as post:
+            results = self.analyzer.generate_insights_batch(inputs, max_workers=2)
+        
+        self.assertEqual(post.call_count, 4)
+        self.assertEqual([r['workflow_type'] for r in results], ['dataset0', 'dataset1', 'dataset2'])
+    
+    def test_generate_insights_many_keeps_input_order(self):
+        """Test that concurrent requests return results in input order."""
+        inputs = self._datasets(6)
+        
+        with patch.object(self.analyzer.session, 'post', side_effect=_fake_ollama()) as post:
+            results = self.analyzer.generate_insights_many(inputs, max_workers=3)
+        
+        self.assertEqual(post.call_count, 6)
+        self.assertEqual([r['workflow_type'] for r in results], [f"dataset{i}" for i in range(6)])
+    
+    def test_generate_insights_pool_shares_one_session(self):
+        """Test that the pool builds, uses and closes a single analyzer."""
+        inputs = self._datasets(3)
+        session = MagicMock()
+        session.post.side_effect = _fake_ollama()
+        
+        with patch.object(ai_analyzer.requests, 'Session', return_value=session) as session_class, \
+                patch.dict(os.environ, {'OLLAMA_NUM_PARALLEL': '2'}):
+            results = AIAnalyzer.generate_insights_pool(inputs, model='llama3.2')
+        
+        session_class.assert_called_once_with()
+        session.close.assert_called_once_with()
+        self.assertEqual(session.post.call_count, 3)
+        self.assertEqual([r['workflow_type'] for r in results], ['dataset0', 'dataset1', 'dataset2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
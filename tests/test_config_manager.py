@@ -0,0 +1,103 @@
+"""
+Tests for the Configuration Manager
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from src.utils.config_manager import ConfigManager
+
+
+class TestConfigManager(unittest.TestCase):
+    """Test cases for ConfigManager."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config_dir = Path(self.tmp.name)
+        self.manager = ConfigManager(str(self.config_dir))
+    
+    def tearDown(self):
+        """Clean up temporary files."""
+        self.tmp.cleanup()
+    
+    def test_saved_settings_are_loaded(self):
+        """Test that settings written by save_config are read back."""
+        self.manager.set('data.compression_enabled', True)
+        self.manager.save_config()
+        
+        reloaded = ConfigManager(str(self.config_dir))
+        
+        self.assertTrue(reloaded.get('data.compression_enabled'))
+        self.assertEqual(reloaded.get('ollama.base_url'), 'http://localhost:11434')
+        self.assertNotIn('metadata', reloaded.config)
+    
+    def test_ignore_matcher(self):
+        """Test that the matcher follows collection.ignore_patterns."""
+        matcher = self.manager.get_ignore_matcher()
+        
+        self.assertTrue(matcher('history'))
+        self.assertTrue(matcher('cd'))
+        self.assertTrue(matcher('ls  '))
+        self.assertTrue(matcher('   '))
+        self.assertFalse(matcher('cd src'))
+        self.assertFalse(matcher('git status'))
+        self.assertIs(self.manager.get_ignore_matcher(), matcher)
+        
+        self.manager.set('collection.ignore_patterns', ['^git ', 'secret'])
+        matcher = self.manager.get_ignore_matcher()
+        
+        self.assertTrue(matcher('git status'))
+        self.assertTrue(matcher('secret-tool lookup'))
+        self.assertFalse(matcher('echo secret'))
+        self.assertFalse(matcher('history'))
+    
+    def test_ignore_matcher_skips_invalid_patterns(self):
+        """Test that an invalid pattern is skipped without disabling the others."""
+        self.manager.set('collection.ignore_patterns', ['(unclosed', '^history$'])
+        matcher = self.manager.get_ignore_matcher()
+        
+        self.assertTrue(matcher('history'))
+        self.assertIsNone(matcher('(unclosed'))
+        
+        self.manager.set('collection.ignore_patterns', [])
+        self.assertIsNone(self.manager.get_ignore_matcher()('history'))
+    
+    def _assert_model(self, model):
+        """Check get() and the ollama view both report model."""
+        self.assertEqual(self.manager.get('ollama.default_model'), model)
+        self.assertEqual(self.manager.get_ollama_config()['model'], model)
+    
+    def test_cached_lookups_follow_every_change(self):
+        """Test that memoized get() results and section views never go stale."""
+        self._assert_model('llama3.2')
+        
+        self.manager.set('ollama.default_model', 'set-model')
+        self._assert_model('set-model')
+        
+        self.manager.update({'ollama.default_model': 'update-model', 'ollama.timeout': 5})
+        self._assert_model('update-model')
+        
+        self.manager.reload()
+        self._assert_model('llama3.2')
+        
+        self.manager.create_profile('work', {'ollama': {'default_model': 'profile-model'}})
+        self._assert_model('llama3.2')
+        self.assertTrue(self.manager.load_profile('work'))
+        self._assert_model('profile-model')
+        
+        import_path = self.config_dir / 'import.json'
+        import_path.write_text(json.dumps({'config': {'ollama': {'default_model': 'imported-model'}}}))
+        self.assertTrue(self.manager.import_config(str(import_path), persist=False))
+        self._assert_model('imported-model')
+        
+        self.manager.set('ollama.default_model', 'saved-model')
+        self.manager.save_config()
+        self.manager.set('ollama.default_model', 'unsaved-model')
+        self.manager.reload()
+        self._assert_model('saved-model')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Tests for the Data Manager
+"""
+
+import csv
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+from src.utils.data_manager import DataManager
+
+
+class TestDataManager(unittest.TestCase):
+    """Test cases for DataManager."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.tmp.name)
+        self.manager = DataManager(str(self.data_dir))
+        self.commands = [
+            {'command': 'git status', 'timestamp': 1700000000.5, 'source': 'history'},
+            {'command': 'echo "a, b] {c}"', 'timestamp': 1700000060.25, 'source': 'history'},
+        ]
+    
+    def tearDown(self):
+        """Clean up temporary files."""
+        self.tmp.cleanup()
+    
+    def test_iter_commands_matches_load(self):
+        """Test streaming commands from the metadata-wrapped format."""
+        path = self.manager.save_commands(self.commands, str(self.data_dir / 'commands.json'))
+        
+        self.assertEqual(list(self.manager.iter_commands(path)), self.manager.load_commands(path))
+    
+    def test_iter_commands_old_format(self):
+        """Test streaming commands from a bare JSON list."""
+        path = self.data_dir / 'old_commands.json'
+        path.write_text(json.dumps(self.commands), encoding='utf-8')
+        
+        self.assertEqual(list(self.manager.iter_commands(str(path))), self.commands)
+    
+    def test_iter_commands_missing_file(self):
+        """Test that a missing file is reported before iteration starts."""
+        with self.assertRaises(FileNotFoundError):
+            self.manager.iter_commands(str(self.data_dir / 'missing.json'))
+    
+    def test_save_commands_failure_keeps_previous_file(self):
+        """Test that a failing command source leaves the old file untouched."""
+        path = self.manager.save_commands(self.commands, str(self.data_dir / 'commands.json'))
+        
+        def failing_commands():
+            yield self.commands[0]
+            raise RuntimeError("collection failed")
+        
+        with self.assertRaises(RuntimeError):
+            self.manager.save_commands(failing_commands(), path)
+        
+        self.assertEqual(self.manager.load_commands(path), self.commands)
+        self.assertEqual(sorted(p.name for p in self.data_dir.iterdir()), ['commands.json'])
+    
+    def test_compressed_round_trip(self):
+        """Test that gzipped data files load, stream and export like plain ones."""
+        manager = DataManager(str(self.data_dir), compression_enabled=True)
+        commands_path = manager.save_commands(self.commands, str(self.data_dir / 'commands.json'))
+        patterns_path = manager.save_patterns({'tool_usage': {'git': 1}}, str(self.data_dir / 'patterns.json'))
+        insights_path = manager.save_insights({'workflow_type': 'dev'}, str(self.data_dir / 'insights.json'))
+        
+        for path in (commands_path, patterns_path, insights_path):
+            self.assertEqual(gzip.decompress(Path(path).read_bytes())[:1], b'{')
+        self.assertEqual(manager.load_commands(commands_path), self.commands)
+        self.assertEqual(list(manager.iter_commands(commands_path)), self.commands)
+        self.assertEqual(manager.load_patterns(patterns_path), {'tool_usage': {'git': 1}})
+        self.assertEqual(manager.load_insights(insights_path)['workflow_type'], 'dev')
+        
+        export_dir = self.data_dir / 'export'
+        with open(manager.export_data(str(export_dir)), 'rb') as f:
+            exported = json.load(f)['data_files']
+        self.assertEqual(exported['commands.json']['commands'], self.commands)
+        self.assertEqual(exported['patterns.json']['patterns'], {'tool_usage': {'git': 1}})
+        
+        with open(manager.export_data(str(export_dir), format='csv'), newline='', encoding='utf-8') as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], ['command', 'timestamp', 'source'])
+        self.assertEqual([row[0] for row in rows[1:]], [cmd['command'] for cmd in self.commands])
+    
+    def test_file_hash_matches_content_hash(self):
+        """Test that hashing a file in chunks matches hashing its bytes."""
+        path = self.manager.save_commands(self.commands, str(self.data_dir / 'commands.json'))
+        raw = Path(path).read_bytes()
+        
+        self.assertEqual(self.manager.file_hash(path, prefix=b'v1'), self.manager.content_hash(b'v1' + raw))
+    
+    def test_cache_keeps_most_recently_used_entries(self):
+        """Test that the cache evicts its least recently used entries."""
+        with patch('src.utils.data_manager._CACHE_MAX_ENTRIES', 2):
+            for i, key in enumerate(('a', 'b')):
+                self.manager.save_cached('patterns', key, {'n': i})
+                os.utime(self.manager.cache_dir('patterns') / f"{key}.json", (1700000000 + i,) * 2)
+            self.assertEqual(self.manager.load_cached('patterns', 'a'), {'n': 0})
+            self.manager.save_cached('patterns', 'c', {'n': 2})
+        
+        self.assertEqual(sorted(os.listdir(self.manager.cache_dir('patterns'))), ['a.json', 'c.json'])
+    
+    def test_load_cached_reads_rewritten_entries(self):
+        """Test that a rewritten cache entry is read again rather than served from memory."""
+        self.manager.save_cached('patterns', 'key', {'n': 0})
+        self.assertEqual(self.manager.load_cached('patterns', 'key'), {'n': 0})
+        
+        self.manager.save_cached('patterns', 'key', {'n': 1})
+        
+        self.assertEqual(self.manager.load_cached('patterns', 'key'), {'n': 1})
+        self.assertEqual(os.listdir(self.manager.cache_dir('patterns')), ['key.json'])
+    
+    def test_cleanup_old_data_removes_stale_cache_entries(self):
+        """Test that cleanup also drops cache entries unused for too long."""
+        self.manager.save_cached('patterns', 'old', {'n': 0})
+        self.manager.save_cached('patterns', 'new', {'n': 1})
+        os.utime(self.manager.cache_dir('patterns') / 'old.json', (1700000000,) * 2)
+        
+        self.assertEqual(self.manager.cleanup_old_data(days=30), 1)
+        self.assertEqual(os.listdir(self.manager.cache_dir('patterns')), ['new.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,7 @@
 Tests for the Command History Collector
 """
 
+import re
 import unittest
 from unittest.mock import patch, MagicMock
 from src.collectors.history_collector import CommandHistoryCollector
@@ -36,6 +37,15 @@ class TestCommandHistoryCollector(unittest.TestCase):
         self.assertFalse(self.collector._is_ignored_command('git status'))
         self.assertFalse(self.collector._is_ignored_command('ls -la'))
     
+    def test_ignore_matcher(self):
+        """Test filtering with configured ignore patterns."""
+        collector = CommandHistoryCollector(ignore_matcher=re.compile(r'^git ').match)
+        lines = [': 1700000000:0;git status\n', ': 1700000060:0;history\n', ': 1700000120:0;make\n']
+        
+        commands = collector._parse_zsh_history(lines, 10)
+        
+        self.assertEqual([cmd['command'] for cmd in commands], ['history', 'make'])
+    
     def test_deduplicate_commands(self):
         """Test command deduplication."""
         commands = [
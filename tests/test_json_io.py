@@ -0,0 +1,36 @@
+"""
+Tests for the shared JSON helpers
+"""
+
+import json
+import math
+import unittest
+from src.utils.json_io import dumps_json, loads_json
+
+
+class TestJsonIO(unittest.TestCase):
+    """Test cases for dumps_json and loads_json."""
+    
+    def test_round_trip(self):
+        """Test that indented and compact output both parse back."""
+        data = {'b': [1, 2.5, None], 'a': 'ünïcode', 'wide': 2 ** 70}
+        
+        self.assertEqual(loads_json(dumps_json(data)), data)
+        self.assertEqual(loads_json(dumps_json(data, indent=False)), data)
+        self.assertNotIn(b'\n', dumps_json(data, indent=False))
+    
+    def test_sort_keys_and_default(self):
+        """Test the options used for hashing and for values JSON cannot represent."""
+        self.assertEqual(dumps_json({'b': 1, 'a': 2}, indent=False, sort_keys=True), b'{"a":2,"b":1}')
+        self.assertEqual(dumps_json({'s': {1}}, indent=False, default=str), b'{"s":"{1}"}')
+    
+    def test_loads_accepts_nan_and_str(self):
+        """Test the stdlib fallback for NaN and parsing from str."""
+        self.assertTrue(math.isnan(loads_json(b'[NaN]')[0]))
+        self.assertEqual(loads_json('{"a": 1}'), {'a': 1})
+        with self.assertRaises(json.JSONDecodeError):
+            loads_json(b'{"a":')
+
+
+if __name__ == '__main__':
+    unittest.main()
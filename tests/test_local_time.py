@@ -0,0 +1,32 @@
+"""
+Tests for the shared local-time helpers
+"""
+
+import time
+import unittest
+from src.utils.local_time import TIME_SLOT_SECONDS, local_fields, slot_local_fields
+
+
+class TestLocalTime(unittest.TestCase):
+    """Test cases for local_fields and slot_local_fields."""
+    
+    def test_slot_fields_match_each_timestamp(self):
+        """Test that a slot's shared fields hold for every timestamp in it."""
+        start = (1700000000 // TIME_SLOT_SECONDS) * TIME_SLOT_SECONDS
+        for slot_start in range(start, start + 2 * 86400, TIME_SLOT_SECONDS):
+            fields = slot_local_fields(slot_start // TIME_SLOT_SECONDS)
+            for timestamp in (slot_start, slot_start + 450, slot_start + TIME_SLOT_SECONDS - 1):
+                self.assertEqual(fields or local_fields(timestamp), local_fields(timestamp))
+    
+    def test_local_fields(self):
+        """Test that local_fields reports the local hour, weekday and date."""
+        timestamp = 1700000000
+        local = time.localtime(timestamp)
+        hour, weekday, ordinal = local_fields(timestamp)
+        
+        self.assertEqual((hour, weekday), (local.tm_hour, local.tm_wday))
+        self.assertEqual(ordinal - local_fields(timestamp - 86400)[2], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
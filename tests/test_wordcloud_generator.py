@@ -0,0 +1,43 @@
+"""
+Tests for the Word Cloud Generator
+"""
+
+import math
+import unittest
+from collections import Counter
+from src.visualizers.wordcloud_generator import WordcloudGenerator
+
+
+class TestWordcloudGenerator(unittest.TestCase):
+    """Test cases for WordcloudGenerator."""
+    
+    def setUp(self):
+        """Set up test fixtures."""
+        self.commands = [
+            {'command': 'deploy build image'},
+            {'command': 'deploy build image'},
+            {'command': 'deploy push image'},
+            {'command': 'Deploy logs'},
+        ]
+    
+    def test_count_command_words(self):
+        """Test plain counts weight each word by how often its commands ran."""
+        word_counts = WordcloudGenerator()._count_command_words(self.commands)
+        
+        self.assertEqual(word_counts, Counter({'deploy': 4, 'image': 3, 'build': 2, 'push': 1, 'logs': 1}))
+    
+    def test_count_command_words_tfidf(self):
+        """Test TF-IDF keeps words found in every command and boosts rarer ones."""
+        word_counts = WordcloudGenerator(tfidf=True)._count_command_words(self.commands)
+        
+        # A word in every command gets IDF 1, so its weight is its raw count
+        self.assertAlmostEqual(word_counts['deploy'], 4)
+        # 'push' appears in one of four commands: IDF = ln(5 / 2) + 1
+        self.assertAlmostEqual(word_counts['push'], math.log(5 / 2) + 1)
+        self.assertGreater(word_counts['push'], 1)
+        self.assertGreater(word_counts['build'] / 2, word_counts['image'] / 3)
+        self.assertEqual(set(word_counts), {'deploy', 'image', 'build', 'push', 'logs'})
+
+
+if __name__ == '__main__':
+    unittest.main()